@@ -0,0 +1,31 @@
+# Results table of the offline bulk recommendation scoring tasks (app/tasks.py)
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'bulk_recommendations'
+down_revision = 'car_feature_associations_backfill'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'bulk_recommendations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.String(length=64), nullable=False),
+        sa.Column('query_index', sa.Integer(), nullable=False),
+        sa.Column('query', sa.Text(), nullable=False),
+        sa.Column('params', sa.Text(), nullable=False),
+        sa.Column('car_ids', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('job_id', 'query_index', name='uq_bulk_recommendations_job_query')
+    )
+    op.create_index(op.f('ix_bulk_recommendations_id'), 'bulk_recommendations', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_bulk_recommendations_id'), table_name='bulk_recommendations')
+    op.drop_table('bulk_recommendations')
@@ -0,0 +1,62 @@
+# Normalized car features: backfill car_features / car_feature_associations from the
+# comma-separated cars.features text and index the associations for the feature filter
+
+from datetime import datetime
+
+import sqlalchemy as sa
+from alembic import op
+from app.utils.car_features import split_features
+
+# revision identifiers, used by Alembic.
+revision = 'car_feature_associations_backfill'
+down_revision = 'car_natural_key'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+cars = sa.table('cars', sa.column('id'), sa.column('features'))
+car_features = sa.table('car_features', sa.column('id'), sa.column('name'), sa.column('created_at'))
+associations = sa.table('car_feature_associations', sa.column('car_id'), sa.column('feature_id'))
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_car_feature_associations_feature_car', 'car_feature_associations',
+        ['feature_id', 'car_id'], unique=False
+    )
+
+    bind = op.get_bind()
+    feature_ids = dict(bind.execute(sa.select(car_features.c.name, car_features.c.id)).all())
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(cars.c.id, cars.c.features)
+            .where(cars.c.id > last_id).order_by(cars.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        names_by_car = {row.id: split_features(row.features) for row in rows}
+
+        new_names = sorted({name for names in names_by_car.values() for name in names} - feature_ids.keys())
+        if new_names:
+            now = datetime.utcnow()
+            bind.execute(car_features.insert(), [{'name': name, 'created_at': now} for name in new_names])
+            feature_ids.update(bind.execute(
+                sa.select(car_features.c.name, car_features.c.id).where(car_features.c.name.in_(new_names))
+            ).all())
+
+        # Re-running the backfill replaces the rows of each batch instead of duplicating them
+        bind.execute(associations.delete().where(associations.c.car_id.in_(list(names_by_car))))
+        values = [
+            {'car_id': car_id, 'feature_id': feature_ids[name]}
+            for car_id, names in names_by_car.items() for name in names
+        ]
+        if values:
+            bind.execute(associations.insert(), values)
+
+
+def downgrade() -> None:
+    # The backfilled rows are derived from cars.features and are left in place
+    op.drop_index('ix_car_feature_associations_feature_car', table_name='car_feature_associations')
@@ -0,0 +1,26 @@
+# Composite indexes for the car filter predicates built by CarRepository.build_filter_conditions
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'car_filter_indexes'
+down_revision = 'initial_revision'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_cars_lower_make_year', 'cars', [sa.text('lower(make)'), 'year'], unique=False)
+    op.create_index('ix_cars_body_type_price', 'cars', ['body_type', 'price'], unique=False)
+    op.create_index('ix_cars_fuel_type_transmission_price', 'cars', ['fuel_type', 'transmission', 'price'], unique=False)
+    op.create_index('ix_cars_year_price', 'cars', ['year', 'price'], unique=False)
+    op.create_index('ix_cars_horsepower', 'cars', ['horsepower'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cars_horsepower', table_name='cars')
+    op.drop_index('ix_cars_year_price', table_name='cars')
+    op.drop_index('ix_cars_fuel_type_transmission_price', table_name='cars')
+    op.drop_index('ix_cars_body_type_price', table_name='cars')
+    op.drop_index('ix_cars_lower_make_year', table_name='cars')
@@ -0,0 +1,20 @@
+# Full-text search for /cars/search: tsvector + GIN on PostgreSQL, FTS5 on SQLite
+
+from alembic import op
+from app.db.fulltext import create_statements, drop_statements
+
+# revision identifiers, used by Alembic.
+revision = 'car_fulltext_search'
+down_revision = 'car_filter_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for statement in create_statements(op.get_bind().dialect.name):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in drop_statements(op.get_bind().dialect.name):
+        op.execute(statement)
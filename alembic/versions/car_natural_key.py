@@ -0,0 +1,54 @@
+# Unique (make, model, year) natural key for cars, the conflict target of catalog imports
+
+from itertools import groupby
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'car_natural_key'
+down_revision = 'user_profile_fields'
+branch_labels = None
+depends_on = None
+
+# Duplicate groups listed in the error; the rest are only counted
+MAX_LISTED_GROUPS = 50
+
+# Every car that shares its (make, model, year) with another one
+DUPLICATE_CARS = sa.text(
+    "SELECT c.id, c.make, c.model, c.year FROM cars c "
+    "JOIN (SELECT make, model, year FROM cars GROUP BY make, model, year HAVING COUNT(*) > 1) d "
+    "ON c.make = d.make AND c.model = d.model AND c.year = d.year "
+    "ORDER BY c.make, c.model, c.year, c.id"
+)
+
+
+def upgrade() -> None:
+    # Duplicates may carry recommendations and differ in price or specs: which row to keep is
+    # a data decision, so the migration refuses to run instead of deleting any of them
+    rows = op.get_bind().execute(DUPLICATE_CARS).all()
+    if rows:
+        groups = [
+            (key, [row.id for row in group])
+            for key, group in groupby(rows, key=lambda row: (row.make, row.model, row.year))
+        ]
+        listed = "\n".join(
+            f"  {make} {model} {year}: car ids {', '.join(map(str, ids))}"
+            for (make, model, year), ids in groups[:MAX_LISTED_GROUPS]
+        )
+        if len(groups) > MAX_LISTED_GROUPS:
+            listed += f"\n  ... and {len(groups) - MAX_LISTED_GROUPS} more groups"
+        raise RuntimeError(
+            f"Cannot add the unique (make, model, year) key: {len(groups)} groups of cars share it.\n"
+            f"{listed}\n"
+            "Merge or rename these cars, moving their recommendations and feature associations "
+            "to the car that stays, then run the migration again."
+        )
+
+    with op.batch_alter_table('cars') as batch_op:
+        batch_op.create_unique_constraint('uq_cars_make_model_year', ['make', 'model', 'year'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('cars') as batch_op:
+        batch_op.drop_constraint('uq_cars_make_model_year', type_='unique')
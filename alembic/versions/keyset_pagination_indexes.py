@@ -0,0 +1,19 @@
+# Composite indexes backing the keyset (cursor) pagination of chat sessions and messages
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'keyset_pagination_indexes'
+down_revision = 'car_fulltext_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_chat_sessions_user_updated_at_id', 'chat_sessions', ['user_id', 'updated_at', 'id'], unique=False)
+    op.create_index('ix_messages_session_timestamp_id', 'messages', ['chat_session_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_session_timestamp_id', table_name='messages')
+    op.drop_index('ix_chat_sessions_user_updated_at_id', table_name='chat_sessions')
@@ -0,0 +1,20 @@
+# Profile fields collected by /auth/register, previously kept only in memory
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'user_profile_fields'
+down_revision = 'keyset_pagination_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('full_name', sa.String(length=100), nullable=True))
+    op.add_column('users', sa.Column('phone', sa.String(length=20), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'phone')
+    op.drop_column('users', 'full_name')
@@ -3,8 +3,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-import uuid
-from datetime import datetime, timedelta
+from datetime import datetime
+from app.core.config import settings
+from app.services.user import UserService
+from app.services.password import PasswordHasherBusy, password_hasher
+from app.services.user_index import user_index
 
 router = APIRouter()
 
@@ -12,6 +15,7 @@ router = APIRouter()
 class UserCreate(BaseModel):
     email: EmailStr
     password: str
+    username: Optional[str] = None
     name: Optional[str] = None  # поддержка поля name от фронтенда
     full_name: Optional[str] = None  # поддержка поля full_name
     phone: Optional[str] = None
@@ -25,7 +29,7 @@ class UserCreate(BaseModel):
 class UserResponse(BaseModel):
     id: str
     email: str
-    full_name: str
+    full_name: Optional[str] = None
     phone: Optional[str] = None
     is_active: bool = True
     is_verified: bool = False
@@ -45,91 +49,92 @@ class TokenResponse(BaseModel):
     expires_in: int = 3600
     user: dict
 
-# ========== IN-MEMORY БД для теста ==========
-users_db = []
+# ========== СЕРВИСЫ ==========
+user_service = UserService()
+
+def to_user_response(user) -> UserResponse:
+    return UserResponse(
+        id=str(user.id),
+        email=user.email,
+        full_name=user.full_name,
+        phone=user.phone,
+        is_active=user.is_active,
+        is_verified=user.is_verified
+    )
 
 # ========== ЭНДПОИНТЫ ==========
 @router.post("/register", response_model=UserResponse)
-async def register_user(user: UserCreate):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """Регистрация пользователя"""
     print(f"✅ REGISTER: {user.email}")
-    
-    # Проверка существующего email
-    for existing in users_db:
-        if existing["email"] == user.email:
-            raise HTTPException(400, "Email already exists")
-    
-    # Создание пользователя
-    new_user = {
-        "id": str(uuid.uuid4()),
-        "email": user.email,
-        "password": user.password,  # В продакшене хэшировать!
-        "full_name": user.full_name,
-        "phone": user.phone,
-        "is_active": True,
-        "is_verified": False
-    }
-    
-    users_db.append(new_user)
-    print(f"✅ User created: {user.email}, total users: {len(users_db)}")
-    
-    return UserResponse(**new_user)
+
+    try:
+        new_user = await user_service.register_account(
+            db, user.email, user.password,
+            username=user.username, full_name=user.full_name, phone=user.phone
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except PasswordHasherBusy:
+        raise HTTPException(503, "Too many concurrent requests, try again")
+
+    print(f"✅ User created: {user.email}")
+    return to_user_response(new_user)
 
 @router.post("/login", response_model=TokenResponse)
-async def login_user(login_data: LoginRequest):
+async def login_user(login_data: LoginRequest, db: AsyncSession = Depends(get_db)):
     """Аутентификация пользователя"""
     print(f"✅ LOGIN attempt: email={login_data.email}, username={login_data.username}")
-    
+
     # Определяем что использовать для поиска
     search_value = login_data.email or login_data.username
-    
+
     if not search_value:
         raise HTTPException(400, "Email or username is required")
-    
-    # Ищем пользователя
-    user = None
-    for u in users_db:
-        if u["email"] == search_value or u["id"] == search_value:
-            user = u
-            break
-    
+
+    # Ищем пользователя через индекс email/username (O(1)), затем по первичному ключу
+    user = await user_service.find_login_user(db, search_value)
+
     if not user:
         print(f"❌ User not found: {search_value}")
         raise HTTPException(401, "Invalid credentials")
-    
-    # Простая проверка пароля
-    if user["password"] != login_data.password:
+
+    try:
+        user = await user_service.check_password(db, user, login_data.password)
+    except PasswordHasherBusy:
+        raise HTTPException(503, "Too many concurrent requests, try again")
+    if not user:
         print(f"❌ Invalid password for: {search_value}")
         raise HTTPException(401, "Invalid credentials")
-    
-    print(f"✅ Successful login: {user['email']}")
-    
-    # Генерируем токен
-    token = f"jwt_{user['id']}_{datetime.now().timestamp()}"
-    
+
+    print(f"✅ Successful login: {user.email}")
+
     return TokenResponse(
-        access_token=token,
+        access_token=user_service.create_user_token(user),
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
         user={
-            "id": user["id"],
-            "email": user["email"],
-            "full_name": user["full_name"],
-            "is_active": user["is_active"]
+            "id": str(user.id),
+            "email": user.email,
+            "full_name": user.full_name,
+            "is_active": user.is_active
         }
     )
 
 @router.get("/test")
-async def test():
+async def test(db: AsyncSession = Depends(get_db)):
     """Тестовый эндпоинт"""
     return {
         "status": "ok",
         "router": "auth",
-        "users_count": len(users_db)
+        "users_count": await user_service.repository.count(db)
     }
 
 @router.get("/debug")
-async def debug():
-    """Отладочная информация"""
+async def debug(db: AsyncSession = Depends(get_db)):
+    """Отладочная информация: только счётчики, без списка пользователей"""
     return {
-        "users": users_db,
+        "users_count": await user_service.repository.count(db),
+        "login_index": user_index.stats,
+        "password_hasher": password_hasher.stats,
         "timestamp": datetime.now().isoformat()
-    }
\ No newline at end of file
+    }
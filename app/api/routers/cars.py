@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.services.car import CarService
+from app.services.car import CarService, DuplicateCarError, public_car_json
+from app.core.conditional import not_modified
 from app.core.security import get_current_user
 from app.schemas.user import CarCreate, CarInDB, CarUpdate, CarPublic, SuccessResponse
 
@@ -10,6 +12,16 @@ router = APIRouter()
 car_service = CarService()
 
 
+def _car_list_response(rows: list, next_cursor: Optional[str], headers: Dict[str, str]) -> Response:
+    """
+    JSON of a CarPublic list straight from rows of its columns. Returning a Response skips the
+    response_model validation, which stays declared for the OpenAPI schema.
+    """
+    if next_cursor:
+        headers = {**headers, "X-Next-Cursor": next_cursor}
+    return Response(content=public_car_json(rows), media_type="application/json", headers=headers)
+
+
 @router.post("/", response_model=CarInDB, status_code=status.HTTP_201_CREATED)
 async def create_car(
     car: CarCreate,
@@ -17,26 +29,44 @@ async def create_car(
     db: AsyncSession = Depends(get_db)
 ):
     # In a real app, you might check if the user has admin privileges
-    db_car = await car_service.create_car(db, car)
+    try:
+        db_car = await car_service.create_car(db, car)
+    except DuplicateCarError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return db_car
 
 
 @router.get("/", response_model=list[CarPublic])
 async def get_cars(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    cars = await car_service.get_all_cars(db, skip=skip, limit=limit)
-    return [CarPublic.from_orm(car) for car in cars]
+    # Validators are read before the query so they never claim newer data
+    headers = await car_service.catalog_validators(db)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    try:
+        rows, next_cursor = await car_service.get_all_car_rows(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _car_list_response(rows, next_cursor, headers)
 
 
 @router.get("/{car_id}", response_model=CarPublic)
-async def get_car(car_id: int, db: AsyncSession = Depends(get_db)):
-    car = await car_service.get_car_by_id(db, car_id)
-    if not car:
+async def get_car(car_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    headers = await car_service.catalog_validators(db)
+    content = await car_service.get_public_car_json(db, car_id)
+    if content is None:
         raise HTTPException(status_code=404, detail="Car not found")
-    return CarPublic.from_orm(car)
+    # Preconditions only apply to a car that exists; a cache hit makes this free
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    return Response(content=content, media_type="application/json", headers=headers)
 
 
 @router.put("/{car_id}", response_model=CarInDB)
@@ -46,7 +76,10 @@ async def update_car(
     current_user: dict = Depends(get_current_user),  # Admin check could be added here
     db: AsyncSession = Depends(get_db)
 ):
-    updated_car = await car_service.update_car(db, car_id, car_update)
+    try:
+        updated_car = await car_service.update_car(db, car_id, car_update)
+    except DuplicateCarError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not updated_car:
         raise HTTPException(status_code=404, detail="Car not found")
     return updated_car
@@ -65,6 +98,21 @@ async def delete_car(
 
 
 @router.get("/search/{query}", response_model=list[CarPublic])
-async def search_cars(query: str, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
-    cars = await car_service.search_cars(db, query, skip=skip, limit=limit)
-    return [CarPublic.from_orm(car) for car in cars]
\ No newline at end of file
+async def search_cars(
+    query: str,
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    headers = await car_service.catalog_validators(db)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    try:
+        rows, next_cursor = await car_service.search_car_rows(db, query, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Results are ranked by relevance; the cursor fetches the next page without OFFSET
+    return _car_list_response(rows, next_cursor, headers)
\ No newline at end of file
@@ -1,4 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.services.user import ChatService
@@ -6,6 +10,8 @@ from app.core.security import get_current_user
 from app.schemas.user import ChatRequest, ChatResponse, SuccessResponse
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 chat_service = ChatService()
 
@@ -25,12 +31,58 @@ async def send_message(
         raise HTTPException(status_code=500, detail="An error occurred while processing your request")
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/send/stream")
+async def send_message_stream(
+    chat_request: ChatRequest,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Same as /send, streamed as Server-Sent Events: "params", one "car" event per
+    recommendation as soon as it is found, then "done" (or "error").
+    """
+    try:
+        session = await chat_service.resolve_session(db, current_user.id, chat_request.session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        try:
+            async for event, data in chat_service.stream_chat_request(db, current_user.id, chat_request, session):
+                yield _sse(event, data)
+        except Exception:
+            logger.exception("Streaming chat request failed")
+            yield _sse("error", {"detail": "An error occurred while processing your request"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so events reach the client immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/sessions", response_model=list[dict])
 async def get_user_sessions(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
     current_user = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    sessions = await chat_service.get_user_sessions(db, current_user.id)
+    try:
+        sessions, next_cursor = await chat_service.get_user_sessions(
+            db, current_user.id, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [
         {
             "id": session.id,
@@ -45,6 +97,10 @@ async def get_user_sessions(
 @router.get("/sessions/{session_id}/messages", response_model=list[dict])
 async def get_session_messages(
     session_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
     current_user = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -53,7 +109,14 @@ async def get_session_messages(
     if not session or session.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    messages = await chat_service.get_session_messages(db, session_id)
+    try:
+        messages, next_cursor = await chat_service.get_session_messages(
+            db, session_id, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [
         {
             "id": msg.id,
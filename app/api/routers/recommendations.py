@@ -0,0 +1,59 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
+from app.core.config import settings
+from app.core.security import get_current_user
+from app.schemas.user import RecommendationBatchItem, RecommendationBatchRequest, RecommendationBatchResponse
+from app.utils.car_recommender import recommendation_engine
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+NDJSON = "application/x-ndjson"
+
+
+@router.post("/recommendations/batch", response_model=RecommendationBatchResponse)
+async def recommend_batch(
+    batch: RecommendationBatchRequest,
+    request: Request,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Recommendations for many free-text queries at once, without chat sessions. Results come
+    back in input order; with "Accept: application/x-ndjson" they stream as one JSON line
+    per query as soon as each is answered.
+    """
+    if len(batch.queries) > settings.RECOMMENDATION_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.RECOMMENDATION_BATCH_MAX_QUERIES} queries per batch"
+        )
+
+    items = recommendation_engine.iter_batch(db, batch.queries, batch.limit)
+
+    if NDJSON in request.headers.get("accept", ""):
+        async def lines():
+            try:
+                async for position, query, params, cars in items:
+                    item = RecommendationBatchItem(index=position, query=query, params=params, cars=cars)
+                    yield item.model_dump_json() + "\n"
+            except Exception:
+                logger.exception("Streaming recommendation batch failed")
+                yield '{"error":"An error occurred while processing your request"}\n'
+
+        return StreamingResponse(lines(), media_type=NDJSON, headers={"X-Accel-Buffering": "no"})
+
+    try:
+        results = [
+            RecommendationBatchItem(index=position, query=query, params=params, cars=cars)
+            async for position, query, params, cars in items
+        ]
+    except Exception:
+        logger.exception("Recommendation batch failed")
+        raise HTTPException(status_code=500, detail="An error occurred while processing your request")
+    return RecommendationBatchResponse(results=results)
@@ -0,0 +1,161 @@
+import logging
+import time
+from typing import List, Optional
+
+from cachetools import TTLCache
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core import redis as redis_cache
+
+
+logger = logging.getLogger(__name__)
+
+# Redis is optional: after a connection error it is skipped for REDIS_RETRY_INTERVAL seconds,
+# so a missing Redis costs one failed round-trip instead of one per request
+_redis_retry_at = 0.0
+
+
+def _redis_available() -> bool:
+    return settings.REDIS_CACHE_ENABLED and time.monotonic() >= _redis_retry_at
+
+
+def _redis_failed(error: Exception) -> None:
+    global _redis_retry_at
+    _redis_retry_at = time.monotonic() + settings.REDIS_RETRY_INTERVAL
+    logger.warning(f"Redis unavailable, using in-process caches only: {error}")
+
+
+class TwoTierCache:
+    """
+    In-process TTL/LRU cache in front of Redis.
+
+    Reads try the local tier first, then Redis (populating the local tier on a hit);
+    writes go to both. Values are stored as bytes or str. With local_first=False reads go
+    to Redis first and the local tier only answers while Redis is off or unreachable, for
+    values that another worker may have rewritten since.
+    """
+
+    # Every cache created, for the hit and miss counters of /metrics
+    instances: List["TwoTierCache"] = []
+
+    def __init__(self, namespace: str, local_maxsize: int, local_ttl: float, redis_ttl: int,
+                 use_redis: bool = True, local_first: bool = True):
+        TwoTierCache.instances.append(self)
+        self.namespace = namespace
+        self.redis_ttl = redis_ttl
+        self.use_redis = use_redis
+        self.local_first = local_first
+        self._local = TTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _redis_enabled(self) -> bool:
+        return self.use_redis and _redis_available()
+
+    async def get(self, key: str):
+        if self.local_first:
+            value = self._local.get(key)
+            if value is not None:
+                self.stats["local_hits"] += 1
+                return value
+
+        if self._redis_enabled():
+            try:
+                value = await redis_cache.cache_get(self._key(key))
+            except (RedisError, OSError) as e:
+                _redis_failed(e)
+                value = None
+            else:
+                if value is not None:
+                    self.stats["redis_hits"] += 1
+                    self._local[key] = value
+                    return value
+                if not self.local_first:
+                    # Redis answered: a local copy would be older than what it holds
+                    self._local.pop(key, None)
+                    self.stats["misses"] += 1
+                    return None
+
+        if not self.local_first:
+            value = self._local.get(key)
+            if value is not None:
+                self.stats["local_hits"] += 1
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value) -> None:
+        self._local[key] = value
+        if self._redis_enabled():
+            try:
+                await redis_cache.cache_set(self._key(key), value, expire=self.redis_ttl)
+            except (RedisError, OSError) as e:
+                _redis_failed(e)
+
+    async def delete(self, key: str) -> None:
+        self._local.pop(key, None)
+        if self._redis_enabled():
+            try:
+                await redis_cache.cache_delete(self._key(key))
+            except (RedisError, OSError) as e:
+                _redis_failed(e)
+
+    def clear_local(self) -> None:
+        self._local.clear()
+
+    def hit_rate(self) -> float:
+        total = sum(self.stats.values())
+        return (self.stats["local_hits"] + self.stats["redis_hits"]) / total if total else 0.0
+
+
+class CatalogVersion:
+    """
+    Monotonic version of the car catalog, shared between workers through Redis.
+
+    CarService bumps it on every mutation; caches include it in their keys so stale entries
+    are never read again. Each worker trusts its cached value for
+    CATALOG_VERSION_REFRESH_SECONDS before asking Redis again.
+    """
+
+    redis_key = "catalog:version"
+
+    def __init__(self):
+        self._local_version = 0
+        self._value = 0
+        self._checked_at: Optional[float] = None
+
+    async def get(self) -> int:
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < settings.CATALOG_VERSION_REFRESH_SECONDS:
+            return self._value
+
+        value = self._local_version
+        if _redis_available():
+            try:
+                shared = await redis_cache.cache_get(self.redis_key)
+                if shared is not None:
+                    value = max(value, int(shared))
+            except (RedisError, OSError) as e:
+                _redis_failed(e)
+        self._value = value
+        self._checked_at = now
+        return value
+
+    async def bump(self) -> int:
+        value = max(self._local_version, self._value) + 1
+        if _redis_available():
+            try:
+                value = max(value, await redis_cache.cache_incr(self.redis_key))
+            except (RedisError, OSError) as e:
+                _redis_failed(e)
+        self._local_version = self._value = value
+        self._checked_at = time.monotonic()
+        return value
+
+
+# Global catalog version
+catalog_version = CatalogVersion()
@@ -0,0 +1,68 @@
+"""
+gzip for large responses.
+
+Unlike Starlette's GZipMiddleware, only complete responses (a single body message) are
+compressed: streamed ones (SSE chat replies, NDJSON batches) pass through untouched, so each
+chunk still reaches the client as soon as it is sent instead of waiting in the compressor.
+
+A strong ETag names one exact body, so a compressed response gets its own: the ETag of the
+uncompressed one with GZIP_ETAG_SUFFIX added inside the quotes.
+"""
+
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+
+GZIP_ETAG_SUFFIX = "-gzip"
+
+
+class GZipMiddleware:
+    """
+    ASGI middleware compressing response bodies of at least GZIP_MINIMUM_SIZE bytes when
+    GZIP_ENABLED is on and the client accepts gzip
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or not settings.GZIP_ENABLED
+                or "gzip" not in Headers(scope=scope).get("accept-encoding", "")):
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        decided = False
+
+        async def send_compressed(message):
+            nonlocal start, decided
+            if decided:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Held back until the first body shows whether the response is compressed
+                start = message
+                return
+            decided = True
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(start["headers"]))
+            if (message.get("more_body", False) or len(body) < settings.GZIP_MINIMUM_SIZE
+                    or "content-encoding" in headers):
+                await send(start)
+                await send(message)
+                return
+            body = gzip.compress(body, compresslevel=settings.GZIP_COMPRESS_LEVEL)
+            headers["Content-Encoding"] = "gzip"
+            headers["Content-Length"] = str(len(body))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f'{etag[:-1]}{GZIP_ETAG_SUFFIX}"'
+
+            headers.add_vary_header("Accept-Encoding")
+            await send({**start, "headers": headers.raw})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,65 @@
+"""
+Conditional GET for catalog responses.
+
+Car responses are validated by the catalog token (app/services/car_cache.py), derived from the
+database: the strong ETag carries it and Last-Modified is the time the token changed. A request
+whose If-None-Match (or, without one, If-Modified-Since) still matches gets 304 without a body.
+Cache-Control: no-cache makes clients revalidate every time instead of guessing a freshness
+lifetime from Last-Modified.
+"""
+
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from app.core.compression import GZIP_ETAG_SUFFIX
+
+
+def validator_headers(token: str, modified_at: float) -> Dict[str, str]:
+    """ETag, Last-Modified and Cache-Control headers for a catalog token"""
+    return {
+        "ETag": f'"catalog-{token}"',
+        "Last-Modified": formatdate(modified_at, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+
+def _matching_etag(if_none_match: str, etag: str) -> Optional[str]:
+    """The representation's ETag (plain or gzip) listed in If-None-Match, if any"""
+    gzip_etag = f'{etag[:-1]}{GZIP_ETAG_SUFFIX}"'
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        # If-None-Match uses the weak comparison: a W/ prefix does not matter
+        candidate = candidate.removeprefix("W/")
+        if candidate in (etag, gzip_etag):
+            return candidate
+    return None
+
+
+def not_modified(request: Request, headers: Dict[str, str]) -> Optional[Response]:
+    """
+    A 304 response when the client's copy is current, else None. Call it only once the resource
+    is known to exist: If-None-Match: * matches any current representation.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = _matching_etag(if_none_match, headers["ETag"])
+        if etag is None:
+            return None
+        return Response(status_code=304, headers={**headers, "ETag": etag})
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return None
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return None
+    if parsedate_to_datetime(headers["Last-Modified"]).timestamp() > since:
+        return None
+    return Response(status_code=304, headers=headers)
@@ -12,33 +12,88 @@ class Settings(BaseSettings):
     DB_ECHO: bool = False
     DB_POOL_SIZE: int = 20
     DB_MAX_OVERFLOW: int = 10
+    DB_PROFILE: str = "auto"  # auto, serverless, container or high_concurrency (see app/db/pool.py)
+    DB_POOL_TIMEOUT: Optional[float] = None  # Overrides the profile's checkout timeout
+    DB_STATEMENT_TIMEOUT_MS: Optional[int] = None  # Overrides the profile's statement timeout
+    DB_WARMUP_ENABLED: bool = False  # Warm the pool, statements and recommender tables at startup
+    DB_WARMUP_CONNECTIONS: int = 5
     
     # Redis settings
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_TTL: int = 3600  # 1 hour default TTL
+    REDIS_CACHE_ENABLED: bool = True  # Use Redis as the shared tier behind the in-process caches
+    REDIS_RETRY_INTERVAL: float = 30.0  # Seconds to skip Redis after a connection error
     
     # JWT settings
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    USER_CACHE_ENABLED: bool = True  # Cache authenticated users between requests
+    USER_CACHE_TTL: int = 30  # Seconds; bounds staleness across workers
+    USER_CACHE_LOCAL_SIZE: int = 10000
+    USER_CACHE_REDIS: bool = False  # Share cached users between workers through Redis
+    USER_INDEX_LOCAL_SIZE: int = 100000  # Email/username -> id entries kept in process
+    USER_INDEX_TTL: int = 86400
     
     # Password hashing
     PASSWORD_HASH_SCHEME: str = "bcrypt"
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" or "process"
+    PASSWORD_HASH_WORKERS: int = 2  # Size of the hashing pool
+    PASSWORD_HASH_MAX_PENDING: int = 32  # Hash calls running or queued before new ones are rejected
+    PASSWORD_REHASH_ON_LOGIN: bool = False  # Re-hash on successful login when the round count changed
     
     # CORS settings
     BACKEND_CORS_ORIGINS: str = ""
+    GZIP_ENABLED: bool = True  # Compress complete responses for clients sending Accept-Encoding: gzip
+    GZIP_MINIMUM_SIZE: int = 1024  # Bytes; smaller bodies go out uncompressed
+    GZIP_COMPRESS_LEVEL: int = 5
     
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    METRICS_ENABLED: bool = True  # Request, SQL and Redis latency histograms served at /metrics
+    STAGE_TIMING_ENABLED: bool = True  # Per-stage request timers: Server-Timing headers and in-process histograms
     
     # Chat settings
     MAX_CHAT_HISTORY: int = 50  # Maximum number of messages to keep in history
+    CHAT_STATE_ENABLED: bool = True  # Carry recommender parameters from turn to turn within a session
+    CHAT_STATE_TTL: int = 3600  # Seconds an idle session's state is kept
+    CHAT_STATE_LOCAL_SIZE: int = 10000  # Sessions kept in the in-process tier
+    CHAT_STATE_REDIS: bool = True  # Share session state between workers through Redis
+
+    # Chat write-behind: persist messages and recommendations off the request path
+    CHAT_WRITE_BEHIND_ENABLED: bool = False
+    CHAT_WRITE_BEHIND_QUEUE_SIZE: int = 10000  # Backpressure limit in queued chat turns
+    CHAT_WRITE_BEHIND_OVERFLOW: str = "block"  # "block" waits for room, "sync" writes on the request path
+    CHAT_WRITE_BEHIND_BATCH_SIZE: int = 500  # Chat turns per multi-row INSERT
+    CHAT_WRITE_BEHIND_FLUSH_INTERVAL: float = 0.05  # Seconds to wait for a batch to fill up
+    CHAT_WRITE_BEHIND_AT_LEAST_ONCE: bool = True  # Retry failed batches until they commit
+    CHAT_WRITE_BEHIND_MAX_RETRIES: int = 3  # Attempts before dropping a batch when not at-least-once
+    CHAT_WRITE_BEHIND_SHUTDOWN_TIMEOUT: float = 10.0
+
+    # Recommender settings
+    CATALOG_INDEX_ENABLED: bool = True  # Answer recommender filters from the in-memory catalog index
+    CATALOG_INDEX_PRELOAD: bool = False  # Build the index at startup instead of on the first chat message
+    CATALOG_VERSION_REFRESH_SECONDS: float = 1.0  # How long a worker trusts its cached catalog version
+    CATALOG_IMPORT_CHUNK_SIZE: int = 5000  # Rows per upsert statement and commit
+    CAR_CACHE_ENABLED: bool = True  # Serve GET /cars/{car_id} from the per-car cache
+    CAR_CACHE_TTL: int = 600  # Seconds a cached car lives in Redis and in process
+    CAR_CACHE_LOCAL_SIZE: int = 10000  # Cars kept in the in-process tier
+    RECOMMENDATION_CACHE_ENABLED: bool = True
+    RECOMMENDATION_CACHE_TTL: int = 600  # Seconds a cached recommendation list lives in Redis
+    RECOMMENDATION_CACHE_LOCAL_SIZE: int = 1024  # Entries in the in-process LRU tier
+    RECOMMENDATION_RANKING_ENABLED: bool = True  # Rank by weighted closeness instead of a hard filter
+    RECOMMENDATION_MIN_SCORE: float = 0.5  # Share of the best possible score a relaxed match needs
+    RECOMMENDATION_CANDIDATES: int = 1000  # Cars fetched for ranking when the catalog index is off
+    RECOMMENDATION_BATCH_MAX_QUERIES: int = 10000  # Queries accepted by one /recommendations/batch call
 
     # Celery settings
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
+    BULK_RECOMMENDATION_CHUNK_SIZE: int = 2000  # Queries per bulk scoring task (one INSERT and commit each)
+    BULK_RECOMMENDATION_PROGRESS_EVERY: int = 500  # Queries between progress updates of a chunk task
 
     class Config:
         env_file = ".env"
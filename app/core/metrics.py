@@ -0,0 +1,194 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Latency histograms are plain dicts of bucket counts updated from the event loop, so
+recording is a dict lookup and a few integer increments, without locks. Each worker process
+keeps and exposes its own numbers (GET /metrics); Prometheus aggregates across workers.
+Gauges and cache counters are read from their owners when /metrics is scraped.
+"""
+
+import bisect
+import os
+import time
+from typing import Dict, List, Tuple, Union
+
+from app.core.config import settings
+
+
+# Upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Union[str, Tuple[str, ...]]
+
+
+class LatencyHistograms:
+    """
+    Cumulative latency histograms, one per label value (or tuple of values), with the bucket
+    counts, sum and count Prometheus expects
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._counts: Dict[Labels, List[int]] = {}
+        self._sums: Dict[Labels, float] = {}
+
+    def observe(self, labels: Labels, seconds: float) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        # The last slot counts the values above the largest bound
+        counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self._sums[labels] += seconds
+
+    def snapshot(self) -> Dict[Labels, dict]:
+        """Per label value: cumulative counts per bucket bound ("+Inf" last), sum and count"""
+        snapshot = {}
+        for labels, counts in list(self._counts.items()):
+            cumulative, running = {}, 0
+            for bound, count in zip([*self.buckets, "+Inf"], counts):
+                running += count
+                cumulative[bound] = running
+            snapshot[labels] = {"buckets": cumulative, "sum": self._sums[labels], "count": running}
+        return snapshot
+
+    def reset(self) -> None:
+        self._counts.clear()
+        self._sums.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, histogram in self.snapshot().items():
+            label_text = _labels(self.label_names, labels if isinstance(labels, tuple) else (labels,))
+            for bound, count in histogram["buckets"].items():
+                le = f'le="{bound if bound == "+Inf" else repr(float(bound))}"'
+                lines.append(f"{_series(self.name + '_bucket', ','.join(filter(None, (label_text, le))))} {count}")
+            lines.append(f"{_series(self.name + '_sum', label_text)} {histogram['sum']!r}")
+            lines.append(f"{_series(self.name + '_count', label_text)} {histogram['count']}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _series(name: str, label_text: str) -> str:
+    return f"{name}{{{label_text}}}" if label_text else name
+
+
+def _sample(lines: List[str], name: str, kind: str, help_text: str, samples: List[Tuple[Dict[str, object], float]]):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{_series(name, _labels(tuple(labels), tuple(labels.values())))} {float(value)!r}")
+
+
+# Registries fed on the hot path
+request_histograms = LatencyHistograms(
+    "car_advisor_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"),
+)
+stage_histograms = LatencyHistograms(
+    "car_advisor_stage_duration_seconds", "Chat pipeline stage latency (see app/core/timing.py)", ("stage",),
+)
+sql_histograms = LatencyHistograms(
+    "car_advisor_sql_statement_duration_seconds", "SQL statement execution time by statement type", ("statement",),
+)
+redis_histograms = LatencyHistograms(
+    "car_advisor_redis_roundtrip_seconds", "Redis round-trip time by command, failures included", ("command",),
+)
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording each HTTP request's latency under its route template
+    (/api/v1/cars/{car_id}, not the raw path) when METRICS_ENABLED is on
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            # The router stores the matched endpoint in the scope; map it back to its path once
+            router = scope.get("router")
+            for candidate in getattr(router, "routes", ()):
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = candidate.path
+                    break
+            else:
+                route = "unmatched"
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_histograms.observe(
+                (scope["method"], self._route(scope), str(status)), time.perf_counter() - started
+            )
+
+
+def render_metrics() -> str:
+    """All metrics of this worker in the Prometheus text exposition format"""
+    from app.core.cache import TwoTierCache
+    from app.database import get_pool_status
+
+    lines = []
+    for histograms in (request_histograms, stage_histograms, sql_histograms, redis_histograms):
+        lines.extend(histograms.render())
+
+    pool = get_pool_status() or {}
+    if "checkouts" in pool:
+        _sample(lines, "car_advisor_db_pool_checked_out", "gauge", "Connections checked out of the pool",
+                [({}, pool["checked_out"])])
+        _sample(lines, "car_advisor_db_pool_overflow", "gauge", "Connections open beyond the pool size",
+                [({}, pool["overflow"])])
+        _sample(lines, "car_advisor_db_pool_capacity", "gauge", "Pool size plus max overflow",
+                [({}, pool["capacity"])])
+        _sample(lines, "car_advisor_db_pool_checkouts_total", "counter", "Connection checkouts",
+                [({}, pool["checkouts"])])
+        _sample(lines, "car_advisor_db_pool_timeouts_total", "counter", "Checkouts that timed out",
+                [({}, pool["timeouts"])])
+        _sample(lines, "car_advisor_db_pool_wait_seconds_max", "gauge", "Longest checkout wait",
+                [({}, pool["wait_seconds_max"])])
+
+    caches = TwoTierCache.instances
+    for stat, help_text in (("local_hits", "Hits in the in-process tier"), ("redis_hits", "Hits in Redis"),
+                            ("misses", "Misses in both tiers")):
+        _sample(lines, f"car_advisor_cache_{stat}_total", "counter", help_text,
+                [({"cache": cache.namespace}, cache.stats[stat]) for cache in caches])
+    _sample(lines, "car_advisor_cache_hit_ratio", "gauge", "Share of reads answered by either tier",
+            [({"cache": cache.namespace}, cache.hit_rate()) for cache in caches])
+
+    _sample(lines, "car_advisor_worker_info", "gauge", "Worker process exposing these metrics",
+            [({"pid": os.getpid()}, 1)])
+    return "\n".join(lines) + "\n"
@@ -1,5 +1,7 @@
+import time
 import redis.asyncio as redis
 from app.core.config import settings
+from app.core.metrics import redis_histograms
 
 
 # Create Redis connection pool
@@ -7,6 +9,17 @@ redis_pool = redis.ConnectionPool.from_url(settings.REDIS_URL)
 redis_client = redis.Redis(connection_pool=redis_pool)
 
 
+async def _timed(command: str, awaitable):
+    """Await a Redis call, recording its round trip (failed ones too) when metrics are on"""
+    if not settings.METRICS_ENABLED:
+        return await awaitable
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        redis_histograms.observe(command, time.perf_counter() - started)
+
+
 async def get_redis():
     """Dependency to get Redis client"""
     return redis_client
@@ -14,7 +27,7 @@ async def get_redis():
 
 async def cache_get(key: str):
     """Get value from Redis cache"""
-    value = await redis_client.get(key)
+    value = await _timed("get", redis_client.get(key))
     return value
 
 
@@ -22,14 +35,19 @@ async def cache_set(key: str, value: str, expire: int = None):
     """Set value in Redis cache"""
     if expire is None:
         expire = settings.REDIS_TTL
-    await redis_client.set(key, value, ex=expire)
+    await _timed("set", redis_client.set(key, value, ex=expire))
 
 
 async def cache_delete(key: str):
     """Delete key from Redis cache"""
-    await redis_client.delete(key)
+    await _timed("delete", redis_client.delete(key))
 
 
 async def cache_exists(key: str):
     """Check if key exists in Redis cache"""
-    return await redis_client.exists(key)
\ No newline at end of file
+    return await _timed("exists", redis_client.exists(key))
+
+
+async def cache_incr(key: str) -> int:
+    """Atomically increment an integer key in Redis"""
+    return await _timed("incr", redis_client.incr(key))
@@ -2,13 +2,21 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError
+from app.core.config import settings
+from app.core.timing import stage
 from app.db.session import get_db
 from app.services.user import UserService, verify_token
+from app.services.user_cache import user_cache
 from app.schemas.user import UserInDB, TokenData
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> UserInDB:
+    with stage("auth"):
+        return await _authenticate(token, db)
+
+
+async def _authenticate(token: str, db: AsyncSession) -> UserInDB:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -19,12 +27,28 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(username=username, user_id=payload.get("uid"))
     except Exception:
         raise credentials_exception
 
     user_service = UserService()
-    user = await user_service.get_user_by_username(db, username)
+    if token_data.user_id is None:
+        # Tokens issued before the user id was added: look up by username, uncached
+        user = await user_service.get_user_by_username(db, username)
+        if user is None:
+            raise credentials_exception
+        return user
+
+    user = await user_cache.get(token_data.user_id) if settings.USER_CACHE_ENABLED else None
     if user is None:
+        # Primary-key lookup instead of the username index
+        user = await user_service.get_user_by_id(db, token_data.user_id)
+        if user is None:
+            raise credentials_exception
+        if settings.USER_CACHE_ENABLED:
+            await user_cache.set(user)
+
+    # Rejects tokens issued before the user was renamed
+    if user.username != username:
         raise credentials_exception
-    return user
\ No newline at end of file
+    return user
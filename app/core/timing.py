@@ -0,0 +1,107 @@
+"""
+Per-stage request timing.
+
+ServerTimingMiddleware starts a StageTimings for each HTTP request; code on the request path
+marks its stages with `with stage("name"):`. When the response starts, the stages finished
+so far go out in a Server-Timing header. When the request ends, every stage and the total go
+into stage_histograms (app/core/metrics.py). Outside a timed request (timing disabled,
+background tasks) stage() returns a shared no-op context manager.
+"""
+
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import stage_histograms
+
+
+_NO_STAGE = nullcontext()
+
+
+class StageTimings:
+    """Durations of the stages of one request, in the order they finished"""
+
+    __slots__ = ("started", "stages")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+
+    def totals(self) -> Dict[str, float]:
+        """Seconds per stage name; a stage entered several times is summed"""
+        totals: Dict[str, float] = {}
+        for name, seconds in self.stages:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def header(self) -> str:
+        """Server-Timing value, durations in milliseconds"""
+        stages = [*self.totals().items(), ("total", time.perf_counter() - self.started)]
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in stages)
+
+
+_current_timings: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+
+class _Stage:
+    __slots__ = ("timings", "name", "started")
+
+    def __init__(self, timings: StageTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.stages.append((self.name, time.perf_counter() - self.started))
+        return False
+
+
+def observe_stages(timings: StageTimings) -> None:
+    """Record a finished request's stages and total in stage_histograms"""
+    for name, seconds in timings.totals().items():
+        stage_histograms.observe(name, seconds)
+    stage_histograms.observe("total", time.perf_counter() - timings.started)
+
+
+def stage(name: str):
+    """Context manager timing one stage of the current request"""
+    timings = _current_timings.get()
+    if timings is None:
+        return _NO_STAGE
+    return _Stage(timings, name)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware timing each HTTP request when STAGE_TIMING_ENABLED is on. A streamed
+    response's header only lists the stages finished before it started; the histograms get all.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.STAGE_TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings = StageTimings()
+        token = _current_timings.set(timings)
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            _current_timings.reset(token)
+            observe_stages(timings)
@@ -4,6 +4,9 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.exc import SQLAlchemyError
+from app.core.config import settings
+from app.db.instrumentation import install_statement_counter
+from app.db.pool import create_engine_for_profile, resolve_profile, pool_status
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -48,19 +51,11 @@ def initialize_db():
             logger.info("Using default local PostgreSQL URL")
 
     try:
-        # Создание асинхронного движка
-        # Для serverless среды уменьшаем размер пула и отключаем пул соединений
-        engine = create_async_engine(
-            database_url,
-            # Параметры для serverless среды
-            pool_pre_ping=True,  # Проверяет соединение перед использованием
-            pool_recycle=300,    # Пересоздает соединения каждые 5 минут
-            pool_size=1,         # Минимальный размер пула для serverless
-            max_overflow=0,      # Отключаем overflow для serverless
-            echo=bool(os.getenv("DB_ECHO", False)),  # Логирование SQL запросов
-            # Для SQLite нужно отключить poolclass
-            **({'poolclass': NullPool} if database_url.startswith('sqlite') else {})
-        )
+        # Создание асинхронного движка по профилю развертывания (DB_PROFILE):
+        # размер пула, pre-ping, таймауты и кэш prepared statements
+        profile = resolve_profile()
+        engine = create_engine_for_profile(database_url, profile, echo=settings.DB_ECHO)
+        logger.info(f"Database pool profile: {profile['name']}")
 
         # Создаем асинхронную сессию
         async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -72,8 +67,22 @@ def initialize_db():
         async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
         logger.info("Fallback database engine created with SQLite")
 
-# Импортируем NullPool для использования в serverless среде
-from sqlalchemy.pool import NullPool
+    # Подсчет SQL-запросов (активен только внутри track_statements)
+    install_statement_counter(engine)
+
+def get_engine():
+    """
+    Единая точка доступа к движку: создает его при первом обращении.
+    """
+    initialize_db()
+    return engine
+
+def get_session_factory():
+    """
+    Фабрика сессий, привязанная к общему движку.
+    """
+    initialize_db()
+    return async_session
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -108,4 +117,12 @@ async def check_db_connection():
         return True
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def get_pool_status():
+    """
+    Состояние пула соединений (None, если БД еще не инициализирована).
+    """
+    if engine is None:
+        return None
+    return pool_status(engine)
@@ -0,0 +1,63 @@
+"""
+Full-text search DDL for the cars table.
+
+PostgreSQL gets a generated tsvector column (russian + simple configurations) with a GIN
+index, so it stays current on every INSERT and UPDATE without application code.
+SQLite gets an external-content FTS5 table kept in sync by triggers.
+"""
+
+from typing import List
+
+
+# Make and model weigh more than the free-text description and features
+PG_SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(make, '') || ' ' || coalesce(model, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(make, '') || ' ' || coalesce(model, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(features, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(description, '') || ' ' || coalesce(features, '')), 'C')"
+)
+
+SQLITE_FTS_COLUMNS = "make, model, description, features"
+
+
+def create_statements(dialect_name: str) -> List[str]:
+    if dialect_name == "postgresql":
+        return [
+            f"ALTER TABLE cars ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({PG_SEARCH_VECTOR}) STORED",
+            "CREATE INDEX ix_cars_search_vector ON cars USING GIN (search_vector)",
+        ]
+    if dialect_name == "sqlite":
+        return [
+            f"CREATE VIRTUAL TABLE cars_fts USING fts5({SQLITE_FTS_COLUMNS}, "
+            "content='cars', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER cars_fts_ai AFTER INSERT ON cars BEGIN "
+            f"INSERT INTO cars_fts(rowid, {SQLITE_FTS_COLUMNS}) "
+            f"VALUES (new.id, new.make, new.model, new.description, new.features); END",
+            f"CREATE TRIGGER cars_fts_ad AFTER DELETE ON cars BEGIN "
+            f"INSERT INTO cars_fts(cars_fts, rowid, {SQLITE_FTS_COLUMNS}) "
+            f"VALUES ('delete', old.id, old.make, old.model, old.description, old.features); END",
+            f"CREATE TRIGGER cars_fts_au AFTER UPDATE ON cars BEGIN "
+            f"INSERT INTO cars_fts(cars_fts, rowid, {SQLITE_FTS_COLUMNS}) "
+            f"VALUES ('delete', old.id, old.make, old.model, old.description, old.features); "
+            f"INSERT INTO cars_fts(rowid, {SQLITE_FTS_COLUMNS}) "
+            f"VALUES (new.id, new.make, new.model, new.description, new.features); END",
+            # Index the rows that existed before the table was created
+            "INSERT INTO cars_fts(cars_fts) VALUES ('rebuild')",
+        ]
+    return []
+
+
+def drop_statements(dialect_name: str) -> List[str]:
+    if dialect_name == "postgresql":
+        return [
+            "DROP INDEX IF EXISTS ix_cars_search_vector",
+            "ALTER TABLE cars DROP COLUMN IF EXISTS search_vector",
+        ]
+    if dialect_name == "sqlite":
+        return [
+            "DROP TRIGGER IF EXISTS cars_fts_au",
+            "DROP TRIGGER IF EXISTS cars_fts_ad",
+            "DROP TRIGGER IF EXISTS cars_fts_ai",
+            "DROP TABLE IF EXISTS cars_fts",
+        ]
+    return []
@@ -0,0 +1,87 @@
+"""
+SQL statement and commit counting.
+
+A single engine event listener feeds whichever StatementCounter is active in the current
+context, so concurrent requests are counted separately and nothing is recorded when no
+counter is active. With METRICS_ENABLED every statement's execution time also goes into
+sql_histograms by statement type.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.metrics import sql_histograms
+
+
+STATEMENT_TYPES = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+
+class StatementCounter:
+    def __init__(self, keep_statements: bool = False, parent: Optional["StatementCounter"] = None):
+        self.count = 0
+        self.commits = 0
+        self.keep_statements = keep_statements
+        self.statements: List[str] = []
+        self.parent = parent
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        if self.keep_statements:
+            self.statements.append(statement)
+        # Nested counters also feed the enclosing one
+        if self.parent is not None:
+            self.parent.record(statement)
+
+    def record_commit(self) -> None:
+        self.commits += 1
+        if self.parent is not None:
+            self.parent.record_commit()
+
+
+_current_counter: ContextVar[Optional[StatementCounter]] = ContextVar("sql_statement_counter", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.record(statement)
+    if settings.METRICS_ENABLED and context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is not None:
+        kind = statement.lstrip()[:6].upper()
+        sql_histograms.observe(kind if kind in STATEMENT_TYPES else "OTHER", time.perf_counter() - started)
+
+
+def _commit(conn):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.record_commit()
+
+
+def install_statement_counter(engine: AsyncEngine) -> None:
+    """Attach the counting and timing listeners to an engine (idempotent)"""
+    if not event.contains(engine.sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine.sync_engine, "commit", _commit)
+
+
+@contextmanager
+def track_statements(keep_statements: bool = False) -> Iterator[StatementCounter]:
+    """Count the SQL statements executed inside the block"""
+    counter = StatementCounter(keep_statements, parent=_current_counter.get())
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
@@ -0,0 +1,176 @@
+"""
+Connection pool deployment profiles and pool metrics.
+
+A profile picks pool sizing, pre-ping, recycling, the asyncpg prepared-statement cache and
+the server-side statement timeout for one kind of deployment:
+
+    serverless        one connection per instance, no prepared statements (safe behind
+                      PgBouncer in transaction mode), short recycle
+    container         long-lived worker sized by DB_POOL_SIZE / DB_MAX_OVERFLOW
+    high_concurrency  large pool, no pre-ping round-trip, bigger statement cache,
+                      short checkout timeout so overload fails fast
+
+DB_PROFILE=auto selects serverless on Vercel / AWS Lambda and container otherwise.
+"""
+
+import os
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+from app.core.config import settings
+
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "serverless": {
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_timeout": 10,
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+        "statement_cache_size": 0,
+        "statement_timeout_ms": 10_000,
+    },
+    "container": {
+        "pool_size": None,  # DB_POOL_SIZE
+        "max_overflow": None,  # DB_MAX_OVERFLOW
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_cache_size": 100,
+        "statement_timeout_ms": 15_000,
+    },
+    "high_concurrency": {
+        "pool_size": 50,
+        "max_overflow": 50,
+        "pool_timeout": 5,
+        "pool_recycle": 1800,
+        "pool_pre_ping": False,
+        "statement_cache_size": 500,
+        "statement_timeout_ms": 5_000,
+    },
+}
+
+
+def resolve_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """Return the settings of a profile with the DB_* overrides applied"""
+    name = name or settings.DB_PROFILE
+    if name == "auto":
+        name = "serverless" if os.getenv("VERCEL") or os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "container"
+    if name not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {name!r}, expected one of: auto, {', '.join(PROFILES)}")
+
+    profile = dict(PROFILES[name], name=name)
+    if profile["pool_size"] is None:
+        profile["pool_size"] = settings.DB_POOL_SIZE
+    if profile["max_overflow"] is None:
+        profile["max_overflow"] = settings.DB_MAX_OVERFLOW
+    if settings.DB_POOL_TIMEOUT is not None:
+        profile["pool_timeout"] = settings.DB_POOL_TIMEOUT
+    if settings.DB_STATEMENT_TIMEOUT_MS is not None:
+        profile["statement_timeout_ms"] = settings.DB_STATEMENT_TIMEOUT_MS
+    return profile
+
+
+class PoolMetrics:
+    """Checkout time, timeouts and peak usage of one engine's pool"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.peak_checked_out = 0
+        self.recent_waits = deque(maxlen=1000)
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        self.recent_waits.append(seconds)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics(self.size() + max(self._max_overflow, 0))
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        self.metrics.peak_checked_out = max(self.metrics.peak_checked_out, self.checkedout())
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def create_engine_for_profile(database_url: str, profile: Optional[Dict[str, Any]] = None,
+                              echo: bool = False) -> AsyncEngine:
+    """Create an async engine configured by a deployment profile"""
+    profile = profile or resolve_profile()
+
+    if database_url.startswith("sqlite"):
+        if ":memory:" in database_url:
+            # One shared connection, otherwise every checkout sees an empty database
+            return create_async_engine(database_url, echo=echo, poolclass=StaticPool,
+                                       connect_args={"check_same_thread": False})
+        connect_args = {"timeout": profile["pool_timeout"]}
+    else:
+        connect_args = {
+            # asyncpg statement cache and SQLAlchemy's prepared statement cache
+            "statement_cache_size": profile["statement_cache_size"],
+            "prepared_statement_cache_size": profile["statement_cache_size"],
+            "server_settings": {"statement_timeout": str(profile["statement_timeout_ms"])},
+        }
+
+    return create_async_engine(
+        database_url,
+        echo=echo,
+        poolclass=InstrumentedQueuePool,
+        pool_size=profile["pool_size"],
+        max_overflow=profile["max_overflow"],
+        pool_timeout=profile["pool_timeout"],
+        pool_recycle=profile["pool_recycle"],
+        pool_pre_ping=profile["pool_pre_ping"],
+        connect_args=connect_args,
+    )
+
+
+def pool_status(engine: AsyncEngine) -> Dict[str, Any]:
+    """Current pool usage plus the recorded checkout metrics"""
+    pool = engine.sync_engine.pool
+    metrics: Optional[PoolMetrics] = getattr(pool, "metrics", None)
+    if metrics is None:
+        return {"pool": type(pool).__name__}
+
+    checked_out = pool.checkedout()
+    waits = sorted(metrics.recent_waits)
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "capacity": metrics.capacity,
+        "checked_out": checked_out,
+        "overflow": pool.overflow(),
+        "saturation": checked_out / metrics.capacity if metrics.capacity else 0.0,
+        "peak_checked_out": metrics.peak_checked_out,
+        "checkouts": metrics.checkouts,
+        "timeouts": metrics.timeouts,
+        "wait_seconds_avg": metrics.wait_seconds_total / metrics.checkouts if metrics.checkouts else 0.0,
+        "wait_seconds_p99": waits[int(len(waits) * 0.99)] if waits else 0.0,
+        "wait_seconds_max": metrics.wait_seconds_max,
+    }
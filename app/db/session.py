@@ -1,5 +1,15 @@
-from app.database import get_db
+from app.database import get_db, get_engine, get_session_factory
 
 
 # Оставляем для совместимости с существующим кодом
-# Но теперь используем новую систему инициализации
\ No newline at end of file
+# Но теперь используем новую систему инициализации
+
+
+def __getattr__(name):
+    # `from app.db.session import engine` (populate_cars.py, скрипты) получает
+    # общий движок из реестра в app.database, а не отдельную копию
+    if name == "engine":
+        return get_engine()
+    if name == "async_session":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
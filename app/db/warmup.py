@@ -0,0 +1,98 @@
+"""
+Startup warm-up: pay engine construction, connection setup and statement preparation at
+startup instead of on the first user request.
+
+Opens several pool connections at once (so each one is established and kept in the pool),
+runs the hot queries on every one of them (user by username, car filters, chat session and
+message inserts; writes are rolled back) so SQLAlchemy's compiled cache and asyncpg's
+per-connection prepared statements are primed, and loads the recommender keyword tables and
+the catalog index.
+"""
+
+import asyncio
+import logging
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app import database
+from app.core.config import settings
+from app.models.user import User
+from app.repositories.car import CarRepository
+from app.repositories.chat import ChatSessionRepository, MessageRepository
+from app.repositories.user import UserRepository
+from app.schemas.user import CarFilter, ChatSessionCreate, MessageCreate
+
+
+logger = logging.getLogger(__name__)
+
+# Typical chat queries; their filter shapes are the ones worth preparing
+WARMUP_QUERIES = [
+    "Ищу бюджетный кроссовер до 3 млн",
+    "Хочу тойоту камри 2022 года на автомате",
+    "Седан не старше 2019 года с механикой",
+]
+
+
+async def _prime_connection(conn: AsyncConnection, car_filters: list) -> None:
+    async with AsyncSession(bind=conn) as db:
+        await UserRepository().get_by_username(db, "__warmup__")
+        for filters in car_filters:
+            await CarRepository().get_cars_by_filters(db, filters, 0, 5)
+
+        # The chat turn inserts, inside a transaction that is rolled back
+        user_id = (await db.execute(
+            insert(User).returning(User.id),
+            {"username": "__warmup__", "email": "warmup@localhost", "hashed_password": "-"}
+        )).scalar_one()
+        session = await ChatSessionRepository().insert(db, ChatSessionCreate(user_id=user_id, title="warmup"))
+        await MessageRepository().bulk_insert(db, [
+            MessageCreate(chat_session_id=session.id, user_id=user_id, content="warmup", role="user"),
+            MessageCreate(chat_session_id=session.id, user_id=None, content="warmup", role="assistant"),
+        ])
+        await db.rollback()
+
+
+def _pool_capacity(engine) -> int:
+    pool = engine.sync_engine.pool
+    metrics = getattr(pool, "metrics", None)
+    # Pools without a fixed size (StaticPool for in-memory SQLite) only have one connection
+    return metrics.capacity if metrics is not None else 1
+
+
+async def warm_up(connections: int = None) -> dict:
+    """Warm the engine, pool and in-process tables; returns what was done and how long it took"""
+    started = time.perf_counter()
+    engine = database.get_engine()
+    engine_seconds = time.perf_counter() - started
+
+    from app.utils.car_recommender import recommendation_engine
+    car_filters = [
+        CarFilter(**recommendation_engine.build_filters(recommendation_engine.extract_parameters(query)))
+        for query in WARMUP_QUERIES
+    ]
+
+    count = min(connections or settings.DB_WARMUP_CONNECTIONS, _pool_capacity(engine))
+    conns = [engine.connect() for _ in range(count)]
+    # Check the connections out together so each one is a separate pooled connection
+    await asyncio.gather(*(conn.start() for conn in conns))
+    try:
+        for conn in conns:
+            await _prime_connection(conn, car_filters)
+    finally:
+        for conn in conns:
+            await conn.close()
+
+    if settings.CATALOG_INDEX_ENABLED:
+        from app.utils.catalog_index import catalog_index
+        async with database.get_session_factory()() as db:
+            await catalog_index.ensure_loaded(db)
+
+    report = {
+        "connections": count,
+        "engine_seconds": engine_seconds,
+        "total_seconds": time.perf_counter() - started,
+    }
+    logger.info(f"Database warm-up finished: {report}")
+    return report
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
@@ -7,8 +8,11 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Импорты
-from app.api.routers import auth, users, cars, chat
+from app.api.routers import auth, users, cars, chat, recommendations
+from app.core.compression import GZipMiddleware
 from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, RequestMetricsMiddleware, render_metrics
+from app.core.timing import ServerTimingMiddleware
 
 # Создаем приложение FastAPI БЕЗ lifespan для serverless
 app = FastAPI(
@@ -19,6 +23,16 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# gzip для больших ответов целиком (списки машин и т.п.); потоковые ответы
+# (SSE, NDJSON) не сжимаются, чтобы чанки уходили клиенту сразу
+app.add_middleware(GZipMiddleware)
+# Таймеры этапов запроса: заголовок Server-Timing и гистограммы в процессе
+# (app/core/timing.py); при STAGE_TIMING_ENABLED=false запрос проходит без изменений.
+# Добавляется до CORS, чтобы CORS остался внешним слоем
+app.add_middleware(ServerTimingMiddleware)
+# Гистограммы задержки по маршрутам для /metrics (METRICS_ENABLED)
+app.add_middleware(RequestMetricsMiddleware)
+
 # ✅✅✅ ВАЖНО: CORS Middleware ДОЛЖЕН БЫТЬ ПЕРВЫМ!
 # Добавляем CORS для Vercel и локальной разработки
 app.add_middleware(
@@ -36,6 +50,50 @@ app.include_router(auth.router, prefix="/api/v1", tags=["auth"])
 app.include_router(users.router, prefix="/api/v1", tags=["users"])
 app.include_router(cars.router, prefix="/api/v1", tags=["cars"])
 app.include_router(chat.router, prefix="/api/v1", tags=["chat"])
+app.include_router(recommendations.router, prefix="/api/v1", tags=["recommendations"])
+
+# Прогрев при старте (по умолчанию выключен): соединения пула, prepared statements
+# горячих запросов и таблицы ключевых слов рекомендателя, чтобы первый запрос
+# пользователя не платил за создание движка и подключение
+@app.on_event("startup")
+async def warm_up_database():
+    if not settings.DB_WARMUP_ENABLED:
+        return
+
+    from app.db.warmup import warm_up
+    await warm_up()
+
+# Предзагрузка индекса каталога (по умолчанию выключена: в serverless индекс
+# строится лениво при первом запросе к рекомендациям)
+@app.on_event("startup")
+async def preload_catalog_index():
+    if not (settings.CATALOG_INDEX_ENABLED and settings.CATALOG_INDEX_PRELOAD):
+        return
+
+    from app import database
+    from app.utils.catalog_index import catalog_index
+
+    async with database.get_session_factory()() as db:
+        await catalog_index.rebuild(db)
+    logger.info(f"Catalog index loaded: {catalog_index.stats()}")
+
+# Фоновая запись сообщений чата (write-behind): запуск и сброс очереди при остановке
+@app.on_event("startup")
+async def start_chat_write_behind():
+    if settings.CHAT_WRITE_BEHIND_ENABLED:
+        from app.services.write_behind import chat_write_behind
+        chat_write_behind.start()
+
+@app.on_event("shutdown")
+async def stop_chat_write_behind():
+    from app.services.write_behind import chat_write_behind
+    await chat_write_behind.stop()
+
+# Пул для bcrypt: дожидаемся текущих вычислений хэшей при остановке
+@app.on_event("shutdown")
+async def stop_password_hasher():
+    from app.services.password import password_hasher
+    password_hasher.shutdown()
 
 # Главная страница
 @app.get("/")
@@ -51,12 +109,23 @@ async def root():
 async def health():
     # В serverless среде не проверяем подключение к БД при каждом запросе
     # Проверка будет выполняться только при необходимости в роутах
+    from app.database import get_pool_status
     return {
         "status": "ok",
         "service": "car-advisor-api",
-        "database": "serverless-mode"
+        "database": "serverless-mode",
+        # Метрики пула (ожидание соединения, насыщение), если БД уже инициализирована
+        "database_pool": get_pool_status()
     }
 
+# Метрики воркера в формате Prometheus: задержки запросов, этапов, SQL и Redis,
+# пул соединений и попадания в кэши
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
 # Запуск приложения (только для локальной разработки)
 if __name__ == "__main__":
     import uvicorn
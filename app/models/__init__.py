@@ -1,7 +1,7 @@
 """Application Models Package"""
 
 from app.database import Base
-from .user import User, Car, ChatSession, Message, Recommendation, CarFeature, CarFeatureAssociation
+from .user import User, Car, ChatSession, Message, Recommendation, CarFeature, CarFeatureAssociation, BulkRecommendation
 
 __all__ = [
     "Base",
@@ -11,5 +11,6 @@ __all__ = [
     "Message",
     "Recommendation",
     "CarFeature",
-    "CarFeatureAssociation"
+    "CarFeatureAssociation",
+    "BulkRecommendation"
 ]
\ No newline at end of file
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Text, DateTime, Integer, ForeignKey, Boolean, UniqueConstraint, Float
+from sqlalchemy import String, Text, DateTime, Integer, ForeignKey, Boolean, UniqueConstraint, Float, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.base import Base
 
@@ -12,6 +12,8 @@ class User(Base):
     username: Mapped[str] = mapped_column(String(50), unique=True, index=True, nullable=False)
     email: Mapped[str] = mapped_column(String(100), unique=True, index=True, nullable=False)
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
+    full_name: Mapped[Optional[str]] = mapped_column(String(100))
+    phone: Mapped[Optional[str]] = mapped_column(String(20))
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     is_verified: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -44,6 +46,17 @@ class Car(Base):
     recommendations: Mapped[list["Recommendation"]] = relationship("Recommendation", back_populates="car", cascade="all, delete-orphan")
     features_obj: Mapped[list["CarFeature"]] = relationship("CarFeature", secondary="car_feature_associations", back_populates="cars")
 
+    # Composite indexes for the recommender filters (see CarRepository.build_filter_conditions)
+    # and the natural key used by the catalog importer's upserts
+    __table_args__ = (
+        UniqueConstraint('make', 'model', 'year', name='uq_cars_make_model_year'),
+        Index('ix_cars_lower_make_year', func.lower(make), year),
+        Index('ix_cars_body_type_price', body_type, price),
+        Index('ix_cars_fuel_type_transmission_price', fuel_type, transmission, price),
+        Index('ix_cars_year_price', year, price),
+        Index('ix_cars_horsepower', horsepower),
+    )
+
 
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
@@ -60,6 +73,9 @@ class ChatSession(Base):
     messages: Mapped[list["Message"]] = relationship("Message", back_populates="chat_session", cascade="all, delete-orphan")
     recommendations: Mapped[list["Recommendation"]] = relationship("Recommendation", back_populates="chat_session", cascade="all, delete-orphan")
 
+    # Keyset pagination of a user's sessions, newest first
+    __table_args__ = (Index('ix_chat_sessions_user_updated_at_id', user_id, updated_at, id),)
+
 
 class Message(Base):
     __tablename__ = "messages"
@@ -75,6 +91,9 @@ class Message(Base):
     chat_session: Mapped["ChatSession"] = relationship("ChatSession", back_populates="messages")
     user: Mapped[Optional["User"]] = relationship("User", back_populates="messages")
 
+    # Keyset pagination of a session's history, oldest first
+    __table_args__ = (Index('ix_messages_session_timestamp_id', chat_session_id, timestamp, id),)
+
 
 class Recommendation(Base):
     __tablename__ = "recommendations"
@@ -109,4 +128,22 @@ class CarFeatureAssociation(Base):
     __tablename__ = "car_feature_associations"
 
     car_id: Mapped[int] = mapped_column(Integer, ForeignKey("cars.id"), primary_key=True)
-    feature_id: Mapped[int] = mapped_column(Integer, ForeignKey("car_features.id"), primary_key=True)
\ No newline at end of file
+    feature_id: Mapped[int] = mapped_column(Integer, ForeignKey("car_features.id"), primary_key=True)
+
+    # The primary key covers lookups by car; this one serves the "cars having feature X" semi-join
+    __table_args__ = (Index('ix_car_feature_associations_feature_car', feature_id, car_id),)
+
+
+class BulkRecommendation(Base):
+    __tablename__ = "bulk_recommendations"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    job_id: Mapped[str] = mapped_column(String(64), nullable=False)  # Celery id of the bulk scoring job
+    query_index: Mapped[int] = mapped_column(Integer, nullable=False)  # position in the job's query list
+    query: Mapped[str] = mapped_column(Text, nullable=False)
+    params: Mapped[str] = mapped_column(Text, nullable=False)  # extracted parameters, JSON
+    car_ids: Mapped[str] = mapped_column(Text, nullable=False)  # recommended car ids in rank order, JSON
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    # One row per query of a job: retried chunks insert nothing twice, and results read back in order
+    __table_args__ = (UniqueConstraint('job_id', 'query_index', name='uq_bulk_recommendations_job_query'),)
@@ -0,0 +1,38 @@
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models.user import BulkRecommendation
+
+
+class BulkRecommendationRepository:
+    async def insert_many(self, db: AsyncSession, rows: List[dict]) -> None:
+        """One multi-row INSERT; rows already stored for the job (a retried chunk) are skipped"""
+        if not rows:
+            return
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            stmt = postgresql_insert(BulkRecommendation).on_conflict_do_nothing()
+        elif dialect == "sqlite":
+            stmt = sqlite_insert(BulkRecommendation).on_conflict_do_nothing()
+        else:
+            stmt = insert(BulkRecommendation)
+        await db.execute(stmt, rows)
+
+    async def get_job_results(self, db: AsyncSession, job_id: str, skip: int = 0,
+                              limit: int = 1000) -> List[BulkRecommendation]:
+        result = await db.execute(
+            select(BulkRecommendation)
+            .where(BulkRecommendation.job_id == job_id)
+            .order_by(BulkRecommendation.query_index)
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def count_job_results(self, db: AsyncSession, job_id: str) -> int:
+        result = await db.execute(
+            select(func.count()).select_from(BulkRecommendation).where(BulkRecommendation.job_id == job_id)
+        )
+        return result.scalar_one()
@@ -1,78 +1,355 @@
-from typing import Optional, List
+import re
+import weakref
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
-from app.models.user import Car
+from sqlalchemy import select, delete, exists, case, and_, or_, func, literal_column, table, column, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models.user import Car, CarFeature, CarFeatureAssociation
 from app.repositories.base import BaseRepository
-from app.schemas.user import CarCreate, CarUpdate
+from app.schemas.user import CarCreate, CarUpdate, CarFilter, CarPublic
+from app.utils.car_features import normalize_features, split_features
+from app.utils.pagination import encode_cursor, decode_cursor
+
+
+# Natural key of a car and the columns a catalog import writes
+NATURAL_KEY = ["make", "model", "year"]
+UPSERT_COLUMNS = [
+    "make", "model", "year", "body_type", "fuel_type", "transmission",
+    "engine_size", "horsepower", "price", "description", "features",
+]
+STAGING_TABLE = "cars_import_staging"
+# Columns of CarPublic in its field order: list endpoints select these as rows and serialize them directly
+PUBLIC_COLUMNS = [getattr(Car, name) for name in CarPublic.model_fields]
+# Car ids per DELETE ... IN (...) when replacing feature associations
+FEATURE_SYNC_BATCH = 1000
+# Whether each engine's database has the full-text objects of app/db/fulltext.py
+_fulltext_available = weakref.WeakKeyDictionary()
+# Query that finds the full-text objects, per dialect
+FULLTEXT_PROBES = {
+    "postgresql": "SELECT 1 FROM information_schema.columns WHERE table_name = 'cars' AND column_name = 'search_vector'",
+    "sqlite": "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cars_fts'",
+}
+
+
+def _dialect_insert(db: AsyncSession):
+    """INSERT construct with ON CONFLICT support for the session's dialect"""
+    return postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
 
 
 class CarRepository(BaseRepository[Car]):
     async def create(self, db: AsyncSession, obj: CarCreate) -> Car:
         db_obj = Car(**obj.model_dump())
         db.add(db_obj)
+        await db.flush()
+        await self.sync_features(db, {db_obj.id: db_obj.features})
         await db.commit()
         await db.refresh(db_obj)
         return db_obj
 
-    async def get_by_id(self, db: AsyncSession, id: int) -> Optional[Car]:
+    async def get_by_id(self, db: AsyncSession, id: int, columns: Optional[list] = None):
+        """The car, or with columns a row of those columns; None if there is no such car"""
+        if columns is not None:
+            return (await db.execute(select(*columns).where(Car.id == id))).one_or_none()
         result = await db.execute(select(Car).where(Car.id == id))
         return result.scalar_one_or_none()
 
-    async def get_all(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Car]:
-        result = await db.execute(select(Car).offset(skip).limit(limit))
-        return result.scalars().all()
+    async def get_all(self, db: AsyncSession, skip: int = 0, limit: int = 100,
+                      cursor: Optional[str] = None, columns: Optional[list] = None) -> list:
+        """Cars ordered by id; with columns, rows of those columns instead of Car objects"""
+        stmt = select(Car) if columns is None else select(*columns)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, int)
+            stmt = stmt.where(Car.id > last_id)
+        result = await db.execute(stmt.order_by(Car.id).offset(skip).limit(limit))
+        return result.scalars().all() if columns is None else result.all()
+
+    @staticmethod
+    def next_cursor(cars: list, limit: int) -> Optional[str]:
+        """Cursor for the page after get_all (cars or rows), or None on the last page"""
+        if cars and len(cars) == limit:
+            return encode_cursor(cars[-1].id)
+        return None
 
-    async def get_cars_by_filters(self, db: AsyncSession, 
-                                  make: Optional[str] = None,
-                                  min_year: Optional[int] = None,
-                                  max_year: Optional[int] = None,
-                                  body_type: Optional[str] = None,
-                                  fuel_type: Optional[str] = None,
-                                  min_price: Optional[float] = None,
-                                  max_price: Optional[float] = None,
-                                  skip: int = 0, 
-                                  limit: int = 100) -> List[Car]:
+    @staticmethod
+    def build_filter_conditions(filters: CarFilter) -> list:
+        """Translate a CarFilter into SQL predicates that can be combined with other clauses"""
+        conditions = []
+        if filters.make:
+            # Case-insensitive equality so the lower(make) index can be used
+            conditions.append(func.lower(Car.make) == filters.make.lower())
+        if filters.body_type:
+            conditions.append(Car.body_type == filters.body_type)
+        if filters.fuel_type:
+            conditions.append(Car.fuel_type == filters.fuel_type)
+        if filters.transmission:
+            conditions.append(Car.transmission == filters.transmission)
+        if filters.min_year:
+            conditions.append(Car.year >= filters.min_year)
+        if filters.max_year:
+            conditions.append(Car.year <= filters.max_year)
+        if filters.min_price:
+            conditions.append(Car.price >= filters.min_price)
+        if filters.max_price:
+            conditions.append(Car.price <= filters.max_price)
+        if filters.min_horsepower:
+            conditions.append(Car.horsepower >= filters.min_horsepower)
+        if filters.max_horsepower:
+            conditions.append(Car.horsepower <= filters.max_horsepower)
+        if filters.min_engine_size:
+            conditions.append(Car.engine_size >= filters.min_engine_size)
+        if filters.max_engine_size:
+            conditions.append(Car.engine_size <= filters.max_engine_size)
+        for name in normalize_features(filters.features or []):
+            # Semi-join per must-have feature: a probe of the (car_id, feature_id) key per car,
+            # or a walk of ix_car_feature_associations_feature_car, whichever the planner prefers
+            feature_id = select(CarFeature.id).where(CarFeature.name == name).scalar_subquery()
+            conditions.append(exists().where(
+                CarFeatureAssociation.car_id == Car.id,
+                CarFeatureAssociation.feature_id == feature_id,
+            ))
+        return conditions
+
+    async def get_cars_by_filters(self, db: AsyncSession, filters: CarFilter,
+                                  skip: int = 0, limit: int = 100) -> List[Car]:
         """Get cars filtered by various criteria"""
         stmt = select(Car)
-        
-        conditions = []
-        if make:
-            conditions.append(Car.make.ilike(f"%{make}%"))
-        if min_year:
-            conditions.append(Car.year >= min_year)
-        if max_year:
-            conditions.append(Car.year <= max_year)
-        if body_type:
-            conditions.append(Car.body_type == body_type)
-        if fuel_type:
-            conditions.append(Car.fuel_type == fuel_type)
-        if min_price:
-            conditions.append(Car.price >= min_price)
-        if max_price:
-            conditions.append(Car.price <= max_price)
-            
+
+        conditions = self.build_filter_conditions(filters)
         if conditions:
             stmt = stmt.where(and_(*conditions))
-            
+
         stmt = stmt.offset(skip).limit(limit)
         result = await db.execute(stmt)
         return result.scalars().all()
 
-    async def search_cars(self, db: AsyncSession, query: str, skip: int = 0, limit: int = 100) -> List[Car]:
-        """Search cars by make, model, or features"""
-        search_query = f"%{query}%"
-        stmt = select(Car).where(
-            and_(
-                (Car.make.ilike(search_query)) |
-                (Car.model.ilike(search_query)) |
-                (Car.description.ilike(search_query)) |
-                (Car.features.ilike(search_query))
-            )
-        ).offset(skip).limit(limit)
-        
-        result = await db.execute(stmt)
+    async def get_ranking_candidates(self, db: AsyncSession, filters: CarFilter, relaxed: CarFilter,
+                                     limit: int) -> List[Car]:
+        """
+        Cars within the relaxed filters, those meeting more of the original filters first, so the
+        exact matches are always part of the candidate set that gets scored
+        """
+        stmt = select(Car)
+        relaxed_conditions = self.build_filter_conditions(relaxed)
+        if relaxed_conditions:
+            stmt = stmt.where(and_(*relaxed_conditions))
+
+        conditions = self.build_filter_conditions(filters)
+        if conditions:
+            met = sum(case((condition, 1), else_=0) for condition in conditions)
+            stmt = stmt.order_by(met.desc())
+
+        result = await db.execute(stmt.order_by(Car.id).limit(limit))
         return result.scalars().all()
 
+    async def stream_cars_by_filters(self, db: AsyncSession, filters: CarFilter,
+                                     skip: int = 0, limit: int = 100) -> AsyncIterator[Car]:
+        """Like get_cars_by_filters, but yields each car as the database returns it"""
+        stmt = select(Car)
+
+        conditions = self.build_filter_conditions(filters)
+        if conditions:
+            stmt = stmt.where(and_(*conditions))
+
+        result = await db.stream_scalars(stmt.offset(skip).limit(limit))
+        async for car in result:
+            yield car
+
+    async def search_cars(self, db: AsyncSession, query: str, skip: int = 0, limit: int = 100,
+                          cursor: Optional[str] = None, columns: Optional[list] = None) -> Tuple[list, Optional[str]]:
+        """
+        Full-text search over make, model, description and features, ranked by relevance.
+        Returns the page and a cursor for the next one (None on the last page). With columns,
+        the page holds rows of those columns (Car.id among them) instead of Car objects.
+        """
+        dialect = db.get_bind().dialect.name
+        if await self._has_fulltext(db):
+            if dialect == "postgresql":
+                return await self._search_postgresql(db, query, skip, limit, cursor, columns)
+            if dialect == "sqlite":
+                return await self._search_sqlite(db, query, skip, limit, cursor, columns)
+        return await self._search_ilike(db, query, skip, limit, cursor, columns)
+
+    @staticmethod
+    async def _has_fulltext(db: AsyncSession) -> bool:
+        """
+        Whether the database has the full-text objects, checked once per engine. Tables made
+        with Base.metadata.create_all instead of Alembic have none, and search falls back to ILIKE.
+        """
+        bind = db.get_bind()
+        available = _fulltext_available.get(bind)
+        if available is None:
+            probe = FULLTEXT_PROBES.get(bind.dialect.name)
+            available = probe is not None and (await db.execute(text(probe))).first() is not None
+            _fulltext_available[bind] = available
+        return available
+
+    @staticmethod
+    def _ranked_select(rank, columns: Optional[list]):
+        return select(Car, rank.label("rank")) if columns is None else select(*columns, rank.label("rank"))
+
+    async def _search_postgresql(self, db: AsyncSession, query: str, skip: int, limit: int,
+                                 cursor: Optional[str], columns: Optional[list]) -> Tuple[list, Optional[str]]:
+        search_vector = literal_column("cars.search_vector")
+        tsquery = func.websearch_to_tsquery("russian", query).op("||")(
+            func.websearch_to_tsquery("simple", query)
+        )
+        rank = func.ts_rank_cd(search_vector, tsquery)
+        stmt = self._ranked_select(rank, columns).where(search_vector.op("@@")(tsquery))
+
+        if cursor:
+            last_rank, last_id = decode_cursor(cursor, float, int)
+            # Higher rank first, id breaks ties
+            stmt = stmt.where(or_(rank < last_rank, and_(rank == last_rank, Car.id > last_id)))
+
+        stmt = stmt.order_by(rank.desc(), Car.id).offset(skip).limit(limit)
+        return self._ranked_page((await db.execute(stmt)).all(), limit, columns)
+
+    async def _search_sqlite(self, db: AsyncSession, query: str, skip: int, limit: int,
+                             cursor: Optional[str], columns: Optional[list]) -> Tuple[list, Optional[str]]:
+        # Quote every token so user input cannot inject FTS5 syntax; prefix match stands in for stemming
+        tokens = re.findall(r"\w+", query.lower())
+        if not tokens:
+            return [], None
+        match = " ".join(f'"{token}"*' for token in tokens)
+
+        fts = table("cars_fts", column("rowid"))
+        # bm25 is lower-is-better; make and model weigh more than free text
+        rank = literal_column("bm25(cars_fts, 10.0, 10.0, 1.0, 2.0)")
+        stmt = (
+            self._ranked_select(rank, columns)
+            .join(fts, fts.c.rowid == Car.id)
+            .where(literal_column("cars_fts").op("MATCH")(match))
+        )
+
+        if cursor:
+            last_rank, last_id = decode_cursor(cursor, float, int)
+            stmt = stmt.where(or_(rank > last_rank, and_(rank == last_rank, Car.id > last_id)))
+
+        stmt = stmt.order_by(rank, Car.id).offset(skip).limit(limit)
+        return self._ranked_page((await db.execute(stmt)).all(), limit, columns)
+
+    async def _search_ilike(self, db: AsyncSession, query: str, skip: int, limit: int,
+                            cursor: Optional[str], columns: Optional[list]) -> Tuple[list, Optional[str]]:
+        """Unranked fallback for databases without a full-text backend"""
+        search_query = f"%{query}%"
+        stmt = self._ranked_select(literal_column("0"), columns).where(
+            (Car.make.ilike(search_query)) |
+            (Car.model.ilike(search_query)) |
+            (Car.description.ilike(search_query)) |
+            (Car.features.ilike(search_query))
+        )
+        if cursor:
+            _, last_id = decode_cursor(cursor, float, int)
+            stmt = stmt.where(Car.id > last_id)
+
+        stmt = stmt.order_by(Car.id).offset(skip).limit(limit)
+        return self._ranked_page((await db.execute(stmt)).all(), limit, columns)
+
+    @staticmethod
+    def _ranked_page(rows: list, limit: int, columns: Optional[list] = None) -> Tuple[list, Optional[str]]:
+        # Without columns each row is (Car, rank); with them, the columns followed by rank
+        cars = [row[0] for row in rows] if columns is None else [row[:-1] for row in rows]
+        next_cursor = None
+        if rows and len(rows) == limit:
+            last = rows[-1]
+            last_id = last[0].id if columns is None else last.id
+            next_cursor = encode_cursor(float(last.rank), last_id)
+        return cars, next_cursor
+
+    async def upsert_many(self, db: AsyncSession, rows: List[dict]) -> int:
+        """
+        Insert or update cars by their (make, model, year) natural key without committing.
+        Rows are dicts with the UPSERT_COLUMNS; when a key repeats, the last row wins.
+        Returns the number of rows written.
+        """
+        rows = list({(row["make"], row["model"], row["year"]): row for row in rows}.values())
+        if not rows:
+            return 0
+        dialect = db.get_bind().dialect
+        if dialect.name == "postgresql" and dialect.driver == "asyncpg":
+            written = await self._upsert_copy(db, rows)
+        else:
+            written = await self._upsert_insert(db, rows)
+        # (id, features) of every written car
+        await self.sync_features(db, dict(written))
+        return len(written)
+
+    async def _upsert_insert(self, db: AsyncSession, rows: List[dict]) -> list:
+        # A Core insert on the table skips the ORM bulk-insert bookkeeping per row
+        stmt = _dialect_insert(db)(Car.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=NATURAL_KEY,
+            set_={name: stmt.excluded[name] for name in UPSERT_COLUMNS if name not in NATURAL_KEY}
+            | {"updated_at": datetime.utcnow()},
+        ).returning(Car.id, Car.features)
+        return (await db.execute(stmt, rows)).all()
+
+    async def _upsert_copy(self, db: AsyncSession, rows: List[dict]) -> list:
+        """COPY the rows into a temporary staging table, then upsert from it in one statement"""
+        conn = await db.connection()
+        columns = ", ".join(UPSERT_COLUMNS)
+        # Same column types as cars, without its constraints; one per connection
+        await conn.exec_driver_sql(
+            f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} AS SELECT {columns} FROM cars WITH NO DATA"
+        )
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            STAGING_TABLE,
+            records=[tuple(row[name] for name in UPSERT_COLUMNS) for row in rows],
+            columns=UPSERT_COLUMNS,
+        )
+        updates = ", ".join(f"{name} = EXCLUDED.{name}" for name in UPSERT_COLUMNS if name not in NATURAL_KEY)
+        written = (await conn.exec_driver_sql(
+            f"INSERT INTO cars ({columns}, created_at, updated_at) "
+            f"SELECT {columns}, timezone('utc', now()), timezone('utc', now()) FROM {STAGING_TABLE} "
+            f"ON CONFLICT ({', '.join(NATURAL_KEY)}) DO UPDATE SET {updates}, updated_at = EXCLUDED.updated_at "
+            f"RETURNING id, features"
+        )).all()
+        await conn.exec_driver_sql(f"TRUNCATE {STAGING_TABLE}")
+        return written
+
+    async def sync_features(self, db: AsyncSession, features_by_car: Dict[int, Optional[str]]) -> None:
+        """
+        Replace the car_feature_associations rows of the given cars with the features parsed
+        from their Car.features text, creating missing car_features rows. Does not commit.
+        """
+        if not features_by_car:
+            return
+        names_by_car = {car_id: split_features(text) for car_id, text in features_by_car.items()}
+        feature_ids = await self._feature_ids(db, {name for names in names_by_car.values() for name in names})
+
+        car_ids = list(names_by_car)
+        for start in range(0, len(car_ids), FEATURE_SYNC_BATCH):
+            await db.execute(delete(CarFeatureAssociation).where(
+                CarFeatureAssociation.car_id.in_(car_ids[start:start + FEATURE_SYNC_BATCH])
+            ))
+        associations = [
+            {"car_id": car_id, "feature_id": feature_ids[name]}
+            for car_id, names in names_by_car.items() for name in names
+        ]
+        if associations:
+            await db.execute(CarFeatureAssociation.__table__.insert(), associations)
+
+    async def _feature_ids(self, db: AsyncSession, names: set) -> Dict[str, int]:
+        """car_features ids by name, inserting the names that do not exist yet"""
+        if not names:
+            return {}
+        stmt = _dialect_insert(db)(CarFeature.__table__).on_conflict_do_nothing(index_elements=["name"])
+        now = datetime.utcnow()
+        await db.execute(stmt, [{"name": name, "created_at": now} for name in names])
+        result = await db.execute(select(CarFeature.name, CarFeature.id).where(CarFeature.name.in_(names)))
+        return dict(result.all())
+
+    async def catalog_fingerprint(self, db: AsyncSession) -> tuple:
+        """
+        (row count, max id, max updated_at) of the cars table. Any insert, update or delete
+        through the application changes at least one of them, in every worker and across restarts.
+        """
+        result = await db.execute(select(func.count(Car.id), func.max(Car.id), func.max(Car.updated_at)))
+        return tuple(result.one())
+
     async def get_popular_cars(self, db: AsyncSession, limit: int = 10) -> List[Car]:
         """Get popular cars (this would typically be based on recommendation count or other metrics)"""
         # For now, just return most recently added cars
@@ -83,8 +360,11 @@ class CarRepository(BaseRepository[Car]):
     async def update(self, db: AsyncSession, id: int, obj: CarUpdate) -> Optional[Car]:
         db_obj = await self.get_by_id(db, id)
         if db_obj:
-            for key, value in obj.model_dump(exclude_unset=True).items():
+            changes = obj.model_dump(exclude_unset=True)
+            for key, value in changes.items():
                 setattr(db_obj, key, value)
+            if "features" in changes:
+                await self.sync_features(db, {db_obj.id: db_obj.features})
             await db.commit()
             await db.refresh(db_obj)
         return db_obj
@@ -92,6 +372,7 @@ class CarRepository(BaseRepository[Car]):
     async def delete(self, db: AsyncSession, id: int) -> bool:
         db_obj = await self.get_by_id(db, id)
         if db_obj:
+            await db.execute(delete(CarFeatureAssociation).where(CarFeatureAssociation.car_id == id))
             await db.delete(db_obj)
             await db.commit()
             return True
@@ -1,9 +1,13 @@
+from datetime import datetime
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc
+from sqlalchemy import select, insert, and_, or_, desc
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.models.user import ChatSession, Message, Recommendation
 from app.repositories.base import BaseRepository
 from app.schemas.user import ChatSessionCreate, ChatSessionUpdate, MessageCreate, MessageUpdate, RecommendationCreate
+from app.utils.pagination import encode_cursor, decode_cursor
 
 
 class ChatSessionRepository(BaseRepository[ChatSession]):
@@ -14,6 +18,11 @@ class ChatSessionRepository(BaseRepository[ChatSession]):
         await db.refresh(db_obj)
         return db_obj
 
+    async def insert(self, db: AsyncSession, obj: ChatSessionCreate) -> ChatSession:
+        """Insert without committing; the row comes back via RETURNING instead of a refresh"""
+        result = await db.execute(insert(ChatSession).returning(ChatSession), [obj.model_dump()])
+        return result.scalar_one()
+
     async def get_by_id(self, db: AsyncSession, id: int) -> Optional[ChatSession]:
         result = await db.execute(select(ChatSession).where(ChatSession.id == id))
         return result.scalar_one_or_none()
@@ -22,15 +31,30 @@ class ChatSessionRepository(BaseRepository[ChatSession]):
         result = await db.execute(select(ChatSession).offset(skip).limit(limit))
         return result.scalars().all()
 
-    async def get_user_sessions(self, db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[ChatSession]:
+    async def get_user_sessions(self, db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100,
+                                cursor: Optional[str] = None) -> List[ChatSession]:
+        stmt = select(ChatSession).where(ChatSession.user_id == user_id)
+        if cursor:
+            last_updated_at, last_id = decode_cursor(cursor, datetime, int)
+            # Newest first: continue strictly below the (updated_at, id) of the previous page
+            # The leading inequality keeps the predicate an index range scan
+            stmt = stmt.where(
+                ChatSession.updated_at <= last_updated_at,
+                or_(ChatSession.updated_at < last_updated_at, ChatSession.id < last_id)
+            )
         result = await db.execute(
-            select(ChatSession)
-            .where(ChatSession.user_id == user_id)
-            .order_by(desc(ChatSession.updated_at))
+            stmt.order_by(desc(ChatSession.updated_at), desc(ChatSession.id))
             .offset(skip).limit(limit)
         )
         return result.scalars().all()
 
+    @staticmethod
+    def next_cursor(sessions: List[ChatSession], limit: int) -> Optional[str]:
+        """Cursor for the page after get_user_sessions, or None on the last page"""
+        if sessions and len(sessions) == limit:
+            return encode_cursor(sessions[-1].updated_at.isoformat(), sessions[-1].id)
+        return None
+
     async def update(self, db: AsyncSession, id: int, obj: ChatSessionUpdate) -> Optional[ChatSession]:
         db_obj = await self.get_by_id(db, id)
         if db_obj:
@@ -69,19 +93,47 @@ class MessageRepository(BaseRepository[Message]):
         await db.refresh(db_obj)
         return db_obj
 
+    async def bulk_insert(self, db: AsyncSession, objs: List[MessageCreate]) -> list:
+        """
+        Insert several messages in one INSERT ... RETURNING without committing.
+        Returns the inserted rows (not ORM instances) ordered by id.
+        """
+        # A Core insert keeps explicit NULLs, so user and bot messages share one statement.
+        # sort_by_parameter_order is not requested: on SQLite it degrades to one INSERT per row.
+        table = Message.__table__
+        result = await db.execute(
+            insert(table).returning(*table.c),
+            [obj.model_dump() for obj in objs]
+        )
+        return sorted(result.all(), key=lambda row: row.id)
+
     async def get_by_id(self, db: AsyncSession, id: int) -> Optional[Message]:
         result = await db.execute(select(Message).where(Message.id == id))
         return result.scalar_one_or_none()
 
-    async def get_messages_by_session(self, db: AsyncSession, session_id: int, skip: int = 0, limit: int = 100) -> List[Message]:
+    async def get_messages_by_session(self, db: AsyncSession, session_id: int, skip: int = 0, limit: int = 100,
+                                      cursor: Optional[str] = None) -> List[Message]:
+        stmt = select(Message).where(Message.chat_session_id == session_id)
+        if cursor:
+            last_timestamp, last_id = decode_cursor(cursor, datetime, int)
+            # Oldest first: continue strictly after the (timestamp, id) of the previous page
+            stmt = stmt.where(
+                Message.timestamp >= last_timestamp,
+                or_(Message.timestamp > last_timestamp, Message.id > last_id)
+            )
         result = await db.execute(
-            select(Message)
-            .where(Message.chat_session_id == session_id)
-            .order_by(Message.timestamp.asc())
+            stmt.order_by(Message.timestamp.asc(), Message.id.asc())
             .offset(skip).limit(limit)
         )
         return result.scalars().all()
 
+    @staticmethod
+    def next_cursor(messages: List[Message], limit: int) -> Optional[str]:
+        """Cursor for the page after get_messages_by_session, or None on the last page"""
+        if messages and len(messages) == limit:
+            return encode_cursor(messages[-1].timestamp.isoformat(), messages[-1].id)
+        return None
+
     async def get_all(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Message]:
         result = await db.execute(select(Message).offset(skip).limit(limit))
         return result.scalars().all()
@@ -124,6 +176,22 @@ class RecommendationRepository(BaseRepository[Recommendation]):
         await db.refresh(db_obj)
         return db_obj
 
+    async def bulk_insert_ignore_existing(self, db: AsyncSession, objs: List[RecommendationCreate]) -> None:
+        """
+        Insert several recommendations in one statement without committing.
+        A car already recommended in the session is skipped (unique_chat_car_recommendation).
+        """
+        if not objs:
+            return
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            stmt = postgresql_insert(Recommendation).on_conflict_do_nothing()
+        elif dialect == "sqlite":
+            stmt = sqlite_insert(Recommendation).on_conflict_do_nothing()
+        else:
+            stmt = insert(Recommendation)
+        await db.execute(stmt, [obj.model_dump() for obj in objs])
+
     async def get_by_id(self, db: AsyncSession, id: int) -> Optional[Recommendation]:
         result = await db.execute(select(Recommendation).where(Recommendation.id == id))
         return result.scalar_one_or_none()
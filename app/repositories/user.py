@@ -1,6 +1,6 @@
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func
 from app.models.user import User
 from app.repositories.base import BaseRepository
 from app.schemas.user import UserCreate, UserUpdate
@@ -30,6 +30,20 @@ class UserRepository(BaseRepository[User]):
         await db.refresh(db_obj)
         return db_obj
 
+    async def create_account(self, db: AsyncSession, username: str, email: str, hashed_password: str,
+                             full_name: Optional[str] = None, phone: Optional[str] = None) -> User:
+        db_obj = User(
+            username=username,
+            email=email,
+            hashed_password=hashed_password,
+            full_name=full_name,
+            phone=phone
+        )
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
     async def get_by_id(self, db: AsyncSession, id: int) -> Optional[User]:
         result = await db.execute(select(User).where(User.id == id))
         return result.scalar_one_or_none()
@@ -55,6 +69,11 @@ class UserRepository(BaseRepository[User]):
             await db.refresh(db_obj)
         return db_obj
 
+    async def update_password_hash(self, db: AsyncSession, db_obj: User, hashed_password: str) -> User:
+        db_obj.hashed_password = hashed_password
+        await db.commit()
+        return db_obj
+
     async def delete(self, db: AsyncSession, id: int) -> bool:
         db_obj = await self.get_by_id(db, id)
         if db_obj:
@@ -63,6 +82,10 @@ class UserRepository(BaseRepository[User]):
             return True
         return False
 
+    async def count(self, db: AsyncSession) -> int:
+        result = await db.execute(select(func.count()).select_from(User))
+        return result.scalar_one()
+
     async def exists(self, db: AsyncSession, **kwargs) -> bool:
         filters = [getattr(User, key) == value for key, value in kwargs.items()]
         stmt = select(User).where(and_(*filters)).limit(1)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, validator
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 
@@ -77,6 +77,23 @@ class CarUpdate(BaseModel):
     features: Optional[str] = None
 
 
+class CarFilter(BaseModel):
+    """Composable filter spec; every set field becomes a SQL predicate"""
+    make: Optional[str] = None
+    body_type: Optional[str] = None
+    fuel_type: Optional[str] = None
+    transmission: Optional[str] = None
+    min_year: Optional[int] = None
+    max_year: Optional[int] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_horsepower: Optional[int] = None
+    max_horsepower: Optional[int] = None
+    min_engine_size: Optional[float] = None
+    max_engine_size: Optional[float] = None
+    features: Optional[List[str]] = None  # must-have features, all of them
+
+
 class CarInDB(CarBase):
     id: int
     created_at: datetime
@@ -101,7 +118,7 @@ class ChatSessionBase(BaseModel):
 
 
 class ChatSessionCreate(ChatSessionBase):
-    pass
+    user_id: int
 
 
 class ChatSessionUpdate(BaseModel):
@@ -136,7 +153,7 @@ class MessageBase(BaseModel):
 
 
 class MessageCreate(MessageBase):
-    pass
+    user_id: Optional[int] = None  # null for bot messages
 
 
 class MessageUpdate(BaseModel):
@@ -188,6 +205,34 @@ class RecommendationPublic(RecommendationBase):
         from_attributes = True
 
 
+class RecommendationBatchRequest(BaseModel):
+    queries: List[str]
+    limit: int = 5
+
+    @validator('queries')
+    def validate_queries(cls, v):
+        if not v:
+            raise ValueError('At least one query is required')
+        return v
+
+    @validator('limit')
+    def validate_limit(cls, v):
+        if v < 1 or v > 50:
+            raise ValueError('Limit must be between 1 and 50')
+        return v
+
+
+class RecommendationBatchItem(BaseModel):
+    index: int  # position of the query in the request
+    query: str
+    params: Dict[str, Any]
+    cars: List[CarPublic]
+
+
+class RecommendationBatchResponse(BaseModel):
+    results: List[RecommendationBatchItem]
+
+
 # Authentication Schemas
 class Token(BaseModel):
     access_token: str
@@ -196,6 +241,7 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[int] = None
 
 
 class LoginRequest(BaseModel):
@@ -0,0 +1,84 @@
+import io
+import json
+import logging
+import time
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.repositories.bulk_recommendation import BulkRecommendationRepository
+from app.utils.car_recommender import recommendation_engine
+
+
+logger = logging.getLogger(__name__)
+
+# Fields holding the request text in a JSON object line, first match wins
+QUERY_FIELDS = ("query", "message", "text", "body")
+
+
+def iter_queries(stream: Iterable[str]) -> Iterator[str]:
+    """
+    Buyer requests from a JSON Lines stream: each line is a JSON string or an object with
+    a query, message, text or body field. Blank lines are skipped.
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if isinstance(record, str):
+            yield record
+            continue
+        query = next((record[name] for name in QUERY_FIELDS if record.get(name)), None)
+        if query is None:
+            raise ValueError(f"No query field ({', '.join(QUERY_FIELDS)}) in line: {line[:100]}")
+        yield query
+
+
+def read_queries(path: str) -> List[str]:
+    with io.open(path, encoding="utf-8") as stream:
+        return list(iter_queries(stream))
+
+
+def chunked(queries: List[str], chunk_size: int) -> Iterator[Tuple[int, List[str]]]:
+    """(offset, queries) slices of at most chunk_size queries"""
+    for offset in range(0, len(queries), chunk_size):
+        yield offset, queries[offset:offset + chunk_size]
+
+
+class BulkRecommendationScorer:
+    """
+    Scores one chunk of a bulk recommendation job.
+
+    Queries go through CarRecommendationEngine.iter_batch, so each distinct parameter set is
+    looked up once; with the catalog index enabled the lookups run against this process's
+    index, loaded on the first chunk and reused until the catalog version changes. The
+    chunk's results are written with one multi-row INSERT and one commit.
+    """
+
+    def __init__(self, session_factory: Callable, limit: int = 5):
+        self.session_factory = session_factory
+        self.limit = limit
+        self.repository = BulkRecommendationRepository()
+
+    async def score_chunk(self, job_id: str, offset: int, queries: List[str],
+                          progress: Optional[Callable[[int], None]] = None) -> dict:
+        """Score and store queries[i] as query_index offset + i; progress(done) is called periodically"""
+        started = time.perf_counter()
+        rows = []
+        async with self.session_factory() as db:
+            async for position, query, params, cars in recommendation_engine.iter_batch(db, queries, self.limit):
+                rows.append({
+                    "job_id": job_id,
+                    "query_index": offset + position,
+                    "query": query,
+                    "params": json.dumps(params, ensure_ascii=False),
+                    "car_ids": json.dumps([car.id for car in cars]),
+                })
+                if progress is not None and len(rows) % settings.BULK_RECOMMENDATION_PROGRESS_EVERY == 0:
+                    progress(len(rows))
+            await self.repository.insert_many(db, rows)
+            await db.commit()
+
+        seconds = time.perf_counter() - started
+        logger.info(f"Bulk job {job_id}: scored queries {offset}-{offset + len(rows) - 1} in {seconds:.2f} s")
+        return {"offset": offset, "queries": len(rows), "seconds": seconds}
@@ -1,16 +1,46 @@
 import uuid
-from typing import Optional, List
+from typing import AsyncIterator, Dict, Optional, List, Tuple
+import orjson
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.repositories.car import CarRepository
-from app.schemas.user import CarCreate, CarUpdate, CarInDB, CarPublic
+from app.repositories.car import CarRepository, PUBLIC_COLUMNS
+from app.schemas.user import CarCreate, CarUpdate, CarInDB, CarPublic, CarFilter
+from app.core.cache import catalog_version
+from app.core.config import settings
+from app.core.conditional import validator_headers
+from app.services.car_cache import car_cache, catalog_validator
+from app.utils.catalog_index import catalog_index
+
+
+_PUBLIC_FIELDS = tuple(CarPublic.model_fields)
+
+
+def public_car_json(rows: list) -> bytes:
+    """JSON list of CarPublic straight from rows of PUBLIC_COLUMNS, without building models"""
+    return orjson.dumps([dict(zip(_PUBLIC_FIELDS, row)) for row in rows])
+
+
+class DuplicateCarError(Exception):
+    """Raised when a car with the same (make, model, year) already exists"""
 
 
 class CarService:
     def __init__(self):
         self.repository = CarRepository()
 
+    async def catalog_changed(self) -> None:
+        """Drop the in-memory index and move the catalog version so cached results are not reused"""
+        catalog_index.invalidate()
+        await catalog_version.bump()
+
     async def create_car(self, db: AsyncSession, car: CarCreate) -> CarInDB:
-        db_car = await self.repository.create(db, car)
+        try:
+            db_car = await self.repository.create(db, car)
+        except IntegrityError:
+            # (make, model, year) is unique
+            await db.rollback()
+            raise DuplicateCarError("Car with this make/model/year already exists")
+        await self.catalog_changed()
         return CarInDB.from_orm(db_car)
 
     async def get_car_by_id(self, db: AsyncSession, car_id: int) -> Optional[CarInDB]:
@@ -19,9 +49,36 @@ class CarService:
             return CarInDB.from_orm(car)
         return None
 
-    async def get_all_cars(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[CarInDB]:
-        cars = await self.repository.get_all(db, skip, limit)
-        return [CarInDB.from_orm(car) for car in cars]
+    async def catalog_validators(self, db: AsyncSession) -> Dict[str, str]:
+        """ETag, Last-Modified and Cache-Control headers for the current catalog"""
+        token, modified_at = await catalog_validator.get(db)
+        return validator_headers(token, modified_at)
+
+    async def get_public_car_json(self, db: AsyncSession, car_id: int) -> Optional[bytes]:
+        """CarPublic JSON of one car, read through the per-car cache; None if there is no such car"""
+        token, _ = await catalog_validator.get(db)
+        if settings.CAR_CACHE_ENABLED:
+            content = await car_cache.get(car_id, token)
+            if content is not None:
+                return content
+        row = await self.repository.get_by_id(db, car_id, columns=PUBLIC_COLUMNS)
+        if row is None:
+            return None
+        content = orjson.dumps(dict(zip(_PUBLIC_FIELDS, row)))
+        if settings.CAR_CACHE_ENABLED:
+            await car_cache.set(car_id, token, content)
+        return content
+
+    async def get_all_cars(self, db: AsyncSession, skip: int = 0, limit: int = 100,
+                           cursor: Optional[str] = None) -> Tuple[List[CarInDB], Optional[str]]:
+        cars = await self.repository.get_all(db, skip, limit, cursor)
+        return [CarInDB.from_orm(car) for car in cars], self.repository.next_cursor(cars, limit)
+
+    async def get_all_car_rows(self, db: AsyncSession, skip: int = 0, limit: int = 100,
+                               cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """Like get_all_cars, as rows of the CarPublic fields in order, without building models"""
+        rows = await self.repository.get_all(db, skip, limit, cursor, columns=PUBLIC_COLUMNS)
+        return rows, self.repository.next_cursor(rows, limit)
 
     async def get_cars_by_filters(self, db: AsyncSession,
                                   make: Optional[str] = None,
@@ -31,42 +88,65 @@ class CarService:
                                   fuel_type: Optional[str] = None,
                                   min_price: Optional[float] = None,
                                   max_price: Optional[float] = None,
-                                  transmission: Optional[str] = None,  # Added transmission parameter
-                                  min_horsepower: Optional[int] = None,  # Added horsepower parameter
+                                  transmission: Optional[str] = None,
+                                  min_horsepower: Optional[int] = None,
+                                  max_horsepower: Optional[int] = None,
+                                  min_engine_size: Optional[float] = None,
+                                  max_engine_size: Optional[float] = None,
+                                  features: Optional[List[str]] = None,
                                   skip: int = 0,
                                   limit: int = 100) -> List[CarInDB]:
-        cars = await self.repository.get_cars_by_filters(
-            db, make, min_year, max_year, body_type, fuel_type,
-            min_price, max_price, skip, limit
+        filters = CarFilter(
+            make=make, min_year=min_year, max_year=max_year,
+            body_type=body_type, fuel_type=fuel_type,
+            min_price=min_price, max_price=max_price,
+            transmission=transmission,
+            min_horsepower=min_horsepower, max_horsepower=max_horsepower,
+            min_engine_size=min_engine_size, max_engine_size=max_engine_size,
+            features=features
         )
-        # Additional filtering for transmission and horsepower if needed
-        filtered_cars = []
-        for car in cars:
-            # Apply transmission filter
-            if transmission and car.transmission != transmission:
-                continue
+        cars = await self.repository.get_cars_by_filters(db, filters, skip, limit)
+        return [CarInDB.from_orm(car) for car in cars]
 
-            # Apply horsepower filter
-            if min_horsepower and (not car.horsepower or car.horsepower < min_horsepower):
-                continue
+    async def stream_cars_by_filters(self, db: AsyncSession, limit: int = 100,
+                                     **filters) -> AsyncIterator[CarInDB]:
+        """Yield matching cars one by one as the database returns them"""
+        async for car in self.repository.stream_cars_by_filters(db, CarFilter(**filters), 0, limit):
+            yield CarInDB.from_orm(car)
 
-            filtered_cars.append(car)
+    async def get_ranking_candidates(self, db: AsyncSession, filters: dict, relaxed: dict,
+                                     limit: int) -> List[CarInDB]:
+        """Candidate cars for the recommender's scoring when the catalog index is off"""
+        cars = await self.repository.get_ranking_candidates(db, CarFilter(**filters), CarFilter(**relaxed), limit)
+        return [CarInDB.from_orm(car) for car in cars]
 
-        return filtered_cars[:limit]
+    async def search_cars(self, db: AsyncSession, query: str, skip: int = 0, limit: int = 100,
+                          cursor: Optional[str] = None) -> Tuple[List[CarInDB], Optional[str]]:
+        cars, next_cursor = await self.repository.search_cars(db, query, skip, limit, cursor)
+        return [CarInDB.from_orm(car) for car in cars], next_cursor
 
-    async def search_cars(self, db: AsyncSession, query: str, skip: int = 0, limit: int = 100) -> List[CarInDB]:
-        cars = await self.repository.search_cars(db, query, skip, limit)
-        return [CarInDB.from_orm(car) for car in cars]
+    async def search_car_rows(self, db: AsyncSession, query: str, skip: int = 0, limit: int = 100,
+                              cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """Like search_cars, as rows of the CarPublic fields in order, without building models"""
+        return await self.repository.search_cars(db, query, skip, limit, cursor, columns=PUBLIC_COLUMNS)
 
     async def get_popular_cars(self, db: AsyncSession, limit: int = 10) -> List[CarInDB]:
         cars = await self.repository.get_popular_cars(db, limit)
         return [CarInDB.from_orm(car) for car in cars]
 
     async def update_car(self, db: AsyncSession, car_id: int, car_update: CarUpdate) -> Optional[CarInDB]:
-        updated_car = await self.repository.update(db, car_id, car_update)
+        try:
+            updated_car = await self.repository.update(db, car_id, car_update)
+        except IntegrityError:
+            await db.rollback()
+            raise DuplicateCarError("Car with this make/model/year already exists")
         if updated_car:
+            await self.catalog_changed()
             return CarInDB.from_orm(updated_car)
         return None
 
     async def delete_car(self, db: AsyncSession, car_id: int) -> bool:
-        return await self.repository.delete(db, car_id)
\ No newline at end of file
+        deleted = await self.repository.delete(db, car_id)
+        if deleted:
+            await self.catalog_changed()
+        return deleted
\ No newline at end of file
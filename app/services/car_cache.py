@@ -0,0 +1,84 @@
+import hashlib
+import math
+import time
+from typing import Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TwoTierCache, catalog_version
+from app.core.config import settings
+from app.repositories.car import CarRepository
+
+
+class CatalogValidator:
+    """
+    Validator token of the car catalog, derived from the database.
+
+    The token hashes CarRepository.catalog_fingerprint, so every worker computes the same token
+    for the same data, and a restarted worker never reuses a token for different data (the
+    catalog version alone is per-worker without Redis and restarts at 0). A worker recomputes it
+    when the catalog version moves and otherwise every CATALOG_VERSION_REFRESH_SECONDS, which
+    also bounds how long it misses changes made by other workers.
+
+    modified_at is the Unix time, in whole seconds, at which this worker first saw the current
+    token. It serves as Last-Modified: never earlier than the change, and one second later at
+    least for each newer token.
+    """
+
+    def __init__(self):
+        self.repository = CarRepository()
+        self._token: Optional[str] = None
+        self._version: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        self.modified_at = math.ceil(time.time())
+
+    async def get(self, db: AsyncSession) -> Tuple[str, int]:
+        """(token, modified_at) for the current catalog"""
+        version = await catalog_version.get()
+        now = time.monotonic()
+        if (self._token is not None and version == self._version
+                and now - self._checked_at < settings.CATALOG_VERSION_REFRESH_SECONDS):
+            return self._token, self.modified_at
+
+        fingerprint = await self.repository.catalog_fingerprint(db)
+        token = hashlib.sha1(repr(fingerprint).encode()).hexdigest()[:16]
+        if self._token is not None and token != self._token:
+            self.modified_at = max(math.ceil(time.time()), self.modified_at + 1)
+        self._token, self._version, self._checked_at = token, version, now
+        return token, self.modified_at
+
+
+class CarCache:
+    """
+    Read-through cache of single cars as their CarPublic JSON, keyed on id and catalog token.
+
+    Serves GET /cars/{car_id} without touching the database. A catalog mutation changes the
+    token, which makes every older entry unreachable; they expire by TTL.
+    """
+
+    def __init__(self):
+        self.cache = TwoTierCache(
+            namespace="cars",
+            local_maxsize=settings.CAR_CACHE_LOCAL_SIZE,
+            local_ttl=settings.CAR_CACHE_TTL,
+            redis_ttl=settings.CAR_CACHE_TTL,
+        )
+
+    @staticmethod
+    def key(car_id: int, token: str) -> str:
+        return f"{token}:{car_id}"
+
+    async def get(self, car_id: int, token: str) -> Optional[bytes]:
+        return await self.cache.get(self.key(car_id, token))
+
+    async def set(self, car_id: int, token: str, content: bytes) -> None:
+        await self.cache.set(self.key(car_id, token), content)
+
+    @property
+    def stats(self) -> dict:
+        return self.cache.stats
+
+
+# Global instances of the catalog validator and the car cache
+catalog_validator = CatalogValidator()
+car_cache = CarCache()
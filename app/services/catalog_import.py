@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from app.core.config import settings
+from app.repositories.car import CarRepository, UPSERT_COLUMNS
+from app.services.car import CarService
+from app.utils.catalog_index import catalog_index
+
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ("make", "model", "year", "body_type", "fuel_type", "transmission")
+INT_COLUMNS = ("year", "horsepower")
+FLOAT_COLUMNS = ("engine_size", "price")
+
+
+@dataclass
+class ImportResult:
+    rows_read: int = 0
+    rows_written: int = 0
+    rows_invalid: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.seconds if self.seconds else 0.0
+
+
+def iter_records(stream: Iterable[str], file_format: str) -> Iterator[Optional[dict]]:
+    """
+    Read dict records from a text stream in CSV or JSON Lines (jsonl/ndjson) format.
+    A JSON line that does not parse is yielded as None, so it is counted as an invalid row.
+    """
+    if file_format == "csv":
+        yield from csv.DictReader(stream)
+    elif file_format in ("jsonl", "ndjson"):
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+    else:
+        raise ValueError(f"Unsupported catalog format: {file_format}")
+
+
+def normalize_record(record: Optional[dict]) -> Optional[dict]:
+    """Coerce a raw record to the cars columns; None when it is not an object or lacks a required value"""
+    if not isinstance(record, dict):
+        return None
+    row = {}
+    for name in UPSERT_COLUMNS:
+        value = record.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in ("", None):
+            value = None
+        elif name in INT_COLUMNS:
+            value = int(float(value))
+        elif name in FLOAT_COLUMNS:
+            value = float(value)
+        elif name == "features" and isinstance(value, list):
+            value = ", ".join(value)
+        else:
+            value = str(value)
+        row[name] = value
+    if any(row[name] is None for name in REQUIRED_COLUMNS):
+        return None
+    return row
+
+
+class CatalogImporter:
+    """
+    Bulk, idempotent catalog import.
+
+    Records are streamed and written in chunks with INSERT ... ON CONFLICT on the
+    (make, model, year) natural key (COPY into a staging table on asyncpg), one commit per
+    chunk. The catalog index and caches are refreshed once, after the last chunk.
+    """
+
+    def __init__(self, session_factory: Callable, chunk_size: Optional[int] = None):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size or settings.CATALOG_IMPORT_CHUNK_SIZE
+        self.repository = CarRepository()
+        self.car_service = CarService()
+
+    async def import_records(self, records: Iterable[dict]) -> ImportResult:
+        result = ImportResult()
+        started = time.perf_counter()
+        chunk: List[dict] = []
+
+        async with self.session_factory() as db:
+            try:
+                for record in records:
+                    result.rows_read += 1
+                    try:
+                        row = normalize_record(record)
+                    except (TypeError, ValueError, OverflowError):
+                        # OverflowError: an infinite number in an integer column
+                        row = None
+                    if row is None:
+                        result.rows_invalid += 1
+                        continue
+                    chunk.append(row)
+                    if len(chunk) >= self.chunk_size:
+                        await self._write_chunk(db, chunk, result, started)
+                        chunk = []
+                if chunk:
+                    await self._write_chunk(db, chunk, result, started)
+            finally:
+                # Refresh recommender state once for the whole import, and also when it fails
+                # midway: the chunks committed so far are already in the catalog
+                if result.chunks:
+                    await self.car_service.catalog_changed()
+            if settings.CATALOG_INDEX_ENABLED and settings.CATALOG_INDEX_PRELOAD:
+                await catalog_index.rebuild(db)
+
+        result.seconds = time.perf_counter() - started
+        logger.info(
+            f"Catalog import finished: {result.rows_read} rows read, {result.rows_written} written, "
+            f"{result.rows_invalid} invalid in {result.seconds:.1f} s ({result.rows_per_second:,.0f} rows/s)"
+        )
+        return result
+
+    async def import_stream(self, stream: Iterable[str], file_format: str) -> ImportResult:
+        return await self.import_records(iter_records(stream, file_format))
+
+    async def import_file(self, path: str, file_format: Optional[str] = None) -> ImportResult:
+        file_format = file_format or path.rsplit(".", 1)[-1].lower()
+        with io.open(path, encoding="utf-8", newline="") as stream:
+            return await self.import_stream(stream, file_format)
+
+    async def _write_chunk(self, db, chunk: List[dict], result: ImportResult, started: float) -> None:
+        result.rows_written += await self.repository.upsert_many(db, chunk)
+        await db.commit()
+        result.chunks += 1
+        elapsed = time.perf_counter() - started
+        logger.info(f"Imported {result.rows_read} rows ({result.rows_read / elapsed:,.0f} rows/s)")
@@ -0,0 +1,162 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.core.cache import TwoTierCache
+from app.core.config import settings
+
+
+# A new value for the key replaces the parameters it would contradict
+EXCLUSIVE_PARAMETERS = {
+    'year': ('min_year', 'max_year'),
+    'min_year': ('year',),
+    'max_year': ('year',),
+    'horsepower': ('min_horsepower',),
+    'min_horsepower': ('horsepower',),
+}
+
+# Lower and upper bounds of one range: a new bound past a carried one replaces it
+RANGE_BOUNDS = (
+    ('min_price', 'max_price'),
+    ('min_year', 'max_year'),
+    ('min_horsepower', 'max_horsepower'),
+)
+
+# Explicit parameters of a turn that make a relative request about the same dimension moot:
+# "подороже, но до 5 млн" is a bound, not a move past the previous answer
+REFINE_BOUNDS = {
+    'cheaper': ('min_price', 'max_price'),
+    'pricier': ('min_price', 'max_price'),
+    'newer': ('year', 'min_year', 'max_year'),
+    'more_powerful': ('horsepower', 'min_horsepower'),
+}
+
+# "подешевле": the new budget is this share of the previous one
+CHEAPER_FACTOR = 0.8
+# "помощнее": the new minimum is this multiple of the previous one
+MORE_POWERFUL_FACTOR = 1.2
+
+
+class ConversationState(BaseModel):
+    """
+    Compact recommender state of one chat session: the parameters merged over all turns,
+    the cars of the last answer and a capped log of what each turn asked for.
+    """
+
+    params: Dict[str, Any] = Field(default_factory=dict)
+    last_car_ids: List[int] = Field(default_factory=list)
+    # Price range, average year and horsepower of the last answer: the base of "cheaper", "newer", ...
+    last_stats: Dict[str, float] = Field(default_factory=dict)
+    turns: List[Dict[str, Any]] = Field(default_factory=list)
+
+    def merge(self, turn: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Parameters for this turn: the conversation so far refined by the parameters extracted
+        from the new message. Explicit values override (also a carried bound that a new one
+        contradicts), features accumulate, and relative
+        requests ("refine": cheaper, pricier, newer, more_powerful) move the current bounds
+        unless the turn states a bound of the same kind itself. "reset" starts from scratch.
+        """
+        explicit = {key: value for key, value in turn.items() if key != 'refine'}
+        refine = [
+            refinement for refinement in turn.get('refine', [])
+            if not any(key in explicit for key in REFINE_BOUNDS.get(refinement, ()))
+        ]
+        params = {} if 'reset' in refine else dict(self.params)
+
+        for key in explicit:
+            for other in EXCLUSIVE_PARAMETERS.get(key, ()):
+                params.pop(other, None)
+        features = list(dict.fromkeys(params.get('features', []) + explicit.get('features', [])))
+        params.update(explicit)
+        if features:
+            params['features'] = features
+        # "от 3 млн", then "а дешевле 2 млн?": the carried bound gives way to the new one
+        for low, high in RANGE_BOUNDS:
+            if low in params and high in params and params[low] > params[high]:
+                if low in explicit and high not in explicit:
+                    params.pop(high)
+                elif high in explicit and low not in explicit:
+                    params.pop(low)
+
+        stats = {} if 'reset' in refine else self.last_stats
+        if 'cheaper' in refine:
+            base = params.get('max_price') or stats.get('min_price')
+            if base:
+                params['max_price'] = round(base * CHEAPER_FACTOR)
+                if params.get('min_price', 0) >= params['max_price']:
+                    params.pop('min_price')
+        if 'pricier' in refine:
+            base = params.get('max_price') or stats.get('max_price')
+            if base:
+                params['min_price'] = round(base)
+                params.pop('max_price', None)
+        if 'newer' in refine:
+            base = params.get('min_year') or params.get('year') or stats.get('avg_year')
+            if base:
+                params['min_year'] = int(base) + 1
+                params.pop('year', None)
+                if params.get('max_year', params['min_year']) < params['min_year']:
+                    params.pop('max_year')
+        if 'more_powerful' in refine:
+            base = params.get('min_horsepower') or params.get('horsepower') or stats.get('avg_horsepower')
+            if base:
+                params['min_horsepower'] = int(base * MORE_POWERFUL_FACTOR)
+                params.pop('horsepower', None)
+        return params
+
+    def record(self, turn: Dict[str, Any], params: Dict[str, Any], cars: list) -> None:
+        """Store the outcome of a turn; the turn log keeps the last MAX_CHAT_HISTORY entries"""
+        self.params = params
+        self.last_car_ids = [car.id for car in cars]
+        prices = [car.price for car in cars if car.price]
+        horsepower = [car.horsepower for car in cars if car.horsepower]
+        self.last_stats = {}
+        if prices:
+            self.last_stats.update(min_price=min(prices), max_price=max(prices))
+        if cars:
+            self.last_stats['avg_year'] = sum(car.year for car in cars) / len(cars)
+        if horsepower:
+            self.last_stats['avg_horsepower'] = sum(horsepower) / len(horsepower)
+        self.turns = (self.turns + [turn])[-settings.MAX_CHAT_HISTORY:]
+
+
+class ConversationStateStore:
+    """
+    Per-session ConversationState, one read and one write per chat turn instead of replaying the
+    session history. Reads go to Redis first so a session can move between workers; the
+    in-process tier serves while Redis is off. Idle sessions expire after CHAT_STATE_TTL.
+    """
+
+    def __init__(self):
+        self.cache = TwoTierCache(
+            namespace="chat:state",
+            local_maxsize=settings.CHAT_STATE_LOCAL_SIZE,
+            local_ttl=settings.CHAT_STATE_TTL,
+            redis_ttl=settings.CHAT_STATE_TTL,
+            use_redis=settings.CHAT_STATE_REDIS,
+            local_first=False,
+        )
+
+    async def get(self, session_id: Optional[int]) -> ConversationState:
+        """State of the session; an empty one for a new or expired session"""
+        if session_id is None:
+            return ConversationState()
+        value = await self.cache.get(str(session_id))
+        if value is None:
+            return ConversationState()
+        return ConversationState.model_validate_json(value)
+
+    async def save(self, session_id: int, state: ConversationState) -> None:
+        await self.cache.set(str(session_id), state.model_dump_json())
+
+    async def delete(self, session_id: int) -> None:
+        await self.cache.delete(str(session_id))
+
+    @property
+    def stats(self) -> dict:
+        return self.cache.stats
+
+
+# Global instance of the conversation state store
+conversation_states = ConversationStateStore()
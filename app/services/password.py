@@ -0,0 +1,96 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+
+# Module-level so the functions below can run in a process pool as well as a thread pool
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed_password: str, rehash: bool) -> Tuple[bool, Optional[str]]:
+    if rehash:
+        # The replacement hash is only computed when the stored one uses other rounds
+        return pwd_context.verify_and_update(password, hashed_password)
+    return pwd_context.verify(password, hashed_password), None
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when too many password hash calls are already running or queued"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop in a dedicated, size-limited pool.
+
+    A 12-round bcrypt call takes a few hundred milliseconds; running it inline blocks every
+    other request on the worker. Calls beyond PASSWORD_HASH_MAX_PENDING are rejected with
+    PasswordHasherBusy instead of piling up. Per-call latency (queue wait included) is kept
+    in `stats` and a window of recent samples.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 executor: Optional[str] = None):
+        self.workers = workers or settings.PASSWORD_HASH_WORKERS
+        self.max_pending = max_pending or settings.PASSWORD_HASH_MAX_PENDING
+        self.executor_kind = executor or settings.PASSWORD_HASH_EXECUTOR
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+        self.stats = {"hash": 0, "verify": 0, "rehash": 0, "rejected": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+        self.latencies = deque(maxlen=1000)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        if self.pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            raise PasswordHasherBusy("Too many concurrent password operations")
+
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+            elapsed = time.perf_counter() - started
+            self.stats[operation] += 1
+            self.stats["total_seconds"] += elapsed
+            self.stats["max_seconds"] = max(self.stats["max_seconds"], elapsed)
+            self.latencies.append(elapsed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", _hash, password)
+
+    async def verify(self, password: str, hashed_password: str, rehash: bool = False) -> Tuple[bool, Optional[str]]:
+        """
+        Return (valid, new_hash). With rehash, new_hash is set when the stored hash uses a
+        different round count than PASSWORD_BCRYPT_ROUNDS.
+        """
+        valid, new_hash = await self._run("verify", _verify, password, hashed_password, rehash)
+        if new_hash is not None:
+            self.stats["rehash"] += 1
+        return valid, new_hash
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# Global instance of the password hasher
+password_hasher = PasswordHasher()
@@ -0,0 +1,59 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from pydantic import TypeAdapter
+
+from app.core.cache import TwoTierCache
+from app.core.config import settings
+from app.schemas.user import CarPublic
+
+
+_car_list = TypeAdapter(List[CarPublic])
+
+
+class RecommendationCache:
+    """
+    Cache of recommendation results keyed on the extracted query parameters.
+
+    Different wordings of a query usually reduce to the same parameter dict, so the key is a
+    hash of the canonical (sorted) parameters, the result limit and the catalog version.
+    Bumping the catalog version makes every older entry unreachable; they expire by TTL.
+    """
+
+    def __init__(self):
+        self.cache = TwoTierCache(
+            namespace="recommendations",
+            local_maxsize=settings.RECOMMENDATION_CACHE_LOCAL_SIZE,
+            local_ttl=settings.RECOMMENDATION_CACHE_TTL,
+            redis_ttl=settings.RECOMMENDATION_CACHE_TTL,
+        )
+
+    @staticmethod
+    def canonical(params: Dict[str, Any]) -> str:
+        """The parameters as sorted compact JSON: equal for equal parameter dicts"""
+        return json.dumps(params, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def key(cls, params: Dict[str, Any], limit: int, version: int) -> str:
+        digest = hashlib.sha1(f"{cls.canonical(params)}|{limit}".encode()).hexdigest()
+        return f"v{version}:{digest}"
+
+    async def get(self, params: Dict[str, Any], limit: int, version: int) -> Optional[List[CarPublic]]:
+        value = await self.cache.get(self.key(params, limit, version))
+        if value is None:
+            return None
+        return _car_list.validate_json(value)
+
+    async def set(self, params: Dict[str, Any], limit: int, version: int, cars: List[CarPublic]) -> None:
+        # Stored as CarPublic so cached and fresh results serialize identically
+        value = _car_list.dump_json([CarPublic.model_validate(car, from_attributes=True) for car in cars])
+        await self.cache.set(self.key(params, limit, version), value)
+
+    @property
+    def stats(self) -> dict:
+        return self.cache.stats
+
+
+# Global instance of the recommendation cache
+recommendation_cache = RecommendationCache()
@@ -1,10 +1,12 @@
 import uuid
-from typing import Optional, List, Tuple
-from passlib.context import CryptContext
+import logging
+from typing import AsyncIterator, Optional, List, Tuple
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.core.timing import stage
 from app.repositories.user import UserRepository
 from app.repositories.chat import ChatSessionRepository, MessageRepository, RecommendationRepository
 from app.schemas.user import UserCreate, UserUpdate, UserInDB, CarCreate, CarUpdate, CarInDB, \
@@ -12,34 +14,95 @@ from app.schemas.user import UserCreate, UserUpdate, UserInDB, CarCreate, CarUpd
     ChatRequest, ChatResponse, CarPublic
 from app.models.user import User, ChatSession, Message, Recommendation
 from app.services.car import CarService
+from app.db.instrumentation import track_statements
+from app.services.write_behind import chat_write_behind
+from app.services.user_cache import user_cache
+from app.services.password import password_hasher
+from app.services.user_index import user_index
+from app.services.conversation_state import ConversationState, conversation_states
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
-
+logger = logging.getLogger(__name__)
 
 class UserService:
     def __init__(self):
         self.repository = UserRepository()
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        valid, _ = await password_hasher.verify(plain_password, hashed_password)
+        return valid
 
-    def get_password_hash(self, password: str) -> str:
+    async def get_password_hash(self, password: str) -> str:
         # Ensure password is not longer than 72 bytes for bcrypt
         if len(password.encode('utf-8')) > 72:
             password = password.encode('utf-8')[:72].decode('utf-8', errors='ignore')
-        return pwd_context.hash(password)
+        return await password_hasher.hash(password)
 
-    async def authenticate_user(self, db: AsyncSession, username: str, password: str) -> Optional[User]:
-        user = await self.repository.get_by_username(db, username)
-        if not user or not self.verify_password(password, user.hashed_password):
+    async def check_password(self, db: AsyncSession, user: Optional[User], password: str) -> Optional[User]:
+        if not user:
+            return None
+        valid, new_hash = await password_hasher.verify(
+            password, user.hashed_password, rehash=settings.PASSWORD_REHASH_ON_LOGIN
+        )
+        if not valid:
             return None
+        if new_hash:
+            # The configured round count changed: upgrade the stored hash transparently
+            await self.repository.update_password_hash(db, user, new_hash)
         return user
 
+    async def authenticate_user(self, db: AsyncSession, username: str, password: str) -> Optional[User]:
+        user = await self.repository.get_by_username(db, username)
+        return await self.check_password(db, user, password)
+
     async def authenticate_user_by_email(self, db: AsyncSession, email: str, password: str) -> Optional[User]:
         user = await self.repository.get_by_email(db, email)
-        if not user or not self.verify_password(password, user.hashed_password):
-            return None
+        return await self.check_password(db, user, password)
+
+    async def find_login_user(self, db: AsyncSession, identifier: str) -> Optional[User]:
+        """Find a user by email or username via the login index, falling back to the unique DB indexes"""
+        user_id = await user_index.get(identifier)
+        if user_id is not None:
+            user = await self.repository.get_by_id(db, user_id)
+            if user and identifier in (user.email, user.username):
+                return user
+            # Renamed or deleted since the entry was written
+            await user_index.discard(identifier)
+
+        if "@" in identifier:
+            user = await self.repository.get_by_email(db, identifier)
+        else:
+            user = await self.repository.get_by_username(db, identifier)
+        if user:
+            await user_index.add(user)
+        return user
+
+    async def register_account(self, db: AsyncSession, email: str, password: str,
+                               username: Optional[str] = None, full_name: Optional[str] = None,
+                               phone: Optional[str] = None) -> User:
+        """Create an account; raises ValueError when the email or username is taken"""
+        if len(password.encode('utf-8')) > 72:
+            raise ValueError("Password cannot be longer than 72 bytes")
+        if not username:
+            # Accounts registered by email get the email as username (shortened to fit the column)
+            username = email if len(email) <= 50 else f"{email[:41]}-{uuid.uuid4().hex[:8]}"
+        if await self.find_login_user(db, email):
+            raise ValueError("Email already exists")
+        if username != email and await self.find_login_user(db, username):
+            raise ValueError("Username already exists")
+
+        hashed_password = await self.get_password_hash(password)
+        try:
+            user = await self.repository.create_account(db, username, email, hashed_password, full_name, phone)
+        except IntegrityError:
+            # Lost a race with a concurrent registration: report the column that collided
+            await db.rollback()
+            if await self.repository.get_by_email(db, email):
+                raise ValueError("Email already exists")
+            if await self.repository.get_by_username(db, username):
+                raise ValueError("Username already exists")
+            raise ValueError("Email or username already exists")
+        await user_index.add(user)
         return user
 
     async def create_user(self, db: AsyncSession, user: UserCreate) -> UserInDB:
@@ -48,7 +111,7 @@ class UserService:
             raise ValueError("Password cannot be longer than 72 bytes")
 
         # Hash the password
-        hashed_password = self.get_password_hash(user.password)
+        hashed_password = await self.get_password_hash(user.password)
 
         # Create user object with hashed password
         # Pass the hashed password directly to the repository
@@ -74,13 +137,26 @@ class UserService:
         return None
 
     async def update_user(self, db: AsyncSession, user_id: int, user_update: UserUpdate) -> Optional[UserInDB]:
+        # Dropped again after the commit: a concurrent request may have re-cached the old row
+        await user_cache.invalidate(user_id)
         updated_user = await self.repository.update(db, user_id, user_update)
+        await user_cache.invalidate(user_id)
         if updated_user:
             return UserInDB.from_orm(updated_user)
         return None
 
     async def delete_user(self, db: AsyncSession, user_id: int) -> bool:
-        return await self.repository.delete(db, user_id)
+        await user_cache.invalidate(user_id)
+        deleted = await self.repository.delete(db, user_id)
+        await user_cache.invalidate(user_id)
+        return deleted
+
+    def create_user_token(self, user) -> str:
+        """Issue an access token carrying both the username and the user id"""
+        return create_access_token(
+            {"sub": user.username, "uid": user.id},
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
 
 
 
@@ -99,8 +175,10 @@ class ChatService:
     async def get_session_by_id(self, db: AsyncSession, session_id: int) -> Optional[ChatSession]:
         return await self.session_repository.get_by_id(db, session_id)
 
-    async def get_user_sessions(self, db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[ChatSession]:
-        return await self.session_repository.get_user_sessions(db, user_id, skip, limit)
+    async def get_user_sessions(self, db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100,
+                                cursor: Optional[str] = None) -> Tuple[List[ChatSession], Optional[str]]:
+        sessions = await self.session_repository.get_user_sessions(db, user_id, skip, limit, cursor)
+        return sessions, self.session_repository.next_cursor(sessions, limit)
 
     async def add_message(self, db: AsyncSession, session_id: int, user_id: Optional[int], 
                          content: str, role: str) -> Message:
@@ -112,8 +190,10 @@ class ChatService:
         )
         return await self.message_repository.create(db, message_data)
 
-    async def get_session_messages(self, db: AsyncSession, session_id: int, skip: int = 0, limit: int = 100) -> List[Message]:
-        return await self.message_repository.get_messages_by_session(db, session_id, skip, limit)
+    async def get_session_messages(self, db: AsyncSession, session_id: int, skip: int = 0, limit: int = 100,
+                                   cursor: Optional[str] = None) -> Tuple[List[Message], Optional[str]]:
+        messages = await self.message_repository.get_messages_by_session(db, session_id, skip, limit, cursor)
+        return messages, self.message_repository.next_cursor(messages, limit)
 
     async def add_recommendation(self, db: AsyncSession, session_id: int, car_id: int, reason: Optional[str] = None) -> Recommendation:
         recommendation_data = RecommendationCreate(
@@ -126,32 +206,86 @@ class ChatService:
     async def get_session_recommendations(self, db: AsyncSession, session_id: int) -> List[Recommendation]:
         return await self.recommendation_repository.get_recommendations_by_session(db, session_id)
 
-    async def process_chat_request(self, db: AsyncSession, user_id: int, chat_request: ChatRequest) -> ChatResponse:
+    async def resolve_session(self, db: AsyncSession, user_id: int, session_id: Optional[int]) -> Optional[ChatSession]:
+        """Return the user's chat session, or None when a new one should be started"""
+        if not session_id:
+            return None
+        session = await self.get_session_by_id(db, session_id)
+        if not session or session.user_id != user_id:
+            raise ValueError("Invalid session ID")
+        return session
+
+    async def load_state(self, session: Optional[ChatSession]) -> Optional[ConversationState]:
+        """Conversation state of the session (empty for a new one), None when carry-over is off"""
+        if not settings.CHAT_STATE_ENABLED:
+            return None
+        return await conversation_states.get(session.id if session else None)
+
+    async def save_state(self, session: ChatSession, state: Optional[ConversationState]) -> None:
+        if state is not None:
+            await conversation_states.save(session.id, state)
+
+    async def _persist_turn(self, db: AsyncSession, user_id: int, session: Optional[ChatSession],
+                            user_message: str, bot_message: str, cars: List[CarPublic]) -> ChatSession:
         """
-        Process a chat request and generate a response with car recommendations
+        Store one chat turn as a single unit of work: rows are inserted in bulk and committed once.
+        A new session is inserted together with the messages.
         """
-        # Get or create chat session
-        if chat_request.session_id:
-            session = await self.get_session_by_id(db, chat_request.session_id)
-            if not session or session.user_id != user_id:
-                raise ValueError("Invalid session ID")
-        else:
-            # Create new session
+        new_session = session is None
+        if new_session:
             session_title = f"Chat {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-            session = await self.create_session(db, user_id, title=session_title)
-
-        # Add user message to session
-        user_message = await self.add_message(
-            db, session.id, user_id, chat_request.message, "user"
-        )
-
-        # Generate bot response based on user message
-        # This is a simplified version - in a real app, you'd integrate with an LLM
-        bot_response = await self.generate_bot_response(db, chat_request.message)
+            session = await self.session_repository.insert(
+                db, ChatSessionCreate(user_id=user_id, title=session_title)
+            )
+
+        messages = [
+            MessageCreate(chat_session_id=session.id, user_id=user_id,
+                          content=user_message, role="user"),
+            MessageCreate(chat_session_id=session.id, user_id=None,
+                          content=bot_message, role="assistant"),
+        ]
+        # Remember which cars were recommended and for which request
+        recommendations = [
+            RecommendationCreate(chat_session_id=session.id, car_id=car.id, reason=user_message)
+            for car in cars or []
+        ]
+
+        if settings.CHAT_WRITE_BEHIND_ENABLED:
+            # Only a new session must be committed now; the writer inserts into it from another connection
+            if new_session:
+                await db.commit()
+            await chat_write_behind.enqueue(messages, recommendations)
+        else:
+            # Both messages in one INSERT ... RETURNING
+            await self.message_repository.bulk_insert(db, messages)
+            await self.recommendation_repository.bulk_insert_ignore_existing(db, recommendations)
+            await db.commit()
+        return session
 
-        # Add bot message to session
-        bot_message = await self.add_message(
-            db, session.id, None, bot_response.response, "assistant"
+    async def process_chat_request(self, db: AsyncSession, user_id: int, chat_request: ChatRequest) -> ChatResponse:
+        """
+        Process a chat request and generate a response with car recommendations.
+        The whole turn is one unit of work: rows are inserted in bulk and committed once.
+        """
+        with track_statements() as statements:
+            with stage("session"):
+                session = await self.resolve_session(db, user_id, chat_request.session_id)
+                # Earlier turns are carried over through the session state, not by reloading the history
+                state = await self.load_state(session)
+
+            # Generate bot response based on user message
+            # This is a simplified version - in a real app, you'd integrate with an LLM
+            bot_response = await self.generate_bot_response(db, chat_request.message, state)
+
+            with stage("persist"):
+                session = await self._persist_turn(
+                    db, user_id, session, chat_request.message,
+                    bot_response.response, bot_response.car_recommendations
+                )
+                await self.save_state(session, state)
+
+        logger.debug(
+            f"Chat turn for session {session.id}: {statements.count} SQL statements, {statements.commits} commits"
         )
 
         # Return the response
@@ -161,15 +295,49 @@ class ChatService:
             car_recommendations=bot_response.car_recommendations
         )
 
-    async def generate_bot_response(self, db: AsyncSession, user_message: str) -> ChatResponse:
+    async def stream_chat_request(self, db: AsyncSession, user_id: int, chat_request: ChatRequest,
+                                  session: Optional[ChatSession]) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Streaming variant of process_chat_request. Yields (event, data) pairs: "params", one
+        "car" per recommendation as soon as it is found, then "done" with the closing text,
+        the full response and the session id once the turn is stored.
+        The session must be resolved beforehand with resolve_session.
+        """
+        from app.utils.car_recommender import recommendation_engine
+
+        state = await self.load_state(session)
+        cars = []
+        response_text = ""
+        async for event, payload in recommendation_engine.stream_query(db, chat_request.message, state):
+            if event == "params":
+                yield "params", {"params": payload}
+            elif event == "car":
+                position, car, text = payload
+                cars.append(car)
+                yield "car", {
+                    "position": position,
+                    "car": CarPublic.model_validate(car, from_attributes=True).model_dump(mode="json"),
+                    "text": text,
+                }
+            elif event == "text":
+                closing_text, response_text = payload
+
+        with stage("persist"):
+            session = await self._persist_turn(db, user_id, session, chat_request.message, response_text, cars)
+            await self.save_state(session, state)
+        yield "done", {"session_id": session.id, "text": closing_text, "response": response_text}
+
+    async def generate_bot_response(self, db: AsyncSession, user_message: str,
+                                    state: Optional[ConversationState] = None) -> ChatResponse:
         """
         Generate a bot response based on the user's message using the recommendation engine.
+        The conversation state, if given, carries the parameters of earlier turns.
         """
         # Import the recommendation engine here to avoid circular import
         from app.utils.car_recommender import recommendation_engine
 
         # Use the recommendation engine to process the query
-        response_text, matching_cars = await recommendation_engine.process_query(db, user_message)
+        response_text, matching_cars = await recommendation_engine.process_query(db, user_message, state)
 
         return ChatResponse(
             response=response_text,
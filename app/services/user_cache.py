@@ -0,0 +1,46 @@
+from typing import Optional
+
+from app.core.cache import TwoTierCache
+from app.core.config import settings
+from app.schemas.user import UserInDB
+
+
+class UserPrincipalCache:
+    """
+    Short-lived cache of authenticated users keyed on user id.
+
+    Serves get_current_user without touching the users table. UserService drops the entry
+    before and after it commits an update or delete, so this worker and Redis stop serving the
+    old row at once. Other workers keep their in-process copy, so they may see the old user
+    for up to USER_CACHE_TTL seconds, with or without Redis; the same bound covers a request
+    that read the old row before the commit and caches it after the second drop.
+    """
+
+    def __init__(self):
+        self.cache = TwoTierCache(
+            namespace="users",
+            local_maxsize=settings.USER_CACHE_LOCAL_SIZE,
+            local_ttl=settings.USER_CACHE_TTL,
+            redis_ttl=settings.USER_CACHE_TTL,
+            use_redis=settings.USER_CACHE_REDIS,
+        )
+
+    async def get(self, user_id: int) -> Optional[UserInDB]:
+        value = await self.cache.get(str(user_id))
+        if value is None:
+            return None
+        return UserInDB.model_validate_json(value)
+
+    async def set(self, user: UserInDB) -> None:
+        await self.cache.set(str(user.id), user.model_dump_json())
+
+    async def invalidate(self, user_id: int) -> None:
+        await self.cache.delete(str(user_id))
+
+    @property
+    def stats(self) -> dict:
+        return self.cache.stats
+
+
+# Global instance of the user principal cache
+user_cache = UserPrincipalCache()
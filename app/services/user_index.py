@@ -0,0 +1,42 @@
+from typing import Optional
+
+from app.core.cache import TwoTierCache
+from app.core.config import settings
+
+
+class UserLookupIndex:
+    """
+    Email/username -> user id hash index in front of the users table.
+
+    The in-process tier answers repeat logins without a query, Redis shares entries between
+    workers. Entries are hints, not the source of truth: callers load the user by primary key
+    and check the email/username still matches, dropping the entry otherwise, so renamed or
+    deleted users never need explicit invalidation.
+    """
+
+    def __init__(self):
+        self.cache = TwoTierCache(
+            namespace="users:login",
+            local_maxsize=settings.USER_INDEX_LOCAL_SIZE,
+            local_ttl=settings.USER_INDEX_TTL,
+            redis_ttl=settings.USER_INDEX_TTL,
+        )
+
+    async def get(self, identifier: str) -> Optional[int]:
+        value = await self.cache.get(identifier)
+        return int(value) if value is not None else None
+
+    async def add(self, user) -> None:
+        await self.cache.set(user.email, str(user.id))
+        await self.cache.set(user.username, str(user.id))
+
+    async def discard(self, identifier: str) -> None:
+        await self.cache.delete(identifier)
+
+    @property
+    def stats(self) -> dict:
+        return self.cache.stats
+
+
+# Global instance of the login index
+user_index = UserLookupIndex()
@@ -0,0 +1,217 @@
+import asyncio
+import contextvars
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from app.core.config import settings
+from app.repositories.chat import MessageRepository, RecommendationRepository
+from app.schemas.user import MessageCreate, RecommendationCreate
+
+
+logger = logging.getLogger(__name__)
+
+# Chat turns kept for inspection after a permanent write error
+DEAD_LETTER_SIZE = 1000
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed write may succeed if retried: lost connections, timeouts, locks"""
+    if isinstance(error, (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+@dataclass
+class ChatTurnWrite:
+    messages: List[MessageCreate]
+    recommendations: List[RecommendationCreate] = field(default_factory=list)
+
+
+class ChatWriteBehind:
+    """
+    Write-behind persistence for chat turns.
+
+    Requests put their messages and recommendations on a bounded asyncio queue and return
+    immediately; a background writer drains the queue in batches, writing each batch with
+    multi-row INSERTs and a single commit. The queue is flushed on shutdown.
+
+    Delivery is at-least-once when CHAT_WRITE_BEHIND_AT_LEAST_ONCE is set: a batch failing with
+    a transient error (see is_transient) is retried until it commits, so a batch whose commit
+    outcome was lost may be written twice (recommendations are deduplicated by their unique
+    constraint, messages are not). Otherwise it is dropped after CHAT_WRITE_BEHIND_MAX_RETRIES
+    failed attempts. A permanent error (a constraint or data error) is not retried: the
+    batch's turns are written one by one, and a turn that still fails goes to dead_letters
+    instead of holding up the queue.
+    """
+
+    def __init__(self, session_factory: Optional[Callable] = None,
+                 max_queue_size: Optional[int] = None,
+                 batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None,
+                 max_retries: Optional[int] = None,
+                 at_least_once: Optional[bool] = None,
+                 overflow: Optional[str] = None):
+        self._session_factory = session_factory
+        self.max_queue_size = max_queue_size or settings.CHAT_WRITE_BEHIND_QUEUE_SIZE
+        self.batch_size = batch_size or settings.CHAT_WRITE_BEHIND_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.CHAT_WRITE_BEHIND_FLUSH_INTERVAL
+        self.max_retries = max_retries if max_retries is not None else settings.CHAT_WRITE_BEHIND_MAX_RETRIES
+        self.at_least_once = at_least_once if at_least_once is not None else settings.CHAT_WRITE_BEHIND_AT_LEAST_ONCE
+        self.overflow = overflow or settings.CHAT_WRITE_BEHIND_OVERFLOW
+
+        self.message_repository = MessageRepository()
+        self.recommendation_repository = RecommendationRepository()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._queue_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.dead_letters: deque = deque(maxlen=DEAD_LETTER_SIZE)
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "failures": 0, "dropped": 0,
+                      "dead_lettered": 0, "sync_writes": 0}
+
+    def configure(self, session_factory: Callable) -> None:
+        """Use a specific session factory instead of the application database"""
+        self._session_factory = session_factory
+
+    def _new_session(self):
+        if self._session_factory is None:
+            from app import database
+            return database.get_session_factory()()
+        return self._session_factory()
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None and not self._writer.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        if self._writer is not None and not self._writer.cancelled() and self._writer.exception():
+            logger.error(f"Chat write-behind writer died, restarting: {self._writer.exception()!r}")
+        loop = asyncio.get_running_loop()
+        if self._queue_loop is not loop:
+            # A queue only works on the loop it was created on; turns still in one left
+            # by an earlier loop move to the new queue. On the same loop the queue is kept.
+            pending = []
+            while self._queue is not None and not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            self._queue = asyncio.Queue(maxsize=max(self.max_queue_size, len(pending)))
+            self._queue_loop = loop
+            for item in pending:
+                self._queue.put_nowait(item)
+        # Run the writer in an empty context so it does not inherit per-request state
+        # (such as the SQL statement counter) from whichever request started it
+        self._writer = contextvars.Context().run(asyncio.create_task, self._run())
+
+    async def enqueue(self, messages: List[MessageCreate],
+                      recommendations: Optional[List[RecommendationCreate]] = None) -> None:
+        """Queue a chat turn for persistence; applies backpressure when the queue is full"""
+        # Started lazily so serverless deployments without a startup hook still work
+        self.start()
+        item = ChatTurnWrite(messages, recommendations or [])
+        self.stats["enqueued"] += 1
+
+        if self._queue.full() and self.overflow == "sync":
+            # Queue is saturated: persist on the request path instead of waiting
+            self.stats["sync_writes"] += 1
+            await self._write_batch([item])
+            return
+        await self._queue.put(item)
+
+    async def flush(self) -> None:
+        """Wait until everything queued so far has been written"""
+        if self.running:
+            await self._queue.join()
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Flush the queue and stop the background writer"""
+        if not self.running:
+            return
+        timeout = timeout if timeout is not None else settings.CHAT_WRITE_BEHIND_SHUTDOWN_TIMEOUT
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Chat write-behind shutdown timed out with {self._queue.qsize()} turns still queued")
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            # Give concurrent requests a moment to join the batch
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._write_with_retries(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write_with_retries(self, batch: List[ChatTurnWrite]) -> None:
+        try:
+            await self._write_retrying_transient(batch)
+        except Exception as e:
+            self.stats["failures"] += 1
+            if len(batch) == 1:
+                self.stats["dead_lettered"] += 1
+                self.dead_letters.append(batch[0])
+                logger.error(f"Chat write-behind turn failed permanently, moved to dead letters: {e}")
+                return
+            # Isolate the bad turn so the rest of the batch is still written
+            logger.warning(f"Chat write-behind batch of {len(batch)} turns failed permanently, writing them one by one: {e}")
+            for item in batch:
+                await self._write_with_retries([item])
+
+    async def _write_retrying_transient(self, batch: List[ChatTurnWrite]) -> None:
+        """Write the batch, retrying transient errors; permanent errors are raised"""
+        attempt = 0
+        while True:
+            try:
+                await self._write_batch(batch)
+                return
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                attempt += 1
+                self.stats["failures"] += 1
+                if not self.at_least_once and attempt > self.max_retries:
+                    self.stats["dropped"] += len(batch)
+                    logger.error(f"Dropping {len(batch)} chat turns after {attempt} failed writes: {e}")
+                    return
+                logger.warning(f"Chat write-behind batch failed (attempt {attempt}): {e}")
+                await asyncio.sleep(min(0.1 * 2 ** attempt, 5.0))
+
+    async def _write_batch(self, batch: List[ChatTurnWrite]) -> None:
+        messages = [message for item in batch for message in item.messages]
+        recommendations = [recommendation for item in batch for recommendation in item.recommendations]
+        async with self._new_session() as db:
+            if messages:
+                await self.message_repository.bulk_insert(db, messages)
+            await self.recommendation_repository.bulk_insert_ignore_existing(db, recommendations)
+            await db.commit()
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+
+
+# Global instance of the chat write-behind queue
+chat_write_behind = ChatWriteBehind()
@@ -1,5 +1,13 @@
 from app.celery_app import celery_app
+import asyncio
 import time
+import uuid
+from typing import List, Optional
+from celery import chord, group
+from celery.result import AsyncResult, GroupResult
+from app.core.config import settings
+from app.database import get_session_factory
+from app.services.bulk_recommendations import BulkRecommendationScorer, chunked, read_queries
 
 
 @celery_app.task
@@ -21,4 +29,98 @@ def process_car_data_task(car_id: int):
     # Симуляция обработки данных автомобиля
     time.sleep(3)  # Имитация задержки
     print(f"Обработка данных для автомобиля с ID {car_id}")
-    return {"status": "Car data processed", "car_id": car_id}
\ No newline at end of file
+    return {"status": "Car data processed", "car_id": car_id}
+
+# Массовый расчет рекомендаций: очередь покупательских запросов (например, requests.jsonl)
+# делится на чанки, чанки считаются параллельно на воркерах (chord из group), итог
+# собирает finish_bulk_recommendations_task. Результаты пишутся в bulk_recommendations.
+
+# Один event loop на процесс воркера: пул соединений БД и индекс каталога живут между задачами
+_loop = None
+
+
+def run_async(coro):
+    """
+    Выполняет корутину в event loop текущего процесса воркера
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+@celery_app.task(bind=True, acks_late=True)
+def score_recommendations_chunk_task(self, job_id: str, offset: int, queries: List[str], limit: int = 5):
+    """
+    Считает рекомендации для одного чанка запросов и записывает их одной вставкой.
+    Ход выполнения публикуется в result backend как состояние PROGRESS.
+    Повтор чанка безопасен: уже записанные строки пропускаются.
+    """
+    def progress(done: int):
+        self.update_state(state="PROGRESS", meta={"offset": offset, "done": done, "total": len(queries)})
+
+    scorer = BulkRecommendationScorer(get_session_factory(), limit)
+    return run_async(scorer.score_chunk(job_id, offset, queries, progress))
+
+
+@celery_app.task
+def finish_bulk_recommendations_task(chunks: List[dict], job_id: str):
+    """
+    Итог массового расчета: вызывается chord после всех чанков
+    """
+    return {
+        "job_id": job_id,
+        "chunks": len(chunks),
+        "queries": sum(chunk["queries"] for chunk in chunks),
+        "seconds": sum(chunk["seconds"] for chunk in chunks),
+    }
+
+
+def start_bulk_recommendations(queries: List[str], limit: int = 5, chunk_size: Optional[int] = None,
+                               job_id: Optional[str] = None) -> str:
+    """
+    Запускает массовый расчет и возвращает job_id. Под этим id в result backend лежат
+    итог задачи (AsyncResult(job_id)) и группа чанков (bulk_recommendations_progress).
+    """
+    job_id = job_id or uuid.uuid4().hex
+    chunks = [
+        score_recommendations_chunk_task.s(job_id, offset, chunk, limit).set(task_id=uuid.uuid4().hex)
+        for offset, chunk in chunked(queries, chunk_size or settings.BULK_RECOMMENDATION_CHUNK_SIZE)
+    ]
+    # Группа сохраняется до запуска, чтобы прогресс можно было читать с первого чанка
+    GroupResult(job_id, [AsyncResult(chunk.id, app=celery_app) for chunk in chunks], app=celery_app).save()
+    chord(group(chunks), finish_bulk_recommendations_task.s(job_id).set(task_id=job_id)).apply_async()
+    return job_id
+
+
+@celery_app.task
+def score_recommendations_file_task(path: str, limit: int = 5, chunk_size: Optional[int] = None):
+    """
+    Массовый расчет по JSONL-файлу запросов, доступному воркеру
+    """
+    queries = read_queries(path)
+    return {"job_id": start_bulk_recommendations(queries, limit, chunk_size), "queries": len(queries)}
+
+
+def bulk_recommendations_progress(job_id: str) -> dict:
+    """
+    Прогресс массового расчета по состояниям его чанков в result backend
+    """
+    group_result = GroupResult.restore(job_id, app=celery_app)
+    if group_result is None:
+        raise ValueError(f"Unknown bulk recommendation job: {job_id}")
+    chunks_done = queries_done = 0
+    for chunk in group_result.results:
+        if chunk.successful():
+            chunks_done += 1
+            queries_done += chunk.result["queries"]
+        elif chunk.state == "PROGRESS":
+            queries_done += chunk.info["done"]
+    summary = AsyncResult(job_id, app=celery_app)
+    return {
+        "job_id": job_id,
+        "state": summary.state,
+        "chunks": len(group_result.results),
+        "chunks_done": chunks_done,
+        "queries_done": queries_done,
+    }
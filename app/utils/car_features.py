@@ -0,0 +1,30 @@
+import re
+from typing import Iterable, List, Optional
+
+
+# car_features.name is a String(100)
+MAX_FEATURE_LENGTH = 100
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_feature(name: str) -> str:
+    """Canonical feature name: trimmed, single-spaced, lower case"""
+    return _whitespace.sub(" ", name).strip().lower()[:MAX_FEATURE_LENGTH]
+
+
+def split_features(text: Optional[str]) -> List[str]:
+    """
+    Split the comma-separated Car.features text into canonical feature names, in order and
+    without duplicates. The car_feature_associations rows and the catalog index bitsets are
+    both derived from this, so the SQL filter and the in-memory filter agree.
+    """
+    if not text:
+        return []
+    names = (normalize_feature(part) for part in text.split(","))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def normalize_features(names: Iterable[str]) -> List[str]:
+    """Canonical, de-duplicated names for a list of requested features"""
+    return list(dict.fromkeys(name for name in map(normalize_feature, names) if name))
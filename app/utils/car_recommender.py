@@ -1,7 +1,52 @@
+import asyncio
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.core.config import settings
 from app.services.car import CarService
 from app.schemas.user import CarPublic
+from app.core.cache import catalog_version
+from app.core.timing import stage
+from app.services.conversation_state import ConversationState
+from app.services.recommendation_cache import recommendation_cache
+from app.utils.car_scoring import car_scorer
+from app.utils.catalog_index import CarCatalogIndex, catalog_index
+
+
+def _trie_pattern(words) -> str:
+    """
+    Build a regex alternation with shared prefixes factored out, so the regex engine
+    follows a single branch per position instead of trying every keyword.
+    Longer keywords win over their prefixes ("электрогибрид" over "электро").
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node) -> str:
+        is_terminal = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if is_terminal:
+            pattern = '(?:' + pattern + ')?'
+        return pattern
+
+    return build(trie)
+
+
+def _standalone(text: str, start: int, end: int) -> bool:
+    """Whether text[start:end] is a whole word (or phrase), not part of a longer one"""
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+# Keywords up to this length only match as whole words
+WHOLE_WORD_MAX_LENGTH = 3
+# Batch queries processed between two yields to the event loop
+BATCH_YIELD_INTERVAL = 500
 
 
 class CarRecommendationEngine:
@@ -42,6 +87,34 @@ class CarRecommendationEngine:
             }
         }
         
+        # Feature name (as stored in car_features) -> phrasings; a query may ask for several
+        self.feature_keywords = {
+            'полный привод': ['полный привод', 'полным приводом', 'полноприводный', 'полноприводная', '4x4', 'awd'],
+            'подогрев сидений': ['подогрев сидений', 'подогревом сидений', 'подогреваемые сиденья'],
+            'подогрев руля': ['подогрев руля', 'подогревом руля'],
+            'кожаный салон': ['кожаный салон', 'кожаным салоном', 'кожа'],
+            'панорамная крыша': ['панорамная крыша', 'панорамной крышей', 'панорама', 'панорамой'],
+            'круиз-контроль': ['круиз-контроль', 'круиз-контролем', 'круиз'],
+            'адаптивный круиз-контроль': ['адаптивный круиз-контроль', 'адаптивным круиз-контролем', 'адаптивный круиз'],
+            'камера заднего вида': ['камера заднего вида', 'камерой заднего вида'],
+            'климат-контроль': ['климат-контроль', 'климат-контролем', 'климат'],
+            'беспроводная зарядка': ['беспроводная зарядка', 'беспроводной зарядкой'],
+            'парктроник': ['парктроник', 'парктроником', 'парктроники'],
+            'bluetooth': ['bluetooth', 'блютуз', 'блютус'],
+        }
+
+        # Follow-ups relative to the previous answer ("а подешевле?"), applied by ConversationState.
+        # Only standalone words count, and only comparatives that cannot carry a number:
+        # "дешевле 2 млн" and "не дороже 3 млн" are explicit bounds (context_keywords).
+        # Resetting needs an explicit phrase, not everyday words like "сначала".
+        self.refine_keywords = {
+            'cheaper': ['подешевле', 'бюджетнее'],
+            'pricier': ['подороже', 'премиальнее'],
+            'newer': ['поновее', 'посвежее'],
+            'more_powerful': ['помощнее', 'побыстрее'],
+            'reset': ['новый поиск', 'сбрось', 'сбросить', 'начать заново', 'начнем заново', 'начнём заново'],
+        }
+
         # Price-related keywords
         self.price_keywords = [
             'бюджет', 'цена', 'стоимость', 'дорогой', 'дешевый', 'недорогой', 
@@ -53,81 +126,138 @@ class CarRecommendationEngine:
             'год', 'выпуск', 'новый', 'старый', 'новее', 'старше', 'свежий'
         ]
 
+        # Context words that turn an extracted number into a lower or upper bound
+        self.context_keywords = {
+            'max_price': ['до', 'менее', 'не_больше', 'бюджет', 'дешевле', 'не дороже'],
+            'min_price': ['более', 'больше', 'от', 'дороже', 'не дешевле'],
+            'min_year': ['новый', 'новее', 'свежий'],
+            'max_year': ['старый', 'старше'],
+            'min_horsepower': ['мощнее', 'мощный', 'мощность']
+        }
+
+        self.price_multipliers = {
+            'тыс': 1000,
+            'тысяч': 1000,
+            'млн': 1000000,
+            'миллион': 1000000
+        }
+
+        self._compile_matcher()
+
+    def _compile_matcher(self) -> None:
+        """
+        Build a single alternation regex over every keyword and numeric pattern,
+        so that extract_parameters needs only one pass over the query
+        """
+        # keyword -> (parameter, value, rank); rank keeps the old "last value wins" order
+        self._keyword_index: Dict[str, Tuple[str, str, int]] = {}
+        for param in ('body_type', 'fuel_type', 'transmission', 'make'):
+            for rank, (value, keywords) in enumerate(self.parameter_keywords[param].items()):
+                for keyword in keywords:
+                    self._keyword_index[keyword] = (param, value, rank)
+
+        for feature, keywords in self.feature_keywords.items():
+            for keyword in keywords:
+                self._keyword_index[keyword] = ('feature', feature, 0)
+        for refinement, keywords in self.refine_keywords.items():
+            for keyword in keywords:
+                self._keyword_index[keyword] = ('refine', refinement, 0)
+
+        # Context words that decide whether a number is a lower or an upper bound
+        for flag, words in self.context_keywords.items():
+            for word in words:
+                self._keyword_index.setdefault(word, ('context', flag, 0))
+
+        # Matches start at a word start: "ат" inside "желательно" or "от" inside "работы" is not
+        # a keyword. Short keywords (abbreviations, prepositions) must also end the word; longer
+        # ones are stems and keep matching their inflections ("седан" in "седана").
+        whole_words = [keyword for keyword in self._keyword_index if len(keyword) <= WHOLE_WORD_MAX_LENGTH]
+        stems = [keyword for keyword in self._keyword_index if len(keyword) > WHOLE_WORD_MAX_LENGTH]
+        # Characters a match can start with: other word starts fail one class test instead of
+        # trying the whole alternation there
+        first_chars = ''.join(sorted({re.escape(keyword[0]) for keyword in self._keyword_index}))
+        self._matcher = re.compile(
+            r'(?<!\w)(?=[\d' + first_chars + r'])(?:'
+            # The digit lookahead lets non-digit positions skip the numeric patterns at once
+            r'(?=\d)(?:'
+            r'(?P<price>\d{1,3}(?:\s*\d{3})*)\s*(?P<unit>рублей|руб|тысяч|тыс|млн|миллион)'
+            r'|(?P<hp>\d+)\s*(?:л\.с\.|лс|лошадиных)'
+            r'|\b(?P<year>20\d{2})\b'
+            r')|(?P<keyword>' + _trie_pattern(stems) + r')'
+            r'|(?P<word>' + _trie_pattern(whole_words) + r')(?!\w))'
+        )
+
     def extract_parameters(self, query: str) -> Dict[str, any]:
         """
-        Extract car parameters from a natural language query
+        Extract car parameters from a natural language query in a single regex pass
         """
-        query_lower = query.lower()
         params = {}
-        
-        # Extract body type
-        for body_type, keywords in self.parameter_keywords['body_type'].items():
-            if any(keyword in query_lower for keyword in keywords):
-                params['body_type'] = body_type
-        
-        # Extract fuel type
-        for fuel_type, keywords in self.parameter_keywords['fuel_type'].items():
-            if any(keyword in query_lower for keyword in keywords):
-                params['fuel_type'] = fuel_type
-        
-        # Extract transmission
-        for transmission, keywords in self.parameter_keywords['transmission'].items():
-            if any(keyword in query_lower for keyword in keywords):
-                params['transmission'] = transmission
-        
-        # Extract make
-        for make, keywords in self.parameter_keywords['make'].items():
-            if any(keyword in query_lower for keyword in keywords):
-                params['make'] = make
-        
-        # Extract price range
-        price_match = re.search(r'(\d{1,3}(?:\s*\d{3})*)\s*(?:руб|рублей|тыс|тысяч|млн|миллион)', query_lower)
-        if price_match:
-            price_str = price_match.group(1).replace(' ', '')
-            price = int(price_str)
-            
-            # Adjust for units
-            if 'тыс' in query_lower or 'тысяч' in query_lower:
-                price *= 1000
-            elif 'млн' in query_lower or 'миллион' in query_lower:
-                price *= 1000000
-            
-            # Determine if it's max price or min price based on context
-            if any(word in query_lower for word in ['до', 'менее', 'не_больше', 'бюджет']):
-                params['max_price'] = price
-            elif any(word in query_lower for word in ['более', 'больше', 'от']):
-                params['min_price'] = price
-            else:
+        ranks = {}
+        flags = set()
+        features = []
+        refine = []
+        price = hp = year = None
+
+        text = query.lower()
+        for match in self._matcher.finditer(text):
+            kind = match.lastgroup
+            if kind in ('keyword', 'word'):
+                param, value, rank = self._keyword_index[match.group(kind)]
+                if param == 'context':
+                    flags.add(value)
+                elif param == 'feature':
+                    if value not in features:
+                        features.append(value)
+                elif param == 'refine':
+                    if _standalone(text, match.start(), match.end()) and value not in refine:
+                        refine.append(value)
+                elif rank >= ranks.get(param, -1):
+                    params[param] = value
+                    ranks[param] = rank
+            elif kind == 'unit':
+                if price is None:
+                    price = int(match.group('price').replace(' ', ''))
+                    price *= self.price_multipliers.get(match.group('unit'), 1)
+            elif kind == 'hp':
+                if hp is None:
+                    hp = int(match.group('hp'))
+            elif kind == 'year':
+                if year is None:
+                    year = int(match.group('year'))
+
+        # Determine if it's max price or min price based on context
+        if price is not None:
+            if 'max_price' in flags or 'min_price' not in flags:
                 # Default to max price if not specified
                 params['max_price'] = price
-        
-        # Extract year range
-        year_match = re.search(r'(?:\b(20\d{2})\b)', query_lower)
-        if year_match:
-            year = int(year_match.group(1))
-            if any(word in query_lower for word in ['новый', 'новее', 'свежий']):
+            else:
+                params['min_price'] = price
+
+        if year is not None:
+            if 'min_year' in flags:
                 params['min_year'] = year
-            elif any(word in query_lower for word in ['старый', 'старше']):
+            elif 'max_year' in flags:
                 params['max_year'] = year
             else:
                 params['year'] = year
-        
-        # Extract power (horsepower)
-        hp_match = re.search(r'(\d+)\s*(?:л\.с\.|лс|лошадиных)', query_lower)
-        if hp_match:
-            power = int(hp_match.group(1))
-            if any(word in query_lower for word in ['мощнее', 'мощный', 'мощность']):
-                params['min_horsepower'] = power
+
+        if hp is not None:
+            if 'min_horsepower' in flags:
+                params['min_horsepower'] = hp
             else:
-                params['horsepower'] = power
-        
+                params['horsepower'] = hp
+
+        if features:
+            params['features'] = features
+        if refine:
+            params['refine'] = refine
+
         return params
 
-    async def find_matching_cars(self, db, params: Dict[str, any], limit: int = 5) -> List[CarPublic]:
+    def build_filters(self, params: Dict[str, any]) -> Dict[str, any]:
         """
-        Find cars that match the extracted parameters
+        Map extracted parameters to CarService.get_cars_by_filters arguments
         """
-        # Map our parameters to the car service parameters
         filters = {}
         
         if 'make' in params:
@@ -150,71 +280,195 @@ class CarRecommendationEngine:
         if 'max_price' in params:
             filters['max_price'] = params['max_price']
         if 'min_horsepower' in params:
-            # Note: Our car service doesn't have min_horsepower filter, so we'll need to filter after
-            pass
-        
-        # Get cars from the database
-        cars = await self.car_service.get_cars_by_filters(db, **filters, limit=limit*2)  # Get more to account for additional filtering
-        
-        # Additional filtering for horsepower if needed
-        if 'min_horsepower' in params:
-            min_hp = params['min_horsepower']
-            cars = [car for car in cars if car.horsepower and car.horsepower >= min_hp]
-        
-        # Limit to desired number
-        return cars[:limit]
+            filters['min_horsepower'] = params['min_horsepower']
+        if 'features' in params:
+            # Must-have features: an indexed semi-join in SQL, a bitset test in the catalog index
+            filters['features'] = params['features']
+        return filters
 
-    def generate_response(self, query: str, matching_cars: List[CarPublic]) -> str:
+    async def iter_matching_cars(self, db, params: Dict[str, any], limit: int = 5) -> AsyncIterator[CarPublic]:
         """
-        Generate a natural language response based on the query and matching cars
+        Yield the cars that match the extracted parameters as soon as each one is available
         """
-        if not matching_cars:
+        version = await catalog_version.get()
+        if settings.RECOMMENDATION_CACHE_ENABLED:
+            cached = await recommendation_cache.get(params, limit, version)
+            if cached is not None:
+                for car in cached:
+                    yield car
+                return
+
+        filters = self.build_filters(params)
+        cars = []
+
+        if settings.RECOMMENDATION_RANKING_ENABLED:
+            # Exact matches first, then the closest relaxed ones
+            for car in await self.rank_matching_cars(db, filters, limit, version):
+                cars.append(car)
+                yield car
+        elif settings.CATALOG_INDEX_ENABLED:
+            # Answer from the in-memory catalog index, no DB query once it is loaded
+            catalog_index.sync_version(version)
+            await catalog_index.ensure_loaded(db)
+            for car in catalog_index.filter(**filters, limit=limit):
+                cars.append(car)
+                yield car
+        else:
+            # Stream cars from the database; every filter is applied in SQL
+            async for car in self.car_service.stream_cars_by_filters(db, limit=limit, **filters):
+                cars.append(car)
+                yield car
+
+        if settings.RECOMMENDATION_CACHE_ENABLED:
+            await recommendation_cache.set(params, limit, version, cars)
+
+    async def rank_matching_cars(self, db, filters: Dict[str, any], limit: int, version: int) -> List[CarPublic]:
+        """
+        Top cars by weighted closeness to the filters, scored over the whole catalog index or,
+        without it, over one bounded candidate query around the relaxed filters
+        (unless SQL finds enough exact matches)
+        """
+        if settings.CATALOG_INDEX_ENABLED:
+            catalog_index.sync_version(version)
+            await catalog_index.ensure_loaded(db)
+            index = catalog_index
+        else:
+            # Exact matches come from an indexed, early-terminating query; the candidate query,
+            # which orders the relaxed set, only runs when there are too few of them
+            exact = await self.car_service.get_cars_by_filters(db, **filters, limit=limit)
+            if len(exact) >= limit:
+                return exact
+            candidates = await self.car_service.get_ranking_candidates(
+                db, filters, car_scorer.relax(filters), settings.RECOMMENDATION_CANDIDATES
+            )
+            index = CarCatalogIndex()
+            index.build(candidates)
+        return index.cars(car_scorer.top(index, filters, limit, settings.RECOMMENDATION_MIN_SCORE))
+
+    async def find_matching_cars(self, db, params: Dict[str, any], limit: int = 5) -> List[CarPublic]:
+        """
+        Find cars that match the extracted parameters
+        """
+        return [car async for car in self.iter_matching_cars(db, params, limit)]
+
+    async def iter_batch(self, db, queries: List[str],
+                         limit: int = 5) -> AsyncIterator[Tuple[int, str, Dict[str, any], List[CarPublic]]]:
+        """
+        Recommendations for many independent queries (no conversation state), yielded in input
+        order as (position, query, params, cars). Parameters are extracted once per distinct
+        query text and cars looked up once per distinct parameter set: one cache, index or SQL
+        lookup per set, however many queries reduce to it.
+        """
+        params_by_query: Dict[str, Dict[str, any]] = {}
+        cars_by_params: Dict[str, List[CarPublic]] = {}
+        for position, query in enumerate(queries):
+            if position and position % BATCH_YIELD_INTERVAL == 0:
+                # Extraction and repeated queries never await; let other requests in
+                await asyncio.sleep(0)
+            params = params_by_query.get(query)
+            if params is None:
+                params = params_by_query[query] = self.extract_parameters(query)
+            key = recommendation_cache.canonical(params)
+            cars = cars_by_params.get(key)
+            if cars is None:
+                found = await self.find_matching_cars(db, params, limit)
+                cars = cars_by_params[key] = [CarPublic.model_validate(car, from_attributes=True) for car in found]
+            yield position, query, params, cars
+
+    @staticmethod
+    def intro_text(count: int) -> str:
+        return f"Я нашел {count} автомобиль(ей), которые могут вам подойти:\n\n"
+
+    @staticmethod
+    def car_text(position: int, car: CarPublic) -> str:
+        """Markdown block describing one recommended car"""
+        lines = [
+            f"{position}. **{car.make} {car.model}** ({car.year} г.)\n",
+            f"   - Тип кузова: {car.body_type}\n",
+            f"   - Тип топлива: {car.fuel_type}\n",
+            f"   - Коробка передач: {car.transmission}\n",
+        ]
+        if car.engine_size:
+            lines.append(f"   - Объем двигателя: {car.engine_size} л.\n")
+        if car.horsepower:
+            lines.append(f"   - Мощность: {car.horsepower} л.с.\n")
+        if car.price:
+            lines.append(f"   - Цена: {car.price:,.0f} руб.\n")
+        if car.description:
+            lines.append(f"   - Описание: {car.description[:100]}...\n")
+        lines.append("\n")
+        return "".join(lines)
+
+    @staticmethod
+    def closing_text(count: int) -> str:
+        if count == 0:
             return (
                 "К сожалению, я не нашел автомобилей, соответствующих вашему запросу. "
                 "Попробуйте изменить параметры поиска или уточнить ваш запрос."
             )
-        
-        response = f"Я нашел {len(matching_cars)} автомобиль(ей), которые могут вам подойти:\n\n"
-        
-        for i, car in enumerate(matching_cars, 1):
-            response += (
-                f"{i}. **{car.make} {car.model}** ({car.year} г.)\n"
-                f"   - Тип кузова: {car.body_type}\n"
-                f"   - Тип топлива: {car.fuel_type}\n"
-                f"   - Коробка передач: {car.transmission}\n"
-            )
-            
-            if car.engine_size:
-                response += f"   - Объем двигателя: {car.engine_size} л.\n"
-            if car.horsepower:
-                response += f"   - Мощность: {car.horsepower} л.с.\n"
-            if car.price:
-                response += f"   - Цена: {car.price:,.0f} руб.\n"
-            
-            if car.description:
-                response += f"   - Описание: {car.description[:100]}...\n"
-            
-            response += "\n"
-        
-        if len(matching_cars) == 1:
-            response += "Это единственный автомобиль, соответствующий вашему запросу. "
-        else:
-            response += f"Выберите понравившийся вариант, и я могу рассказать о нем подробнее."
-        
-        return response
+        if count == 1:
+            return "Это единственный автомобиль, соответствующий вашему запросу. "
+        return "Выберите понравившийся вариант, и я могу рассказать о нем подробнее."
+
+    def generate_response(self, query: str, matching_cars: List[CarPublic]) -> str:
+        """
+        Generate a natural language response based on the query and matching cars
+        """
+        if not matching_cars:
+            return self.closing_text(0)
+        parts = [self.intro_text(len(matching_cars))]
+        parts.extend(self.car_text(i, car) for i, car in enumerate(matching_cars, 1))
+        parts.append(self.closing_text(len(matching_cars)))
+        return "".join(parts)
+
+    def resolve_parameters(self, query: str, state: Optional[ConversationState] = None) -> Tuple[Dict[str, any], Dict[str, any]]:
+        """
+        (parameters extracted from the query alone, parameters to search with). With a
+        conversation state the query refines the earlier turns of the session.
+        """
+        turn = self.extract_parameters(query)
+        return turn, (state or ConversationState()).merge(turn)
+
+    async def stream_query(self, db, query: str,
+                           state: Optional[ConversationState] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Process a user query as a stream of (event, payload) pairs:
+        ("params", search parameters) first, then ("car", (position, car, markdown)) for each
+        matching car as soon as it is found, then ("text", (closing text, full response)).
+        The full response is the same text process_query returns; the state, if given, is updated.
+        """
+        with stage("extract"):
+            turn, params = self.resolve_parameters(query, state)
+        yield "params", params
+
+        cars = []
+        async for car in self.iter_matching_cars(db, params):
+            cars.append(car)
+            yield "car", (len(cars), car, self.car_text(len(cars), car))
+
+        if state is not None:
+            state.record(turn, params, cars)
+        yield "text", (self.closing_text(len(cars)), self.generate_response(query, cars))
 
-    async def process_query(self, db, query: str) -> Tuple[str, List[CarPublic]]:
+    async def process_query(self, db, query: str,
+                            state: Optional[ConversationState] = None) -> Tuple[str, List[CarPublic]]:
         """
-        Main method to process a user query and return a response with car recommendations
+        Main method to process a user query and return a response with car recommendations.
+        The conversation state, if given, supplies the earlier turns and is updated.
         """
-        # Extract parameters from the query
-        params = self.extract_parameters(query)
+        # Extract parameters from the query, on top of the conversation so far
+        with stage("extract"):
+            turn, params = self.resolve_parameters(query, state)
         
         # Find matching cars
-        matching_cars = await self.find_matching_cars(db, params)
+        with stage("match"):
+            matching_cars = await self.find_matching_cars(db, params)
+        if state is not None:
+            state.record(turn, params, matching_cars)
         
         # Generate response
-        response = self.generate_response(query, matching_cars)
+        with stage("respond"):
+            response = self.generate_response(query, matching_cars)
         
         return response, matching_cars
 
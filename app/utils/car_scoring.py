@@ -0,0 +1,163 @@
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.utils.car_features import normalize_features
+
+
+# Weight of each criterion in the closeness score; only the criteria present in the filters count
+DEFAULT_WEIGHTS = {
+    'make': 3.0,
+    'body_type': 2.0,
+    'fuel_type': 1.5,
+    'transmission': 1.0,
+    'price': 3.0,
+    'year': 1.5,
+    'horsepower': 1.0,
+    'engine_size': 0.5,
+    'features': 2.0,
+}
+
+# How far outside its range a value may be before the criterion scores 0: in years for the
+# year, as a share of the violated bound for the others (0.5 = up to 50% over the budget)
+DEFAULT_TOLERANCES = {
+    'price': 0.5,
+    'year': 5,
+    'horsepower': 0.3,
+    'engine_size': 0.3,
+}
+
+RANGE_FILTERS = {
+    'price': ('min_price', 'max_price'),
+    'year': ('min_year', 'max_year'),
+    'horsepower': ('min_horsepower', 'max_horsepower'),
+    'engine_size': ('min_engine_size', 'max_engine_size'),
+}
+CATEGORY_FILTERS = ('make', 'body_type', 'fuel_type', 'transmission')
+INTEGER_COLUMNS = ('year', 'horsepower')
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first, ties broken by the lower index.
+    Selection is a linear-time partition; only the k winners are sorted.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        kth = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        picked = np.concatenate((above, ties))
+    else:
+        picked = np.arange(n)
+    return picked[np.lexsort((picked, -scores[picked]))]
+
+
+class CarScorer:
+    """
+    Weighted closeness of the cars in a CarCatalogIndex to the recommender filters.
+
+    Every criterion in the filters scores 1 when a car satisfies it. Categorical criteria score 0
+    otherwise, requested features by the share present, and ranges decay linearly to 0 at the
+    tolerance. The score is the weighted mean, so exact matches score 1.0 and always rank first;
+    cars beyond a range tolerance (outside relax()) are left out. One pass over the catalog
+    yields the exact matches and the closest relaxed ones together.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 tolerances: Optional[Dict[str, float]] = None):
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+
+    def relax(self, filters: dict) -> dict:
+        """Bounds of the cars worth scoring: ranges widened by their tolerance, other criteria dropped"""
+        relaxed = {}
+        for criterion, (low, high) in RANGE_FILTERS.items():
+            tolerance = self.tolerances[criterion]
+            if filters.get(low):
+                value = filters[low] - tolerance if criterion == 'year' else filters[low] * (1 - tolerance)
+                relaxed[low] = math.floor(value) if criterion in INTEGER_COLUMNS else value
+            if filters.get(high):
+                value = filters[high] + tolerance if criterion == 'year' else filters[high] * (1 + tolerance)
+                relaxed[high] = math.ceil(value) if criterion in INTEGER_COLUMNS else value
+        return relaxed
+
+    def _slack(self, criterion: str, bound: float) -> float:
+        tolerance = self.tolerances[criterion]
+        return tolerance if criterion == 'year' else tolerance * abs(bound)
+
+    def scores(self, index, filters: dict) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (positions, scores): the indexed cars within every range tolerance and their score in [0, 1].
+        The cheap bound checks run over the whole catalog, the scoring only over those cars.
+        """
+        ranges = []
+        eligible = np.ones(len(index), dtype=bool)
+        for criterion, (low, high) in RANGE_FILTERS.items():
+            low_value, high_value = filters.get(low), filters.get(high)
+            if not low_value and not high_value:
+                continue
+            values = index.column(criterion)
+            # NaN (missing value) compares False, like a SQL NULL against the range
+            if low_value:
+                eligible &= values >= low_value - self._slack(criterion, low_value)
+            if high_value:
+                eligible &= values <= high_value + self._slack(criterion, high_value)
+            ranges.append((criterion, low_value, high_value, values))
+
+        positions = np.flatnonzero(eligible)
+        total = np.zeros(len(positions), dtype=np.float64)
+        weight_sum = 0.0
+
+        for column in CATEGORY_FILTERS:
+            if filters.get(column):
+                weight = self.weights[column]
+                mask = index.category_mask(column, filters[column], ignore_case=column == 'make')
+                total += weight * mask[positions]
+                weight_sum += weight
+
+        for criterion, low_value, high_value, values in ranges:
+            values = values[positions]
+            closeness = np.ones(len(positions), dtype=np.float64)
+            if low_value:
+                closeness = np.minimum(closeness, 1 - (low_value - values) / self._slack(criterion, low_value))
+            if high_value:
+                closeness = np.minimum(closeness, 1 - (values - high_value) / self._slack(criterion, high_value))
+            weight = self.weights[criterion]
+            total += weight * np.maximum(closeness, 0.0)
+            weight_sum += weight
+
+        names = normalize_features(filters.get('features') or [])
+        if names:
+            bitsets = index.feature_bitsets[positions]
+            matched = np.zeros(len(positions), dtype=np.float64)
+            for name in names:
+                required = index.encode_features([name])
+                if required is not None:
+                    matched += np.all((bitsets & required) == required, axis=1)
+            weight = self.weights['features']
+            total += weight * matched / len(names)
+            weight_sum += weight
+
+        if not weight_sum:
+            return positions, np.ones(len(positions), dtype=np.float64)
+        return positions, total / weight_sum
+
+    def top(self, index, filters: dict, limit: int, min_score: float = 0.0) -> np.ndarray:
+        """Index positions of the best `limit` cars, exact matches first (in id order)"""
+        exact = np.flatnonzero(index.mask(**filters))
+        if len(exact) >= limit:
+            # Enough exact matches: they all score 1.0, so the ranking would pick these anyway
+            return exact[:limit]
+
+        positions, scores = self.scores(index, filters)
+        keep = scores >= min_score
+        positions, scores = positions[keep], scores[keep]
+        return positions[top_k(scores, limit)]
+
+
+# Global instance of the car scorer
+car_scorer = CarScorer()
@@ -0,0 +1,246 @@
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import Car
+from app.schemas.user import CarInDB
+from app.utils.car_features import normalize_features, split_features
+
+
+class CarCatalogIndex:
+    """
+    In-process, column-oriented copy of the car catalog.
+
+    Numeric columns are kept as NumPy arrays and every categorical value gets its own
+    boolean bitmap, so filter combinations are answered with vectorized masks instead
+    of a SQL round-trip. Features are packed into a per-car bitset (one bit per feature
+    name, 64 per uint64 word). The index is rebuilt lazily after CarService mutates a car.
+    """
+
+    numeric_columns = ('year', 'price', 'horsepower', 'engine_size')
+    categorical_columns = ('make', 'body_type', 'fuel_type', 'transmission')
+
+    def __init__(self):
+        self._rows: list = []
+        self._ids = np.empty(0, dtype=np.int64)
+        self._columns: Dict[str, np.ndarray] = {}
+        self._bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        self.feature_bits: Dict[str, int] = {}
+        self.feature_bitsets = np.zeros((0, 1), dtype=np.uint64)
+        self._stale = True
+        self._generation = 0
+        self.catalog_version: Optional[int] = None
+        self._lock = asyncio.Lock()
+        self.rebuild_seconds: float = 0.0
+
+    @property
+    def is_loaded(self) -> bool:
+        return not self._stale
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def invalidate(self) -> None:
+        """Mark the index stale; the next lookup rebuilds it from the database"""
+        self._generation += 1
+        self._stale = True
+
+    def sync_version(self, version: int) -> None:
+        """Invalidate the index when the shared catalog version moved (e.g. another worker wrote)"""
+        if self.catalog_version != version:
+            if self.catalog_version is not None:
+                self.invalidate()
+            self.catalog_version = version
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Reload the whole catalog from the database"""
+        async with self._lock:
+            await self._rebuild(db)
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if not self._stale:
+            return
+        async with self._lock:
+            # Another coroutine may have rebuilt the index while we were waiting
+            if self._stale:
+                await self._rebuild(db)
+
+    async def _rebuild(self, db: AsyncSession) -> None:
+        started = time.perf_counter()
+        generation = self._generation
+        # Plain row tuples are much lighter than ORM instances for large catalogs
+        result = await db.execute(select(*Car.__table__.columns).order_by(Car.id))
+        self.build(result.all())
+        # A mutation that landed during the reload keeps the index stale
+        self._stale = generation != self._generation
+        self.rebuild_seconds = time.perf_counter() - started
+
+    def build(self, cars: Iterable) -> None:
+        """Build the index from any objects exposing the Car attributes"""
+        started = time.perf_counter()
+        rows = list(cars)
+
+        self._ids = np.fromiter((car.id for car in rows), dtype=np.int64, count=len(rows))
+        self._columns = {
+            'year': np.fromiter((car.year for car in rows), dtype=np.int32, count=len(rows)),
+            # Missing values become NaN, so range comparisons drop them like SQL NULLs
+            'price': self._float_column(rows, 'price'),
+            'horsepower': self._float_column(rows, 'horsepower'),
+            'engine_size': self._float_column(rows, 'engine_size'),
+        }
+
+        self._bitmaps = {}
+        for column in self.categorical_columns:
+            values = np.array([getattr(car, column) for car in rows], dtype=object)
+            self._bitmaps[column] = {value: values == value for value in set(values.tolist())}
+        self._build_feature_bitsets(rows)
+
+        self._rows = rows
+        self._stale = False
+        self.rebuild_seconds = time.perf_counter() - started
+
+    def _build_feature_bitsets(self, rows: list) -> None:
+        # Catalogs repeat the same features text a lot, so each distinct text is parsed once
+        codes: Dict[Optional[str], int] = {}
+        row_codes = np.fromiter(
+            (codes.setdefault(car.features, len(codes)) for car in rows), dtype=np.int64, count=len(rows)
+        )
+        parsed = [split_features(text) for text in codes]
+
+        self.feature_bits = {}
+        for names in parsed:
+            for name in names:
+                self.feature_bits.setdefault(name, len(self.feature_bits))
+
+        table = np.zeros((len(parsed), self._feature_words()), dtype=np.uint64)
+        for code, names in enumerate(parsed):
+            for name in names:
+                bit = self.feature_bits[name]
+                table[code, bit // 64] |= np.uint64(1 << (bit % 64))
+        self.feature_bitsets = table[row_codes]
+
+    def _feature_words(self) -> int:
+        return max(1, (len(self.feature_bits) + 63) // 64)
+
+    def encode_features(self, names: Iterable[str]) -> Optional[np.ndarray]:
+        """Bitset of the given feature names; None when one of them is not in the catalog"""
+        bitset = np.zeros(self._feature_words(), dtype=np.uint64)
+        for name in normalize_features(names):
+            bit = self.feature_bits.get(name)
+            if bit is None:
+                return None
+            bitset[bit // 64] |= np.uint64(1 << (bit % 64))
+        return bitset
+
+    def feature_mask(self, names: Iterable[str]) -> np.ndarray:
+        """Cars that have every one of the given features"""
+        required = self.encode_features(names)
+        if required is None:
+            return np.zeros(len(self._rows), dtype=bool)
+        return np.all((self.feature_bitsets & required) == required, axis=1)
+
+    @staticmethod
+    def _float_column(rows: list, name: str) -> np.ndarray:
+        return np.array(
+            [value if (value := getattr(car, name)) is not None else np.nan for car in rows],
+            dtype=np.float64
+        )
+
+    def memory_bytes(self) -> int:
+        """Memory held by the column arrays and bitmaps (row payloads excluded)"""
+        total = self._ids.nbytes + self.feature_bitsets.nbytes
+        total += sum(column.nbytes for column in self._columns.values())
+        for bitmaps in self._bitmaps.values():
+            total += sum(bitmap.nbytes for bitmap in bitmaps.values())
+        return total
+
+    def stats(self) -> dict:
+        return {
+            "cars": len(self._rows),
+            "features": len(self.feature_bits),
+            "memory_bytes": self.memory_bytes(),
+            "rebuild_seconds": self.rebuild_seconds,
+            "stale": self._stale,
+        }
+
+    def column(self, name: str) -> np.ndarray:
+        """Numeric column (year, price, horsepower, engine_size); missing values are NaN"""
+        return self._columns[name]
+
+    def cars(self, positions: Iterable[int]) -> List[CarInDB]:
+        return [CarInDB.from_orm(self._rows[position]) for position in positions]
+
+    def category_mask(self, column: str, value: str, ignore_case: bool = False) -> np.ndarray:
+        bitmaps = self._bitmaps.get(column, {})
+        if not ignore_case:
+            bitmap = bitmaps.get(value)
+            return bitmap if bitmap is not None else np.zeros(len(self._rows), dtype=bool)
+
+        # Same semantics as the lower(make) = :make predicate in CarRepository
+        mask = np.zeros(len(self._rows), dtype=bool)
+        needle = value.lower()
+        for key, bitmap in bitmaps.items():
+            if key.lower() == needle:
+                mask |= bitmap
+        return mask
+
+    def filter(self, skip: int = 0, limit: int = 100, **filters) -> List[CarInDB]:
+        """Answer a filter combination with vectorized masks, mirroring CarService.get_cars_by_filters"""
+        return self.cars(np.flatnonzero(self.mask(**filters))[skip:skip + limit])
+
+    def count(self, **filters) -> int:
+        """Number of cars matching a filter combination"""
+        return int(np.count_nonzero(self.mask(**filters)))
+
+    def mask(self,
+             make: Optional[str] = None,
+             min_year: Optional[int] = None,
+             max_year: Optional[int] = None,
+             body_type: Optional[str] = None,
+             fuel_type: Optional[str] = None,
+             min_price: Optional[float] = None,
+             max_price: Optional[float] = None,
+             transmission: Optional[str] = None,
+             min_horsepower: Optional[int] = None,
+             max_horsepower: Optional[int] = None,
+             min_engine_size: Optional[float] = None,
+             max_engine_size: Optional[float] = None,
+             features: Optional[List[str]] = None) -> np.ndarray:
+        """Boolean mask over the indexed cars for the given filters"""
+        mask = np.ones(len(self._rows), dtype=bool)
+
+        if make:
+            mask &= self.category_mask('make', make, ignore_case=True)
+        if body_type:
+            mask &= self.category_mask('body_type', body_type)
+        if fuel_type:
+            mask &= self.category_mask('fuel_type', fuel_type)
+        if transmission:
+            mask &= self.category_mask('transmission', transmission)
+        if min_year:
+            mask &= self._columns['year'] >= min_year
+        if max_year:
+            mask &= self._columns['year'] <= max_year
+        if min_price:
+            mask &= self._columns['price'] >= min_price
+        if max_price:
+            mask &= self._columns['price'] <= max_price
+        if min_horsepower:
+            mask &= self._columns['horsepower'] >= min_horsepower
+        if max_horsepower:
+            mask &= self._columns['horsepower'] <= max_horsepower
+        if min_engine_size:
+            mask &= self._columns['engine_size'] >= min_engine_size
+        if max_engine_size:
+            mask &= self._columns['engine_size'] <= max_engine_size
+        if features:
+            mask &= self.feature_mask(features)
+        return mask
+
+
+# Global instance of the catalog index
+catalog_index = CarCatalogIndex()
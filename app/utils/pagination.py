@@ -0,0 +1,43 @@
+import base64
+import json
+import math
+from datetime import datetime
+from typing import Any, List
+
+
+def encode_cursor(*values: Any) -> str:
+    """Pack the sort key of the last row of a page into an opaque URL-safe cursor"""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _cursor_value(value: Any, kind: type) -> Any:
+    """value checked (and for datetime, parsed) as kind; raises ValueError if it is not one"""
+    if kind is datetime:
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    elif kind is float:
+        # JSON writes a whole float rank as an int; NaN and infinity never come from encode_cursor
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+            return float(value)
+    elif isinstance(value, kind) and not isinstance(value, bool):
+        return value
+    raise ValueError("Invalid cursor")
+
+
+def decode_cursor(cursor: str, *kinds: type) -> List[Any]:
+    """
+    Unpack a cursor produced by encode_cursor into one value of each of kinds (int, float, str
+    or datetime, the last from its ISO string); raises ValueError if it is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(kinds):
+        raise ValueError("Invalid cursor")
+    return [_cursor_value(value, kind) for value, kind in zip(values, kinds)]
@@ -0,0 +1,7 @@
+"""Benchmarks Package"""
+
+import os
+
+# Настройки по умолчанию, чтобы бенчмарки запускались без .env файла
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
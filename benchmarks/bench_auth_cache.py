@@ -0,0 +1,102 @@
+"""
+Load test: SQL queries per authenticated request with and without the user principal cache.
+
+Drives GET /api/v1/profile through the ASGI app (httpx ASGITransport, SQLite file database)
+with concurrent clients, each holding its own token, in three modes:
+    username token   - legacy token without the user id, looked up by username
+    uid, no cache    - primary-key lookup on every request
+    uid, cache       - user principal cache in front of the primary-key lookup
+
+Run from the repository root:
+    python -m benchmarks.bench_auth_cache --users 200 --requests 20
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+import httpx
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.instrumentation import install_statement_counter, track_statements
+from app.db.session import get_db
+from app.main import app
+from app.models.user import User
+from app.services.user import create_access_token, UserService
+from app.services.user_cache import user_cache
+from benchmarks.common import create_sqlite_database, percentile
+
+
+async def run_mode(label: str, client: httpx.AsyncClient, tokens: list, requests: int, cache: bool):
+    settings.USER_CACHE_ENABLED = cache
+    user_cache.cache.clear_local()
+    samples = []
+
+    async def user_client(token: str):
+        headers = {"Authorization": f"Bearer {token}"}
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.get("/api/v1/profile", headers=headers)
+            samples.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+
+    with track_statements() as counter:
+        started = time.perf_counter()
+        await asyncio.gather(*(user_client(token) for token in tokens))
+        elapsed = time.perf_counter() - started
+
+    total = len(tokens) * requests
+    print(
+        f"{label:>15} | {total} requests | {total / elapsed:7.0f} req/s | "
+        f"p50 {percentile(samples, 50) * 1000:6.2f} ms p99 {percentile(samples, 99) * 1000:6.2f} ms | "
+        f"SQL statements/request {counter.count / total:.2f}"
+    )
+
+
+async def main_async(users: int, requests: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        session_factory = await create_sqlite_database([], path=os.path.join(tmp, "bench.db"))
+        engine = session_factory.kw["bind"]
+        install_statement_counter(engine)
+        async with session_factory() as db:
+            await db.execute(insert(User), [
+                {"id": i + 1, "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x"}
+                for i in range(users)
+            ])
+            await db.commit()
+
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        service = UserService()
+        rows = [(i + 1, f"user{i}") for i in range(users)]
+        legacy_tokens = [create_access_token({"sub": username}) for _, username in rows]
+        uid_tokens = [service.create_user_token(SimpleNamespace(id=uid, username=username)) for uid, username in rows]
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await run_mode("username token", client, legacy_tokens, requests, cache=False)
+            await run_mode("uid, no cache", client, uid_tokens, requests, cache=False)
+            await run_mode("uid, cache", client, uid_tokens, requests, cache=True)
+            print(f"cache stats: {user_cache.stats}")
+
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.users, args.requests))
+
+
+if __name__ == "__main__":
+    main()
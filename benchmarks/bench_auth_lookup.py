@@ -0,0 +1,116 @@
+"""
+Benchmark: /auth/login and /auth/register with a large user base.
+
+Compares the old linear scan over the in-memory users list with the UserRepository-backed
+endpoints (SQLite file database, login index cold and warm). bcrypt is lowered to 4 rounds
+so the lookup path, not hashing, is what gets measured.
+
+Run from the repository root:
+    python -m benchmarks.bench_auth_lookup --users 1000000 --samples 500
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import insert
+
+from app.db.session import get_db
+from app.main import app
+from app.models.user import User
+from app.services.password import pwd_context
+from app.services.user_index import user_index
+from benchmarks.common import create_sqlite_database, percentile
+
+
+PASSWORD = "secret-password"
+
+
+def report(label: str, samples: list) -> None:
+    print(
+        f"{label:>24} | {len(samples):5} calls | p50 {percentile(samples, 50) * 1000:8.3f} ms "
+        f"p99 {percentile(samples, 99) * 1000:8.3f} ms"
+    )
+
+
+def legacy_scan(users_db: list, search_value: str):
+    # The previous /auth/login lookup
+    for u in users_db:
+        if u["email"] == search_value or u["id"] == search_value:
+            return u
+    return None
+
+
+async def timed_requests(client: httpx.AsyncClient, path: str, payloads: list, expected: int) -> list:
+    samples = []
+    for payload in payloads:
+        started = time.perf_counter()
+        response = await client.post(path, json=payload)
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == expected, response.text
+    return samples
+
+
+async def main_async(users: int, samples: int):
+    pwd_context.update(bcrypt__rounds=4)
+    hashed = pwd_context.hash(PASSWORD)
+    rng = random.Random(1)
+    picked = [rng.randrange(users) for _ in range(samples)]
+
+    users_db = [{"id": str(i), "email": f"user{i}@example.com", "password": PASSWORD} for i in range(users)]
+    scan_samples = []
+    for i in picked[:min(samples, 100)]:
+        started = time.perf_counter()
+        legacy_scan(users_db, f"user{i}@example.com")
+        scan_samples.append(time.perf_counter() - started)
+    del users_db
+    report("legacy list scan", scan_samples)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        session_factory = await create_sqlite_database([], path=os.path.join(tmp, "bench.db"))
+        engine = session_factory.kw["bind"]
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            for start in range(0, users, 50_000):
+                await conn.execute(insert(User), [
+                    {"username": f"user{i}@example.com", "email": f"user{i}@example.com", "hashed_password": hashed}
+                    for i in range(start, min(users, start + 50_000))
+                ])
+        print(f"inserted {users} users in {time.perf_counter() - started:.1f} s")
+
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        logins = [{"email": f"user{i}@example.com", "password": PASSWORD} for i in picked]
+        registrations = [{"email": f"new{i}@example.com", "password": PASSWORD} for i in range(samples)]
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            user_index.cache.clear_local()
+            report("login, index cold", await timed_requests(client, "/api/v1/login", logins, 200))
+            report("login, index warm", await timed_requests(client, "/api/v1/login", logins, 200))
+            report("register", await timed_requests(client, "/api/v1/register", registrations, 200))
+            report("register duplicate", await timed_requests(client, "/api/v1/register", registrations, 400))
+            response = await client.get("/api/v1/debug")
+            print(f"/auth/debug: {response.json()}")
+
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.users, args.samples))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: offline bulk recommendation scoring through the Celery tasks of app/tasks.py.
+
+Celery runs eagerly (task_always_eager) with the in-memory cache result backend standing in
+for Redis, so the chord, the stored chunk results and the progress reads go through the same
+code paths as on real workers, in one process. The queries are the ones of benchmarks/data
+with a varying budget appended.
+
+"per query" is the baseline of pushing each request through the chat path on its own: one
+SQL lookup (catalog index and cache off) and one INSERT + commit per query. The bulk job is
+run at several chunk sizes; progress is read from the result backend after every chunk.
+
+Run from the repository root:
+    python -m benchmarks.bench_bulk_recommendations --cars 200000 --queries 100000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from celery.signals import task_postrun
+from sqlalchemy import delete, insert
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.database import get_session_factory
+from app.models.user import BulkRecommendation
+from app.repositories.bulk_recommendation import BulkRecommendationRepository
+from app.services.recommendation_cache import recommendation_cache
+from app.tasks import bulk_recommendations_progress, run_async, start_bulk_recommendations
+from app.utils.car_recommender import recommendation_engine
+from benchmarks.bench_recommendation_batch import batch_queries
+from benchmarks.common import create_sqlite_database, generate_cars
+
+
+async def per_query(queries: list) -> float:
+    """Baseline: one lookup and one committed INSERT per query"""
+    settings.CATALOG_INDEX_ENABLED = False
+    settings.RECOMMENDATION_CACHE_ENABLED = False
+    started = time.perf_counter()
+    async with get_session_factory()() as db:
+        for position, query in enumerate(queries):
+            params = recommendation_engine.extract_parameters(query)
+            cars = await recommendation_engine.find_matching_cars(db, params)
+            await db.execute(insert(BulkRecommendation), [{
+                "job_id": "per-query", "query_index": position, "query": query,
+                "params": json.dumps(params, ensure_ascii=False), "car_ids": json.dumps([car.id for car in cars]),
+            }])
+            await db.commit()
+    settings.CATALOG_INDEX_ENABLED = True
+    settings.RECOMMENDATION_CACHE_ENABLED = True
+    return time.perf_counter() - started
+
+
+async def stored_rows(job_id: str) -> int:
+    async with get_session_factory()() as db:
+        return await BulkRecommendationRepository().count_job_results(db, job_id)
+
+
+async def reset():
+    async with get_session_factory()() as db:
+        await db.execute(delete(BulkRecommendation))
+        await db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=100_000)
+    parser.add_argument("--per-query", type=int, default=1000)
+    parser.add_argument("--chunk-sizes", default="500,2000,10000")
+    args = parser.parse_args()
+
+    celery_app.conf.update(
+        task_always_eager=True,
+        task_store_eager_result=True,
+        result_backend="cache+memory://",
+    )
+    settings.REDIS_CACHE_ENABLED = False
+    queries = batch_queries(args.queries)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        # The tasks use the application's engine; build the database on the worker's loop
+        run_async(create_sqlite_database(generate_cars(args.cars), path=path))
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+
+        seconds = run_async(per_query(queries[:args.per_query]))
+        print(f"{'per query':>16} | {args.per_query:>7} queries | {seconds:7.2f} s | {args.per_query / seconds:8.0f} queries/s")
+        run_async(reset())
+
+        progress_log = []
+
+        @task_postrun.connect
+        def log_progress(sender=None, **kwargs):
+            if sender.name.endswith("score_recommendations_chunk_task"):
+                progress_log.append(bulk_recommendations_progress(kwargs["args"][0]))
+
+        for chunk_size in (int(size) for size in args.chunk_sizes.split(",")):
+            progress_log.clear()
+            # Every run starts without cached recommendations; the catalog index stays loaded
+            recommendation_cache.cache.clear_local()
+            started = time.perf_counter()
+            job_id = start_bulk_recommendations(queries, chunk_size=chunk_size)
+            seconds = time.perf_counter() - started
+
+            summary = bulk_recommendations_progress(job_id)
+            assert summary["state"] == "SUCCESS" and summary["queries_done"] == len(queries), summary
+            assert run_async(stored_rows(job_id)) == len(queries)
+            middle = progress_log[len(progress_log) // 2]
+            print(
+                f"{'chunks of ' + str(chunk_size):>16} | {len(queries):>7} queries | {seconds:7.2f} s | "
+                f"{len(queries) / seconds:8.0f} queries/s | {summary['chunks']} chunks | progress midway: "
+                f"{middle['chunks_done']}/{middle['chunks']} chunks, {middle['queries_done']} queries"
+            )
+            run_async(reset())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark and regression check: GET /api/v1/{car_id} with the per-car cache off, on (hits) and
+as conditional requests answered 304, plus a revalidated 1,000-car list page.
+
+Requests go through the ASGI app with httpx on the application's own engine (a SQLite file);
+Redis is not required, the in-process tier answers alone. The script exits with status 1 when
+a cache hit or a 304 executes SQL beyond the catalog fingerprint (one query per worker every
+CATALOG_VERSION_REFRESH_SECONDS), when a car update does not change the ETag, when a restarted
+worker (catalog version back at 0) revalidates an ETag of data changed by another worker, or
+when If-None-Match: * answers 304 for a missing car, or when creating a duplicate (make, model,
+year) or updating a car onto another car's does not answer 409.
+
+Run from the repository root:
+    python -m benchmarks.bench_car_cache --cars 50000 --requests 2000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import httpx
+from sqlalchemy import insert, text
+
+from app.core.cache import catalog_version
+from app.core.config import settings
+from app.database import get_session_factory
+from app.db.instrumentation import track_statements
+from app.main import app
+from app.models.user import User
+from app.services.car_cache import car_cache, catalog_validator
+from app.services.user import UserService
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+async def measure(client: httpx.AsyncClient, paths: list, headers: dict = None):
+    """(seconds per request, SQL statements per request, status codes)"""
+    samples, statements, statuses = [], [], set()
+    for path in paths:
+        with track_statements() as counter:
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            samples.append(time.perf_counter() - started)
+        statements.append(counter.count)
+        statuses.add(response.status_code)
+    return samples, sum(statements) / len(statements), statuses
+
+
+async def run(cars: int, requests: int) -> bool:
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        session_factory = await create_sqlite_database(generate_cars(cars), path=path)
+        async with session_factory() as db:
+            await db.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+            await db.commit()
+        await session_factory.kw["bind"].dispose()
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+
+        token = UserService().create_user_token(SimpleNamespace(id=1, username="bench"))
+        rng = random.Random(42)
+        # A working set of 1,000 cars, as a frontend browsing the catalog would request
+        hot = [rng.randint(1, cars) for _ in range(1000)]
+        paths = [f"/api/v1/{rng.choice(hot)}" for _ in range(requests)]
+
+        results = {}
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                     headers={"Authorization": f"Bearer {token}", "Accept-Encoding": "identity"}) as client:
+            settings.CAR_CACHE_ENABLED = False
+            await measure(client, paths[:100])
+            results["car, no cache"] = await measure(client, paths)
+            settings.CAR_CACHE_ENABLED = True
+            await measure(client, [f"/api/v1/{car_id}" for car_id in set(hot)])
+            results["car, cache hit"] = await measure(client, paths)
+
+            response = await client.get(paths[0])
+            etag = response.headers["etag"]
+            results["car, 304"] = await measure(client, paths, {"If-None-Match": etag})
+            list_paths = ["/api/v1/?limit=1000"] * max(1, requests // 20)
+            results["list page, 200"] = await measure(client, list_paths)
+            results["list page, 304"] = await measure(client, list_paths, {"If-None-Match": etag})
+
+            await client.put(paths[0], json={"price": 1.0})
+            updated = await client.get(paths[0], headers={"If-None-Match": etag})
+            if updated.status_code != 200 or updated.headers["etag"] == etag or updated.json()["price"] != 1.0:
+                print(f"FAIL: after an update the car came back {updated.status_code} with ETag {updated.headers['etag']}")
+                ok = False
+
+            # Another worker changes a car, then this one restarts without Redis: its catalog
+            # version is back at 0, the data is not
+            etag = updated.headers["etag"]
+            async with get_session_factory()() as db:
+                await db.execute(text("UPDATE cars SET price = 2.0, updated_at = :now WHERE id = :id"),
+                                 {"now": datetime.utcnow(), "id": int(paths[0].rsplit("/", 1)[1])})
+                await db.commit()
+            catalog_version.__init__()
+            catalog_validator.__init__()
+            restarted = await client.get(paths[0], headers={"If-None-Match": etag})
+            if restarted.status_code != 200 or restarted.json()["price"] != 2.0:
+                print(f"FAIL: a restarted worker answered {restarted.status_code} to an ETag of changed data")
+                ok = False
+
+            missing = await client.get(f"/api/v1/{cars + 1}", headers={"If-None-Match": "*"})
+            if missing.status_code != 404:
+                print(f"FAIL: If-None-Match: * for a missing car answered {missing.status_code}")
+                ok = False
+
+            # (make, model, year) is unique: a duplicate create or a colliding update is a 409
+            car = {"make": "Bench", "model": "Duplicate", "year": 2020, "body_type": "sedan",
+                   "fuel_type": "gasoline", "transmission": "automatic"}
+            statuses = [(await client.post("/api/v1/", json=car)).status_code for _ in range(2)]
+            other = (await client.get(paths[1])).json()
+            collision = await client.put(paths[0], json={key: other[key] for key in ("make", "model", "year")})
+            after = await client.get(paths[0])
+            if statuses != [201, 409] or collision.status_code != 409 or after.status_code != 200:
+                print(f"FAIL: duplicate create answered {statuses}, colliding update {collision.status_code}, "
+                      f"then the car {after.status_code}")
+                ok = False
+
+        from app.database import get_engine
+        await get_engine().dispose()
+
+    for label, (samples, statements, statuses) in results.items():
+        print(
+            f"{label:>15} | {len(samples)} requests | p50 {percentile(samples, 50) * 1000:7.3f} ms "
+            f"p99 {percentile(samples, 99) * 1000:7.3f} ms | {statements:4.2f} SQL/req | status {sorted(statuses)}"
+        )
+    print(f"car cache: {car_cache.stats}")
+
+    for label in ("car, cache hit", "car, 304", "list page, 304"):
+        samples, statements, _ = results[label]
+        # The catalog fingerprint is read once per refresh interval
+        allowed = (sum(samples) / settings.CATALOG_VERSION_REFRESH_SECONDS + 1) / len(samples)
+        if statements > allowed:
+            print(f"FAIL: {label} executed {statements} SQL statements per request")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cars", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    if not asyncio.run(run(args.cars, args.requests)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
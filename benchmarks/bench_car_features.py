@@ -0,0 +1,116 @@
+"""
+Benchmark: must-have feature filters.
+
+Compares the previous approach (ILIKE over the comma-separated cars.features text) with the
+semi-join over car_feature_associations that CarRepository now builds, and with the feature
+bitsets of the in-memory CarCatalogIndex. Each query is run for the first 5 matches (what the
+recommender asks for) and for all matches. The semi-join and the index must return the same cars.
+
+Run from the repository root:
+    python -m benchmarks.bench_car_features --size 200000
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import and_, func, select
+
+from app.models.user import Car
+from app.repositories.car import CarRepository
+from app.schemas.user import CarFilter
+from app.utils.catalog_index import CarCatalogIndex
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+QUERIES = [
+    {"features": ["полный привод"]},
+    {"features": ["подогрев сидений", "полный привод"]},
+    {"features": ["панорамная крыша", "кожаный салон", "bluetooth"]},
+    {"features": ["полный привод"], "body_type": "suv", "max_price": 3_000_000},
+    {"features": ["подогрев сидений", "камера заднего вида"], "fuel_type": "hybrid", "min_year": 2018},
+]
+
+
+def text_scan(filters: dict):
+    """Previous approach: one ILIKE per feature over the features text"""
+    features = filters.get("features", [])
+    conditions = CarRepository.build_filter_conditions(CarFilter(**{**filters, "features": None}))
+    conditions += [Car.features.ilike(f"%{name}%") for name in features]
+    return select(Car.id).where(and_(*conditions))
+
+
+def semi_join(filters: dict):
+    return select(Car.id).where(and_(*CarRepository.build_filter_conditions(CarFilter(**filters))))
+
+
+async def timed(db, stmt, limit, rounds: int) -> tuple:
+    samples, ids = [], []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        if limit:
+            ids = (await db.execute(stmt.order_by(Car.id).limit(limit))).scalars().all()
+        else:
+            ids = (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar_one()
+        samples.append(time.perf_counter() - started)
+    return samples, ids
+
+
+async def run(size: int, rounds: int):
+    cars = generate_cars(size)
+    session_factory = await create_sqlite_database(cars)
+    repository = CarRepository()
+
+    started = time.perf_counter()
+    async with session_factory() as db:
+        for start in range(0, size, 5000):
+            await repository.sync_features(db, {car["id"]: car["features"] for car in cars[start:start + 5000]})
+        await db.commit()
+    print(f"{size} cars | feature associations backfilled in {time.perf_counter() - started:.1f} s")
+
+    index = CarCatalogIndex()
+    index.build(SimpleNamespace(**car) for car in cars)
+    stats = index.stats()
+    print(
+        f"index: {stats['features']} features, bitsets {index.feature_bitsets.nbytes / 2**20:.1f} MiB, "
+        f"build {stats['rebuild_seconds'] * 1000:.0f} ms"
+    )
+
+    async with session_factory() as db:
+        for limit, label in ((5, "first 5"), (None, "all matches")):
+            results = {"text scan": [], "semi-join": [], "index bitset": []}
+            for filters in QUERIES:
+                samples, _ = await timed(db, text_scan(filters), limit, rounds)
+                results["text scan"] += samples
+                samples, sql_ids = await timed(db, semi_join(filters), limit, rounds)
+                results["semi-join"] += samples
+
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    if limit:
+                        index_ids = [car.id for car in index.filter(**filters, limit=limit)]
+                    else:
+                        index_ids = index.count(**filters)
+                    results["index bitset"].append(time.perf_counter() - started)
+                assert sql_ids == index_ids, (filters, sql_ids, index_ids)
+
+            for name, samples in results.items():
+                print(
+                    f"{label:>11} | {name:>12} | p50 {percentile(samples, 50) * 1000:8.2f} ms "
+                    f"p99 {percentile(samples, 99) * 1000:8.2f} ms"
+                )
+
+    await session_factory.kw["bind"].dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.size, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: recommender DB path before and after pushing transmission/horsepower into SQL.
+
+"before" replays the previous behaviour (seven predicates in SQL, limit*2 over-fetch,
+transmission and horsepower filtered in Python) without the composite indexes;
+"after" runs CarService.get_cars_by_filters with the full CarFilter and the indexes.
+
+Run from the repository root:
+    python -m benchmarks.bench_car_filters --size 100000
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import and_, select, text
+
+from app.models.user import Car
+from app.services.car import CarService
+from benchmarks.bench_catalog_index import query_filters
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+LIMIT = 5
+
+
+async def legacy_lookup(db, filters: dict):
+    """Previous CarService + find_matching_cars behaviour; returns (rows fetched, cars)"""
+    conditions = []
+    if filters.get('make'):
+        conditions.append(Car.make.ilike(f"%{filters['make']}%"))
+    for key, column, op in (
+        ('min_year', Car.year, '__ge__'), ('max_year', Car.year, '__le__'),
+        ('min_price', Car.price, '__ge__'), ('max_price', Car.price, '__le__'),
+    ):
+        if filters.get(key):
+            conditions.append(getattr(column, op)(filters[key]))
+    for key in ('body_type', 'fuel_type'):
+        if filters.get(key):
+            conditions.append(getattr(Car, key) == filters[key])
+
+    stmt = select(Car)
+    if conditions:
+        stmt = stmt.where(and_(*conditions))
+    rows = (await db.execute(stmt.limit(LIMIT * 2))).scalars().all()
+
+    cars = [
+        car for car in rows
+        if not (filters.get('transmission') and car.transmission != filters['transmission'])
+        and not (filters.get('min_horsepower') and (not car.horsepower or car.horsepower < filters['min_horsepower']))
+    ]
+    return len(rows), cars[:LIMIT]
+
+
+async def run(size: int, rounds: int):
+    filters = query_filters()
+    session_factory = await create_sqlite_database(generate_cars(size))
+    service = CarService()
+
+    async with session_factory() as db:
+        after_samples, after_rows, after_results = [], 0, 0
+        for _ in range(rounds):
+            for f in filters:
+                started = time.perf_counter()
+                cars = await service.get_cars_by_filters(db, **f, limit=LIMIT)
+                after_samples.append(time.perf_counter() - started)
+                after_rows += len(cars)
+                after_results += len(cars)
+
+        for name in ('ix_cars_lower_make_year', 'ix_cars_body_type_price',
+                     'ix_cars_fuel_type_transmission_price', 'ix_cars_year_price', 'ix_cars_horsepower'):
+            await db.execute(text(f"DROP INDEX {name}"))
+
+        before_samples, before_rows, before_results = [], 0, 0
+        for _ in range(rounds):
+            for f in filters:
+                started = time.perf_counter()
+                fetched, cars = await legacy_lookup(db, f)
+                before_samples.append(time.perf_counter() - started)
+                before_rows += fetched
+                before_results += len(cars)
+
+    lookups = rounds * len(filters)
+    for label, samples, rows, results in (
+        ("before", before_samples, before_rows, before_results),
+        ("after", after_samples, after_rows, after_results),
+    ):
+        print(
+            f"{label:>6} | {size} cars | rows fetched/lookup {rows / lookups:5.2f} | "
+            f"cars returned/lookup {results / lookups:5.2f} | "
+            f"p50 {percentile(samples, 50) * 1000:7.3f} ms p99 {percentile(samples, 99) * 1000:7.3f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.size, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark and regression check: GET /api/v1/ (the car list) with 1,000-car pages, the row
+fast path vs the previous model path.
+
+The previous path is mounted next to it on the same app (same middleware, same engine): ORM
+objects, CarInDB.from_orm in the service, CarPublic.from_orm in the router, then FastAPI's
+response_model validation and jsonable_encoder. The fast path selects the CarPublic columns as
+rows and writes them to JSON once with orjson. Both walk --pages consecutive pages by cursor.
+Printed: p50 per page for each, and the size and p50 of gzip-compressed pages.
+
+The script exits with status 1 when the two paths return different cars, or when the fast
+path is less than --min-speedup times faster.
+
+Run from the repository root:
+    python -m benchmarks.bench_car_list --cars 50000 --rounds 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import httpx
+from fastapi import Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_db
+from app.main import app
+from app.schemas.user import CarPublic
+from app.services.car import CarService
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+PAGE_SIZE = 1000
+LEGACY_PATH = "/bench/legacy-cars"
+
+
+async def legacy_get_cars(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                          db: AsyncSession = Depends(get_db)):
+    """GET /api/v1/ before the row fast path"""
+    cars, next_cursor = await CarService().get_all_cars(db, skip=skip, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [CarPublic.from_orm(car) for car in cars]
+
+
+async def walk(client: httpx.AsyncClient, path: str, pages: int, encoding: str = "identity"):
+    """Fetch pages consecutive pages; returns (seconds per page, parsed cars, body sizes)"""
+    samples, cars, sizes = [], [], []
+    cursor = None
+    for _ in range(pages):
+        params = {"limit": PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+        started = time.perf_counter()
+        response = await client.get(path, params=params, headers={"Accept-Encoding": encoding})
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text[:200]
+        cars.extend(response.json())
+        sizes.append(int(response.headers.get("content-length", len(response.content))))
+        cursor = response.headers.get("x-next-cursor")
+    return samples, cars, sizes
+
+
+async def run(cars: int, pages: int, rounds: int, min_speedup: float) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        session_factory = await create_sqlite_database(generate_cars(cars), path=path)
+        await session_factory.kw["bind"].dispose()
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+        app.add_api_route(LEGACY_PATH, legacy_get_cars, response_model=list[CarPublic])
+
+        timings = {"model path": [], "row fast path": [], "fast path, gzip": []}
+        sizes = {}
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            # Warm-up: engine, statement caches
+            _, legacy_cars, sizes["plain"] = await walk(client, LEGACY_PATH, pages)
+            _, fast_cars, _ = await walk(client, "/api/v1/", pages)
+            _, gzip_cars, sizes["gzip"] = await walk(client, "/api/v1/", pages, "gzip")
+            for _ in range(rounds):
+                timings["model path"].extend((await walk(client, LEGACY_PATH, pages))[0])
+                timings["row fast path"].extend((await walk(client, "/api/v1/", pages))[0])
+                timings["fast path, gzip"].extend((await walk(client, "/api/v1/", pages, "gzip"))[0])
+
+        from app.database import get_engine
+        await get_engine().dispose()
+
+    for label, samples in timings.items():
+        print(f"{label:>16} | {len(samples)} pages of {PAGE_SIZE} | p50 {percentile(samples, 50) * 1000:7.2f} ms "
+              f"p99 {percentile(samples, 99) * 1000:7.2f} ms")
+    print(f"page size: {sum(sizes['plain']) / len(sizes['plain']) / 1024:.1f} KiB, "
+          f"gzip {sum(sizes['gzip']) / len(sizes['gzip']) / 1024:.1f} KiB")
+
+    if fast_cars != legacy_cars or gzip_cars != legacy_cars:
+        print(f"FAIL: the fast path returned different cars ({len(fast_cars)} vs {len(legacy_cars)})")
+        return False
+    speedup = percentile(timings["model path"], 50) / percentile(timings["row fast path"], 50)
+    print(f"fast path: {speedup:.1f}x faster per page, {len(fast_cars)} cars identical")
+    if speedup < min_speedup:
+        print(f"FAIL: speedup {speedup:.1f}x is below {min_speedup}x")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cars", type=int, default=50_000)
+    parser.add_argument("--pages", type=int, default=10, help="consecutive 1,000-car pages per walk")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--min-speedup", type=float, default=2.0)
+    args = parser.parse_args()
+    if not asyncio.run(run(args.cars, args.pages, args.rounds, args.min_speedup)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: ranked full-text search (SQLite FTS5) vs the previous four-way ILIKE scan.
+
+Also checks that search_cars on a database made with Base.metadata.create_all alone (no FTS5
+table, as outside Alembic) falls back to the ILIKE scan instead of failing; the script exits
+with status 1 otherwise.
+
+Run from the repository root:
+    python -m benchmarks.bench_car_search --sizes 100000,1000000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy import text
+
+from app.db.fulltext import create_statements
+from app.repositories.car import CarRepository
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+SEARCH_QUERIES = [
+    "Toyota", "Camry", "подогрев сидений", "полный привод", "BMW X5", "панорамная крыша",
+    # Selective queries: ILIKE must scan the whole table to find few or no rows
+    "Koenigsegg CC850 механика", "Lada Granta", "Marussia B2 электро",
+]
+LIMIT = 20
+
+
+async def check_without_fulltext() -> bool:
+    """search_cars on tables created without the FTS5 objects gives the ILIKE results"""
+    session_factory = await create_sqlite_database(generate_cars(200))
+    repository = CarRepository()
+    async with session_factory() as db:
+        try:
+            cars, _ = await repository.search_cars(db, "Toyota", limit=LIMIT)
+        except Exception as e:
+            print(f"FAIL: search without the FTS5 table raised {e!r}")
+            return False
+        expected, _ = await repository._search_ilike(db, "Toyota", 0, LIMIT, None, None)
+    await session_factory.kw["bind"].dispose()
+    if not cars or [car.id for car in cars] != [car.id for car in expected]:
+        print(f"FAIL: search without the FTS5 table returned {len(cars)} cars, ILIKE {len(expected)}")
+        return False
+    return True
+
+
+async def run(size: int, rounds: int):
+    session_factory = await create_sqlite_database(generate_cars(size))
+    async with session_factory() as db:
+        started = time.perf_counter()
+        for statement in create_statements("sqlite"):
+            await db.execute(text(statement))
+        await db.commit()
+        print(f"{size:>9} cars | FTS5 index built in {time.perf_counter() - started:.2f} s")
+
+        repository = CarRepository()
+        for label, search in (("ilike", repository._search_ilike), ("fts5", repository._search_sqlite)):
+            first_page, next_page = [], []
+            for _ in range(rounds):
+                for query in SEARCH_QUERIES:
+                    started = time.perf_counter()
+                    cars, cursor = await search(db, query, 0, LIMIT, None, None)
+                    first_page.append(time.perf_counter() - started)
+                    if cursor:
+                        started = time.perf_counter()
+                        await search(db, query, 0, LIMIT, cursor, None)
+                        next_page.append(time.perf_counter() - started)
+            print(
+                f"{'':>9}   {label:>5} | page 1 p50 {percentile(first_page, 50) * 1000:8.2f} ms "
+                f"p99 {percentile(first_page, 99) * 1000:8.2f} ms | "
+                f"page 2 p50 {percentile(next_page, 50) * 1000:8.2f} ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    if not asyncio.run(check_without_fulltext()):
+        sys.exit(1)
+    for size in (int(s) for s in args.sizes.split(",")):
+        asyncio.run(run(size, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: bulk catalog import throughput.
+
+Writes a synthetic dealer feed as CSV and JSONL, imports it into an empty database with
+CatalogImporter, then re-imports it (every row hits ON CONFLICT ... DO UPDATE). For
+comparison, the previous populate_cars.py pattern (one SELECT per car, then one add) runs
+on the first --legacy-rows rows.
+
+Before timing, a small JSONL feed with malformed rows (a line that is not JSON, a line that
+is not an object, an infinite year) is imported into a scratch database: they must be counted
+as invalid while the valid rows around them are written and the catalog version moves. The
+script exits with status 1 otherwise.
+
+Uses a temporary SQLite file by default; pass --url for PostgreSQL (asyncpg takes the
+COPY path; the cars table must exist and is not cleared).
+
+Run from the repository root:
+    python -m benchmarks.bench_catalog_import --rows 1000000
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import io
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.cache import catalog_version
+from app.models.user import Car
+from app.repositories.car import UPSERT_COLUMNS
+from app.services.catalog_import import CatalogImporter
+from benchmarks.common import create_sqlite_database, generate_cars
+
+
+def write_feeds(rows: int, directory: str) -> dict:
+    cars = [{name: car[name] for name in UPSERT_COLUMNS} for car in generate_cars(rows)]
+    paths = {"csv": os.path.join(directory, "feed.csv"), "jsonl": os.path.join(directory, "feed.jsonl")}
+    with open(paths["csv"], "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=UPSERT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(cars)
+    with open(paths["jsonl"], "w", encoding="utf-8") as f:
+        for car in cars:
+            f.write(json.dumps(car, ensure_ascii=False) + "\n")
+    return paths
+
+
+async def legacy_import(session_factory, records: list) -> float:
+    started = time.perf_counter()
+    async with session_factory() as session:
+        for car_data in records:
+            existing_car = (await session.execute(
+                select(Car).where(
+                    Car.make == car_data["make"],
+                    Car.model == car_data["model"],
+                    Car.year == car_data["year"]
+                )
+            )).scalar_one_or_none()
+            if not existing_car:
+                session.add(Car(**car_data))
+        await session.commit()
+    return time.perf_counter() - started
+
+
+async def check_invalid_rows(directory: str) -> bool:
+    """Import a feed with malformed lines; True when they are counted and the rest goes in"""
+    valid = [{name: car[name] for name in UPSERT_COLUMNS} for car in generate_cars(2)]
+    lines = [
+        json.dumps(valid[0]),
+        '{"make": "Broken", "model": ',
+        '["not", "an", "object"]',
+        json.dumps({**valid[0], "model": "Infinite", "year": float("inf")}),
+        json.dumps(valid[1]),
+    ]
+    session_factory = await create_sqlite_database([], path=os.path.join(directory, "invalid.db"))
+    version = await catalog_version.get()
+    result = await CatalogImporter(session_factory, chunk_size=1).import_stream(io.StringIO("\n".join(lines)), "jsonl")
+    await session_factory.kw["bind"].dispose()
+    if (result.rows_read, result.rows_written, result.rows_invalid) != (5, 2, 3):
+        print(f"FAIL: malformed feed gave {result.rows_read} read, {result.rows_written} written, "
+              f"{result.rows_invalid} invalid; expected 5, 2, 3")
+        return False
+    if await catalog_version.get() == version:
+        print("FAIL: the catalog version did not move after the import")
+        return False
+    return True
+
+
+async def main_async(rows: int, legacy_rows: int, chunk_size: int, url: str) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        if not await check_invalid_rows(tmp):
+            return False
+
+        started = time.perf_counter()
+        paths = write_feeds(rows, tmp)
+        print(f"wrote {rows} rows as CSV and JSONL in {time.perf_counter() - started:.1f} s")
+
+        if url is None:
+            session_factory = await create_sqlite_database([], path=os.path.join(tmp, "bench.db"))
+        else:
+            session_factory = async_sessionmaker(create_async_engine(url), class_=AsyncSession, expire_on_commit=False)
+
+        importer = CatalogImporter(session_factory, chunk_size=chunk_size)
+        for label, path in (("csv, empty table", paths["csv"]), ("jsonl, re-import", paths["jsonl"])):
+            result = await importer.import_file(path)
+            print(
+                f"{label:>18} | {result.rows_read} rows in {result.seconds:6.1f} s | "
+                f"{result.rows_per_second:10,.0f} rows/s | {result.chunks} chunks"
+            )
+
+        async with session_factory() as db:
+            stored = (await db.execute(select(func.count()).select_from(Car))).scalar_one()
+        print(f"cars stored: {stored}")
+
+        if url is None and legacy_rows:
+            legacy_factory = await create_sqlite_database([], path=os.path.join(tmp, "legacy.db"))
+            records = [{name: car[name] for name in UPSERT_COLUMNS} for car in generate_cars(legacy_rows)]
+            seconds = await legacy_import(legacy_factory, records)
+            print(f"{'legacy N+1':>18} | {legacy_rows} rows in {seconds:6.1f} s | {legacy_rows / seconds:10,.0f} rows/s")
+            await legacy_factory.kw["bind"].dispose()
+
+        await session_factory.kw["bind"].dispose()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--legacy-rows", type=int, default=20_000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--url", default=None)
+    args = parser.parse_args()
+    if not asyncio.run(main_async(args.rows, args.legacy_rows, args.chunk_size, args.url)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: in-memory CarCatalogIndex vs CarService.get_cars_by_filters (SQLite in memory).
+
+Run from the repository root:
+    python -m benchmarks.bench_catalog_index --sizes 1000,100000,1000000
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.services.car import CarService
+from app.utils.car_recommender import CarRecommendationEngine
+from app.utils.catalog_index import CarCatalogIndex
+from benchmarks.bench_extract_parameters import load_queries
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+def query_filters() -> list:
+    engine = CarRecommendationEngine()
+    return [engine.build_filters(engine.extract_parameters(q)) for q in load_queries()]
+
+
+async def run(size: int, filters: list, rounds: int, db_rounds: int):
+    cars = generate_cars(size)
+
+    index = CarCatalogIndex()
+    index.build(SimpleNamespace(**car) for car in cars)
+    stats = index.stats()
+
+    index_samples = []
+    for _ in range(rounds):
+        for f in filters:
+            started = time.perf_counter()
+            index.filter(**f, limit=5)
+            index_samples.append(time.perf_counter() - started)
+
+    session_factory = await create_sqlite_database(cars)
+    service = CarService()
+    db_samples = []
+    async with session_factory() as db:
+        for _ in range(db_rounds):
+            for f in filters:
+                started = time.perf_counter()
+                await service.get_cars_by_filters(db, **f, limit=5)
+                db_samples.append(time.perf_counter() - started)
+
+    print(
+        f"{size:>9} cars | index {stats['memory_bytes'] / 2**20:7.1f} MiB, "
+        f"build {stats['rebuild_seconds'] * 1000:8.1f} ms | "
+        f"index p50 {percentile(index_samples, 50) * 1000:7.3f} ms p99 {percentile(index_samples, 99) * 1000:7.3f} ms | "
+        f"db p50 {percentile(db_samples, 50) * 1000:7.3f} ms p99 {percentile(db_samples, 99) * 1000:7.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--db-rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    filters = query_filters()
+    for size in (int(s) for s in args.sizes.split(",")):
+        asyncio.run(run(size, filters, args.rounds, args.db_rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: time to first byte and total time of POST /api/v1/send vs the SSE stream
+POST /api/v1/send/stream.
+
+The app is driven directly through its ASGI interface so the arrival of every body chunk
+can be timed (httpx's ASGITransport buffers the whole response). The catalog index and the
+recommendation cache are disabled so each request runs the SQL lookup.
+
+Run from the repository root:
+    python -m benchmarks.bench_chat_stream --cars 200000 --requests 40
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.main import app
+from app.models.user import User
+from app.services.user import UserService
+from benchmarks.bench_extract_parameters import load_queries
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+async def call(path: str, body: dict, token: str, accept: str = "*/*", response_headers: dict = None,
+               method: str = "POST"):
+    """
+    Run one request through the ASGI app; returns (status, first chunk time, total time, body).
+    The response headers are copied into response_headers when given.
+    """
+    payload = json.dumps(body).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "server": ("bench", 80), "client": ("bench", 1234),
+        "headers": [
+            (b"host", b"bench"), (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            (b"authorization", f"Bearer {token}".encode()), (b"accept", accept.encode()),
+        ],
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    status, first_chunk, chunks = None, None, []
+    started = time.perf_counter()
+
+    async def send(message):
+        nonlocal status, first_chunk
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            if response_headers is not None:
+                response_headers.update((name.decode(), value.decode()) for name, value in message["headers"])
+        elif message["type"] == "http.response.body" and message.get("body"):
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - started
+            chunks.append(message["body"])
+
+    await app(scope, receive, send)
+    return status, first_chunk, time.perf_counter() - started, b"".join(chunks)
+
+
+async def main_async(cars: int, requests: int):
+    settings.CATALOG_INDEX_ENABLED = False
+    settings.RECOMMENDATION_CACHE_ENABLED = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        session_factory = await create_sqlite_database(generate_cars(cars), path=os.path.join(tmp, "bench.db"))
+        async with session_factory() as db:
+            await db.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+            await db.commit()
+
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        token = UserService().create_user_token(SimpleNamespace(id=1, username="bench"))
+        queries = load_queries()[:requests]
+
+        for path in ("/api/v1/send", "/api/v1/send/stream"):
+            ttfb, totals = [], []
+            for query in queries:
+                status, first_chunk, total, body = await call(path, {"message": query}, token)
+                assert status == 200, body
+                ttfb.append(first_chunk)
+                totals.append(total)
+            print(
+                f"{path:>20} | {len(queries)} requests | TTFB p50 {percentile(ttfb, 50) * 1000:7.2f} ms "
+                f"p99 {percentile(ttfb, 99) * 1000:7.2f} ms | total p50 {percentile(totals, 50) * 1000:7.2f} ms "
+                f"p99 {percentile(totals, 99) * 1000:7.2f} ms"
+            )
+
+        app.dependency_overrides.clear()
+        await session_factory.kw["bind"].dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.cars, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark and regression check: SQL statements and latency per /chat/send turn.
+
+"legacy" replays the previous flow (add_message commits + refreshes each message);
+"unit of work" is ChatService.process_chat_request. The script exits with status 1 when
+a turn executes more statements than --max-statements.
+
+Run from the repository root:
+    python -m benchmarks.bench_chat_turn --turns 200
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy import insert, func, select
+
+from app.db.instrumentation import install_statement_counter, track_statements
+from app.models.user import Recommendation, User
+from app.schemas.user import ChatRequest
+from app.services.user import ChatService
+from benchmarks.bench_extract_parameters import load_queries
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+async def legacy_turn(service: ChatService, db, user_id: int, request: ChatRequest) -> int:
+    session = await service.get_session_by_id(db, request.session_id)
+    await service.add_message(db, session.id, user_id, request.message, "user")
+    bot_response = await service.generate_bot_response(db, request.message)
+    await service.add_message(db, session.id, None, bot_response.response, "assistant")
+    return session.id
+
+
+async def run(turns: int, max_statements: int) -> bool:
+    session_factory = await create_sqlite_database(generate_cars(10_000))
+    install_statement_counter(session_factory.kw["bind"])
+    queries = load_queries()
+    service = ChatService()
+
+    async with session_factory() as db:
+        await db.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+        await db.commit()
+        # First turn creates the session and warms the catalog index
+        first = await service.process_chat_request(db, 1, ChatRequest(message=queries[0]))
+        session_id = first.session_id
+
+        results = {}
+        for label in ("legacy", "unit of work"):
+            samples, statements, commits = [], [], 0
+            for i in range(turns):
+                request = ChatRequest(message=queries[i % len(queries)], session_id=session_id)
+                with track_statements() as counter:
+                    started = time.perf_counter()
+                    if label == "legacy":
+                        await legacy_turn(service, db, 1, request)
+                    else:
+                        await service.process_chat_request(db, 1, request)
+                    samples.append(time.perf_counter() - started)
+                statements.append(counter.count)
+                commits += counter.commits
+            results[label] = statements
+            print(
+                f"{label:>12} | statements/turn max {max(statements)} avg {sum(statements) / len(statements):.2f} | "
+                f"commits/turn {commits / turns:.2f} | "
+                f"p50 {percentile(samples, 50) * 1000:6.2f} ms p99 {percentile(samples, 99) * 1000:6.2f} ms"
+            )
+
+        recommendations = (await db.execute(select(func.count()).select_from(Recommendation))).scalar_one()
+        print(f"recommendation rows stored: {recommendations}")
+
+    worst = max(results["unit of work"])
+    if worst > max_statements:
+        print(f"FAIL: a chat turn executed {worst} statements, budget is {max_statements}")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--max-statements", type=int, default=3)
+    args = parser.parse_args()
+    if not asyncio.run(run(args.turns, args.max_statements)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: cold start, time to the first successful chat send (POST /api/v1/send).
+
+Each run starts a fresh Python process that imports the app, runs the startup hooks and
+sends one chat message through httpx's ASGITransport against a prepared SQLite file,
+with DB_WARMUP_ENABLED off and on. Reported times are measured from process spawn.
+
+Run from the repository root:
+    python -m benchmarks.bench_cold_start --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert
+
+from app.models.user import User
+from benchmarks.common import create_sqlite_database, generate_cars
+
+
+async def child(spawned_at: float):
+    import httpx
+    from types import SimpleNamespace
+
+    imported_at = time.time()
+    from app.main import app
+    from app.services.user import UserService
+    imported = time.time() - imported_at
+
+    await app.router.startup()
+    ready = time.time()
+
+    token = UserService().create_user_token(SimpleNamespace(id=1, username="bench"))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        sent = time.time()
+        response = await client.post(
+            "/api/v1/send",
+            json={"message": "Ищу бюджетный кроссовер до 3 млн"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        done = time.time()
+    assert response.status_code == 200, response.text
+    await app.router.shutdown()
+
+    print(json.dumps({
+        "import_seconds": imported,
+        "ready_seconds": ready - spawned_at,
+        "first_request_seconds": done - sent,
+        "first_success_seconds": done - spawned_at,
+    }))
+
+
+async def prepare(path: str):
+    session_factory = await create_sqlite_database(generate_cars(20_000), path=path)
+    async with session_factory() as db:
+        await db.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+        await db.commit()
+    await session_factory.kw["bind"].dispose()
+
+
+def run_child(path: str, warmup: bool) -> dict:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite+aiosqlite:///{path}",
+        DB_WARMUP_ENABLED=str(warmup).lower(),
+        REDIS_CACHE_ENABLED="false",
+        BENCH_SPAWNED_AT=repr(time.time()),
+    )
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_cold_start", "--child"],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(float(os.environ["BENCH_SPAWNED_AT"])))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        asyncio.run(prepare(path))
+        for warmup in (False, True):
+            results = [run_child(path, warmup) for _ in range(args.runs)]
+            median = {key: statistics.median(r[key] for r in results) for key in results[0]}
+            print(
+                f"warm-up {'on ' if warmup else 'off'} | median of {args.runs} | "
+                f"ready {median['ready_seconds'] * 1000:7.1f} ms | "
+                f"first chat send {median['first_request_seconds'] * 1000:7.1f} ms | "
+                f"first success after spawn {median['first_success_seconds'] * 1000:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark: cost of carrying recommender parameters over between chat turns.
+
+"history replay" rebuilds the conversation parameters the way it would have to be done
+without session state: load the history with get_session_messages (limit 100) and re-extract
+and merge the parameters of every user message. "session state" is what ChatService does:
+one ConversationStateStore read, a merge of the new message, one write. Both are measured
+on sessions with a growing number of earlier turns (SQLite in memory, Redis tier off).
+
+A short multi-turn dialogue is printed first to show the carried-over parameters. Before
+that, PHRASINGS are checked: follow-ups whose merged parameters must come out as listed
+(price phrases that are bounds, not "cheaper"/"pricier", everyday words that must not
+reset the search, and new bounds that contradict carried ones). The script exits with status 1 when one does not.
+
+Run from the repository root:
+    python -m benchmarks.bench_conversation_state --histories 10,50,100
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.user import ChatRequest
+from app.services.conversation_state import ConversationState, conversation_states
+from app.services.user import ChatService
+from app.utils.car_recommender import recommendation_engine
+from benchmarks.bench_extract_parameters import load_queries
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+DIALOGUE = [
+    "Ищу кроссовер до 3 млн",
+    "а с полным приводом?",
+    "а подешевле?",
+    "а гибрид есть?",
+    "и поновее",
+    "новый поиск: седан бмв",
+]
+
+PREVIOUS = {"body_type": "suv", "make": "Kia", "max_price": 3_000_000}
+# (parameters so far, message, parameters after the merge)
+PHRASINGS = [
+    ({"body_type": "suv"}, "а не дороже 3 млн?", {"body_type": "suv", "max_price": 3_000_000}),
+    ({"body_type": "suv"}, "Кроссовер не дороже 3 млн", {"body_type": "suv", "max_price": 3_000_000}),
+    ({"body_type": "suv"}, "дешевле 2 млн есть?", {"body_type": "suv", "max_price": 2_000_000}),
+    ({"body_type": "suv"}, "дороже 2 млн", {"body_type": "suv", "min_price": 2_000_000}),
+    ({"body_type": "suv"}, "не дешевле 2 млн", {"body_type": "suv", "min_price": 2_000_000}),
+    (PREVIOUS, "а подешевле?", {**PREVIOUS, "max_price": 2_400_000}),
+    (PREVIOUS, "подороже, но до 5 млн", {**PREVIOUS, "max_price": 5_000_000}),
+    (PREVIOUS, "подешевле, до 2 млн", {**PREVIOUS, "max_price": 2_000_000}),
+    (PREVIOUS, "сначала покажи с полным приводом", {**PREVIOUS, "features": ["полный привод"]}),
+    (PREVIOUS, "посчитай заново", PREVIOUS),
+    (PREVIOUS, "новый поиск: седан", {"body_type": "sedan"}),
+    (PREVIOUS, "сбросить", {}),
+    # A new bound that contradicts a carried one replaces it instead of leaving an empty range
+    ({"body_type": "suv", "min_price": 3_000_000}, "а дешевле 2 млн?", {"body_type": "suv", "max_price": 2_000_000}),
+    ({"body_type": "suv", "max_price": 2_000_000}, "от 3 млн", {"body_type": "suv", "min_price": 3_000_000}),
+    ({"body_type": "suv", "min_price": 1_000_000}, "до 2 млн", {"body_type": "suv", "min_price": 1_000_000, "max_price": 2_000_000}),
+    ({"max_year": 2015}, "новее 2020", {"min_year": 2020}),
+]
+
+
+async def replay_history(service: ChatService, db, session_id: int, message: str) -> dict:
+    messages, _ = await service.get_session_messages(db, session_id, limit=100)
+    state = ConversationState()
+    for item in messages:
+        if item.role == "user":
+            turn, params = recommendation_engine.resolve_parameters(item.content, state)
+            state.params = params
+    return recommendation_engine.resolve_parameters(message, state)[1]
+
+
+async def session_state(session_id: int, message: str) -> dict:
+    state = await conversation_states.get(session_id)
+    turn, params = recommendation_engine.resolve_parameters(message, state)
+    state.record(turn, params, [])
+    await conversation_states.save(session_id, state)
+    return params
+
+
+def check_phrasings() -> bool:
+    ok = True
+    for previous, message, expected in PHRASINGS:
+        _, params = recommendation_engine.resolve_parameters(message, ConversationState(params=previous))
+        if params != expected:
+            print(f"FAIL: {message!r} after {previous}: {params}, expected {expected}")
+            ok = False
+    print(f"phrasings: {len(PHRASINGS)} checked, {'all' if ok else 'not all'} as expected\n")
+    return ok
+
+
+async def run(histories: list, rounds: int):
+    settings.REDIS_CACHE_ENABLED = False
+    settings.RECOMMENDATION_CACHE_ENABLED = False
+    session_factory = await create_sqlite_database(generate_cars(10_000))
+    service = ChatService()
+    queries = load_queries()
+
+    async with session_factory() as db:
+        await db.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+        await db.commit()
+
+        session_id = None
+        for message in DIALOGUE:
+            response = await service.process_chat_request(db, 1, ChatRequest(message=message, session_id=session_id))
+            session_id = response.session_id
+            state = await conversation_states.get(session_id)
+            print(f"{message:>28} -> {state.params} ({len(response.car_recommendations)} cars)")
+        print()
+
+        for history in histories:
+            session_id = None
+            for i in range(history):
+                request = ChatRequest(message=queries[i % len(queries)], session_id=session_id)
+                session_id = (await service.process_chat_request(db, 1, request)).session_id
+
+            samples = {"history replay": [], "session state": []}
+            for i in range(rounds):
+                message = DIALOGUE[i % len(DIALOGUE)]
+                started = time.perf_counter()
+                await replay_history(service, db, session_id, message)
+                samples["history replay"].append(time.perf_counter() - started)
+                started = time.perf_counter()
+                await session_state(session_id, message)
+                samples["session state"].append(time.perf_counter() - started)
+
+            for name, values in samples.items():
+                print(
+                    f"{history:>4} earlier turns | {name:>14} | p50 {percentile(values, 50) * 1000:7.3f} ms "
+                    f"p99 {percentile(values, 99) * 1000:7.3f} ms"
+                )
+
+    await session_factory.kw["bind"].dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--histories", default="10,50,100")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    if not check_phrasings():
+        sys.exit(1)
+    asyncio.run(run([int(h) for h in args.histories.split(",")], args.rounds))
+
+
+if __name__ == "__main__":
+    main()
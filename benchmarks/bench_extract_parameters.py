@@ -0,0 +1,135 @@
+"""
+Micro-benchmark: compiled single-pass extract_parameters vs the previous
+keyword-scanning implementation.
+
+Also checks that keywords match at word starts only, and short ones (abbreviations,
+prepositions) as whole words only, while stems keep matching their inflections; the script
+exits with status 1 when a case in WORD_BOUNDARY_CASES extracts something else.
+
+Run from the repository root:
+    python -m benchmarks.bench_extract_parameters
+"""
+
+import re
+import sys
+import timeit
+from pathlib import Path
+
+from app.utils.car_recommender import CarRecommendationEngine
+
+
+CORPUS_PATH = Path(__file__).parent / "data" / "queries_ru.txt"
+
+# (query, expected parameters)
+WORD_BOUNDARY_CASES = [
+    # "ат" inside "желательно" is not the automatic transmission
+    ("Внедорожник от 5 млн, желательно ленд крузер", {"body_type": "suv", "make": "Toyota", "min_price": 5000000}),
+    ("атмосферный двигатель", {}),
+    # "от" inside "работы" is not a lower bound
+    ("пикап для работы, 2 млн", {"body_type": "truck", "max_price": 2000000}),
+    # Whole-word abbreviations still match
+    ("седан на ат", {"body_type": "sedan", "transmission": "automatic"}),
+    ("киа, мт, от 1 млн", {"make": "Kia", "transmission": "manual", "min_price": 1000000}),
+    # Stems still match their inflections
+    ("седана с автоматом", {"body_type": "sedan", "transmission": "automatic"}),
+]
+
+
+def load_queries() -> list:
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def legacy_extract_parameters(engine: CarRecommendationEngine, query: str) -> dict:
+    """The implementation before the compiled matcher, kept verbatim for comparison"""
+    query_lower = query.lower()
+    params = {}
+
+    for param in ('body_type', 'fuel_type', 'transmission', 'make'):
+        for value, keywords in engine.parameter_keywords[param].items():
+            if any(keyword in query_lower for keyword in keywords):
+                params[param] = value
+
+    price_match = re.search(r'(\d{1,3}(?:\s*\d{3})*)\s*(?:руб|рублей|тыс|тысяч|млн|миллион)', query_lower)
+    if price_match:
+        price = int(price_match.group(1).replace(' ', ''))
+        if 'тыс' in query_lower or 'тысяч' in query_lower:
+            price *= 1000
+        elif 'млн' in query_lower or 'миллион' in query_lower:
+            price *= 1000000
+        if any(word in query_lower for word in ['до', 'менее', 'не_больше', 'бюджет']):
+            params['max_price'] = price
+        elif any(word in query_lower for word in ['более', 'больше', 'от']):
+            params['min_price'] = price
+        else:
+            params['max_price'] = price
+
+    year_match = re.search(r'(?:\b(20\d{2})\b)', query_lower)
+    if year_match:
+        year = int(year_match.group(1))
+        if any(word in query_lower for word in ['новый', 'новее', 'свежий']):
+            params['min_year'] = year
+        elif any(word in query_lower for word in ['старый', 'старше']):
+            params['max_year'] = year
+        else:
+            params['year'] = year
+
+    hp_match = re.search(r'(\d+)\s*(?:л\.с\.|лс|лошадиных)', query_lower)
+    if hp_match:
+        power = int(hp_match.group(1))
+        if any(word in query_lower for word in ['мощнее', 'мощный', 'мощность']):
+            params['min_horsepower'] = power
+        else:
+            params['horsepower'] = power
+
+    return params
+
+
+def check_word_boundaries(engine: CarRecommendationEngine) -> bool:
+    ok = True
+    for query, expected in WORD_BOUNDARY_CASES:
+        extracted = engine.extract_parameters(query)
+        if extracted != expected:
+            print(f"FAIL: {query!r} extracted {extracted}, expected {expected}")
+            ok = False
+    return ok
+
+
+def main(repeat: int = 5, number: int = 200):
+    engine = CarRecommendationEngine()
+    if not check_word_boundaries(engine):
+        sys.exit(1)
+    queries = load_queries()
+    # Long queries show how each implementation scales with query length
+    long_queries = [" ".join(queries[i:i + 8]) for i in range(0, len(queries), 8)]
+
+    for label, corpus in (("short", queries), ("long", long_queries)):
+        legacy = min(timeit.repeat(
+            lambda: [legacy_extract_parameters(engine, q) for q in corpus],
+            repeat=repeat, number=number
+        ))
+        compiled = min(timeit.repeat(
+            lambda: [engine.extract_parameters(q) for q in corpus],
+            repeat=repeat, number=number
+        ))
+        per_query = number * len(corpus)
+        print(
+            f"{label:>5} queries ({len(corpus)}): "
+            f"legacy {legacy / per_query * 1e6:7.2f} us/query, "
+            f"compiled {compiled / per_query * 1e6:7.2f} us/query, "
+            f"speedup x{legacy / compiled:.2f}"
+        )
+
+    # Report where the two implementations disagree (overlapping substring hits)
+    diffs = [
+        (q, legacy_extract_parameters(engine, q), engine.extract_parameters(q))
+        for q in queries
+    ]
+    diffs = [d for d in diffs if d[1] != d[2]]
+    print(f"identical results: {len(queries) - len(diffs)}/{len(queries)}")
+    for query, old, new in diffs:
+        print(f"  {query!r}\n    legacy:   {old}\n    compiled: {new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark and regression check: cost of the /metrics instrumentation on the request path.
+
+POST /api/v1/send is driven through the ASGI app, on the application's own engine (a SQLite
+file), with METRICS_ENABLED on and off, alternating request by request. Printed: latency of
+both, the time and size of a GET /metrics scrape, and an excerpt of it. As in
+bench_stage_timing, the check measures the added work directly: the request histogram update
+with its route lookup plus the SQL timing hooks for the statements a /send executes. The
+script exits with status 1 when that exceeds --max-overhead percent of the p50 latency
+without metrics, or when a scrape line is not valid Prometheus text.
+
+Run from the repository root:
+    python -m benchmarks.bench_metrics --cars 50000 --requests 400
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.metrics import request_histograms, sql_histograms
+from app.db.instrumentation import _after_cursor_execute, _before_cursor_execute, track_statements
+from app.main import app
+from app.models.user import User
+from app.services.user import UserService
+from benchmarks.bench_chat_stream import call
+from benchmarks.bench_extract_parameters import load_queries
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*"(?:,[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*")*\})? \S+$')
+
+
+def instrumentation_cost(statements: int, rounds: int = 20_000) -> float:
+    """Seconds the metrics add to one request executing the given number of SQL statements"""
+    context = SimpleNamespace()
+    statement = "SELECT cars.id FROM cars WHERE cars.price <= ?"
+    started = time.perf_counter()
+    for _ in range(rounds):
+        request_started = time.perf_counter()
+        for _ in range(statements):
+            _before_cursor_execute(None, None, statement, (), context, False)
+            _after_cursor_execute(None, None, statement, (), context, False)
+        request_histograms.observe(("POST", "/api/v1/send", "200"), time.perf_counter() - request_started)
+    return (time.perf_counter() - started) / rounds
+
+
+async def run(cars: int, requests: int, max_overhead: float) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        session_factory = await create_sqlite_database(generate_cars(cars), path=path)
+        async with session_factory() as db:
+            await db.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+            await db.commit()
+        await session_factory.kw["bind"].dispose()
+        # Requests go through get_db, so the pool gauges and SQL hooks are the application's own
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+
+        token = UserService().create_user_token(SimpleNamespace(id=1, username="bench"))
+        queries = load_queries()
+        for query in queries:
+            await call("/api/v1/send", {"message": query}, token)
+
+        samples = {True: [], False: []}
+        statements = []
+        for i in range(requests * 2):
+            enabled = settings.METRICS_ENABLED = i % 2 == 0
+            with track_statements() as counter:
+                status, _, total, body = await call("/api/v1/send", {"message": queries[(i // 2) % len(queries)]}, token)
+            assert status == 200, body
+            samples[enabled].append(total)
+            statements.append(counter.count)
+        settings.METRICS_ENABLED = True
+
+        started = time.perf_counter()
+        status, _, _, body = await call("/metrics", {}, token, method="GET")
+        scrape = time.perf_counter() - started
+        assert status == 200, body
+        text = body.decode()
+
+        from app.database import get_engine
+        await get_engine().dispose()
+
+    for enabled, values in samples.items():
+        print(
+            f"metrics {'on ' if enabled else 'off'} | {len(values)} requests | "
+            f"p50 {percentile(values, 50) * 1000:7.3f} ms p99 {percentile(values, 99) * 1000:7.3f} ms"
+        )
+    lines = text.splitlines()
+    print(f"/metrics scrape: {scrape * 1000:.2f} ms, {len(lines)} lines, {len(text) / 1024:.1f} KiB")
+    for line in lines:
+        if line.startswith(("car_advisor_request_duration_seconds_count", "car_advisor_sql_statement_duration_seconds_count",
+                            "car_advisor_db_pool_checkouts_total", "car_advisor_cache_hit_ratio",
+                            "car_advisor_stage_duration_seconds_sum")):
+            print(f"  {line}")
+
+    invalid = [line for line in lines if not line.startswith("#") and not SAMPLE_LINE.match(line)]
+    if invalid:
+        print(f"FAIL: {len(invalid)} invalid lines, e.g. {invalid[0]!r}")
+        return False
+
+    sql_histograms.reset()
+    per_request = max(statements)
+    cost = instrumentation_cost(per_request)
+    overhead = cost / percentile(samples[False], 50) * 100
+    print(f"metrics per request ({per_request} SQL statements): {cost * 1e6:.2f} us = {overhead:.3f}% of the p50 without")
+    if overhead > max_overhead:
+        print(f"FAIL: metrics add {overhead:.3f}% latency, budget is {max_overhead}%")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--max-overhead", type=float, default=1.0, help="percent of the p50 without metrics")
+    args = parser.parse_args()
+    if not asyncio.run(run(args.cars, args.requests, args.max_overhead)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
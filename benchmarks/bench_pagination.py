@@ -0,0 +1,100 @@
+"""
+Benchmark: OFFSET vs keyset (cursor) pagination at page 1 and page 10,000.
+
+Also checks that cursors of the wrong shape or with values of the wrong type (a string id, a
+number for a timestamp, a boolean) raise ValueError, which the routers answer with 400, instead
+of reaching the query; the script exits with status 1 otherwise.
+
+Run from the repository root:
+    python -m benchmarks.bench_pagination --page-size 20
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.models.user import ChatSession, Message, User
+from app.repositories.car import CarRepository
+from app.repositories.chat import MessageRepository
+from app.utils.pagination import encode_cursor
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+DEEP_PAGE = 10_000
+# Cursors each repository must reject: cars take (id,), messages (ISO timestamp, id)
+MALFORMED_CURSORS = {
+    "cars": ["not base64!", encode_cursor(), encode_cursor("1"), encode_cursor(True), encode_cursor(1.5),
+             encode_cursor(None), encode_cursor(1, 2)],
+    "messages": [encode_cursor(1), encode_cursor(1700000000, 1), encode_cursor("yesterday", 1),
+                 encode_cursor("2024-01-01T00:00:00", "1"), encode_cursor(["2024-01-01T00:00:00"], 1),
+                 encode_cursor("2024-01-01T00:00:00", None)],
+}
+
+
+async def measure(fetch, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await fetch()
+        samples.append(time.perf_counter() - started)
+    return percentile(samples, 50) * 1000
+
+
+async def run(page_size: int, rounds: int) -> bool:
+    ok = True
+    rows = page_size * (DEEP_PAGE + 1)
+    session_factory = await create_sqlite_database(generate_cars(rows))
+
+    started_at = datetime.utcnow() - timedelta(days=30)
+    async with session_factory() as db:
+        await db.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+        await db.execute(insert(ChatSession), [{"id": 1, "user_id": 1, "title": "bench"}])
+        await db.execute(insert(Message), [
+            {"chat_session_id": 1, "user_id": 1, "content": "Ищу кроссовер до 3 млн", "role": "user",
+             "timestamp": started_at + timedelta(seconds=i)}
+            for i in range(rows)
+        ])
+        await db.commit()
+
+        deep_offset = page_size * (DEEP_PAGE - 1)
+        for label, repository, fetch_page in (
+            ("cars", CarRepository(), lambda repo, **kw: repo.get_all(db, limit=page_size, **kw)),
+            ("messages", MessageRepository(), lambda repo, **kw: repo.get_messages_by_session(db, 1, limit=page_size, **kw)),
+        ):
+            for cursor in MALFORMED_CURSORS[label]:
+                try:
+                    await fetch_page(repository, cursor=cursor)
+                except ValueError:
+                    continue
+                print(f"FAIL: {label} accepted the malformed cursor {cursor!r}")
+                ok = False
+
+            # Cursor pointing at the end of page 9,999, as a client paging forward would hold
+            previous_page = await fetch_page(repository, skip=deep_offset - page_size)
+            deep_cursor = repository.next_cursor(previous_page, page_size)
+
+            offset_first = await measure(lambda: fetch_page(repository), rounds)
+            offset_deep = await measure(lambda: fetch_page(repository, skip=deep_offset), rounds)
+            cursor_deep = await measure(lambda: fetch_page(repository, cursor=deep_cursor), rounds)
+            print(
+                f"{label:>8} ({rows} rows, {page_size}/page) | page 1 {offset_first:7.3f} ms | "
+                f"page {DEEP_PAGE} offset {offset_deep:7.3f} ms | page {DEEP_PAGE} cursor {cursor_deep:7.3f} ms"
+            )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    if not asyncio.run(run(args.page_size, args.rounds)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
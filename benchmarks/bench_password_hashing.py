@@ -0,0 +1,86 @@
+"""
+Benchmark: chat latency while logins are running, bcrypt inline vs in the password hashing pool.
+
+Chat clients send a CarRecommendationEngine.process_query (catalog index, SQLite in memory)
+every 50 ms while login clients verify bcrypt passwords, either synchronously on the event loop
+(the previous behaviour) or through PasswordHasher.
+
+Run from the repository root:
+    python -m benchmarks.bench_password_hashing --seconds 5 --logins 4 --chats 8
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.services.password import PasswordHasher, PasswordHasherBusy, pwd_context
+from app.utils.car_recommender import CarRecommendationEngine
+from benchmarks.bench_extract_parameters import load_queries
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+async def run_mode(mode: str, session_factory, seconds: float, logins: int, chats: int,
+                   chat_interval: float = 0.05):
+    hasher = PasswordHasher(max_pending=logins)
+    hashed = pwd_context.hash("correct horse battery staple")
+    engine = CarRecommendationEngine()
+    queries = load_queries()
+    deadline = time.perf_counter() + seconds
+    chat_samples, login_samples = [], []
+
+    async def login_client():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            if mode == "inline":
+                pwd_context.verify("correct horse battery staple", hashed)
+            else:
+                try:
+                    await hasher.verify("correct horse battery staple", hashed)
+                except PasswordHasherBusy:
+                    pass
+            login_samples.append(time.perf_counter() - started)
+            await asyncio.sleep(0)
+
+    async def chat_client(offset: int):
+        # Messages arrive on a fixed schedule; latency counts from the scheduled arrival,
+        # so time spent waiting for a blocked event loop is included
+        i = offset
+        scheduled = time.perf_counter()
+        async with session_factory() as db:
+            while scheduled < deadline:
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                await engine.process_query(db, queries[i % len(queries)])
+                chat_samples.append(time.perf_counter() - scheduled)
+                i += 1
+                scheduled += chat_interval
+
+    await asyncio.gather(*(login_client() for _ in range(logins)), *(chat_client(i) for i in range(chats)))
+    hasher.shutdown()
+
+    print(
+        f"{mode:>6} | chat requests {len(chat_samples):6} p50 {percentile(chat_samples, 50) * 1000:8.2f} ms "
+        f"p99 {percentile(chat_samples, 99) * 1000:8.2f} ms max {max(chat_samples) * 1000:8.2f} ms | "
+        f"logins {len(login_samples):4} p50 {percentile(login_samples, 50) * 1000:7.1f} ms"
+    )
+
+
+async def main_async(seconds: float, logins: int, chats: int):
+    session_factory = await create_sqlite_database(generate_cars(10_000))
+    # Warm the catalog index outside the measurement
+    async with session_factory() as db:
+        await CarRecommendationEngine().process_query(db, load_queries()[0])
+    for mode in ("inline", "pool"):
+        await run_mode(mode, session_factory, seconds, logins, chats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--logins", type=int, default=4)
+    parser.add_argument("--chats", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.seconds, args.logins, args.chats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: many free-text queries through one POST /api/v1/recommendations/batch call vs one
+POST /api/v1/send call each.
+
+The queries are the ones of benchmarks/data with a varying budget appended, so many of them
+are distinct texts that still reduce to a repeated parameter set. Reported per mode: total
+time, queries per second and SQL statements; for the NDJSON stream also the time to the first
+line. Run once with the catalog index and the recommendation cache off (every lookup is SQL)
+and once with the defaults. The per-query baseline runs on the first --send queries only.
+
+Run from the repository root:
+    python -m benchmarks.bench_recommendation_batch --cars 200000 --queries 5000 --send 300
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.instrumentation import install_statement_counter, track_statements
+from app.db.session import get_db
+from app.main import app
+from app.models.user import User
+from app.services.recommendation_cache import RecommendationCache
+from app.services.user import UserService
+from app.utils.car_recommender import recommendation_engine
+from benchmarks.bench_chat_stream import call
+from benchmarks.bench_extract_parameters import load_queries
+from benchmarks.common import create_sqlite_database, generate_cars
+
+
+def batch_queries(count: int) -> list:
+    base = load_queries()
+    return [f"{base[i % len(base)]} до {1 + (i // len(base)) % 30} млн" for i in range(count)]
+
+
+def report(label: str, queries: int, total: float, statements: int, first_line: float = None):
+    line = (
+        f"{label:>16} | {queries:>6} queries | {total:7.2f} s | {queries / total:8.0f} queries/s | "
+        f"{statements / queries:6.2f} statements/query"
+    )
+    if first_line is not None:
+        line += f" | first line {first_line * 1000:.1f} ms"
+    print(line)
+
+
+async def run_mode(label: str, token: str, queries: list, send_queries: int):
+    print(label)
+    with track_statements() as counter:
+        started = asyncio.get_running_loop().time()
+        for query in queries[:send_queries]:
+            status, _, _, body = await call("/api/v1/send", {"message": query}, token)
+            assert status == 200, body
+        total = asyncio.get_running_loop().time() - started
+    report("/send each", send_queries, total, counter.count)
+
+    with track_statements() as counter:
+        status, _, total, body = await call("/api/v1/recommendations/batch", {"queries": queries}, token)
+    assert status == 200, body
+    results = json.loads(body)["results"]
+    assert [item["index"] for item in results] == list(range(len(queries)))
+    report("batch JSON", len(queries), total, counter.count)
+
+    with track_statements() as counter:
+        status, first_line, total, body = await call(
+            "/api/v1/recommendations/batch", {"queries": queries}, token, accept="application/x-ndjson"
+        )
+    assert status == 200, body
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert [item["cars"] for item in lines] == [item["cars"] for item in results]
+    report("batch NDJSON", len(queries), total, counter.count, first_line)
+
+
+async def main_async(cars: int, count: int, send_queries: int):
+    queries = batch_queries(count)
+    unique = {RecommendationCache.canonical(recommendation_engine.extract_parameters(q)) for q in queries}
+    print(f"{len(queries)} queries, {len(set(queries))} distinct texts, {len(unique)} distinct parameter sets")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        session_factory = await create_sqlite_database(generate_cars(cars), path=os.path.join(tmp, "bench.db"))
+        install_statement_counter(session_factory.kw["bind"])
+        async with session_factory() as db:
+            await db.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+            await db.commit()
+
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        token = UserService().create_user_token(SimpleNamespace(id=1, username="bench"))
+
+        settings.CATALOG_INDEX_ENABLED = False
+        settings.RECOMMENDATION_CACHE_ENABLED = False
+        await run_mode("SQL lookups (index and cache off)", token, queries, send_queries)
+
+        settings.CATALOG_INDEX_ENABLED = True
+        settings.RECOMMENDATION_CACHE_ENABLED = True
+        await run_mode("defaults (catalog index, recommendation cache)", token, queries, send_queries)
+
+        app.dependency_overrides.clear()
+        await session_factory.kw["bind"].dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--send", type=int, default=300)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.cars, args.queries, args.send))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: recommendation lookups with and without the recommendation cache.
+
+Replays the query corpus plus reworded variants (different casing, filler words) through
+CarRecommendationEngine.process_query against SQLite, with the catalog index disabled so
+every cache miss is a database query. Redis is used when reachable, otherwise only the
+in-process tier is exercised.
+
+Run from the repository root:
+    python -m benchmarks.bench_recommendation_cache --cars 100000 --rounds 5
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.core.config import settings
+from app.db.instrumentation import install_statement_counter, track_statements
+from app.services.recommendation_cache import recommendation_cache
+from app.utils.car_recommender import CarRecommendationEngine
+from benchmarks.bench_extract_parameters import load_queries
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+FILLERS = ["Здравствуйте! ", "Подскажите, ", "Пожалуйста, ", ""]
+
+
+def reworded_queries(rounds: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(rounds):
+        for query in load_queries():
+            text = rng.choice(FILLERS) + query
+            queries.append(text.upper() if rng.random() < 0.2 else text)
+    rng.shuffle(queries)
+    return queries
+
+
+async def run(cache_enabled: bool, session_factory, queries: list):
+    settings.RECOMMENDATION_CACHE_ENABLED = cache_enabled
+    recommendation_cache.cache.clear_local()
+    for key in recommendation_cache.stats:
+        recommendation_cache.stats[key] = 0
+
+    engine = CarRecommendationEngine()
+    samples = []
+    async with session_factory() as db:
+        with track_statements() as counter:
+            for query in queries:
+                started = time.perf_counter()
+                await engine.process_query(db, query)
+                samples.append(time.perf_counter() - started)
+
+    label = "cache" if cache_enabled else "no cache"
+    hit_rate = recommendation_cache.cache.hit_rate() if cache_enabled else 0.0
+    print(
+        f"{label:>9} | {len(queries)} queries | mean {sum(samples) / len(samples) * 1000:7.3f} ms "
+        f"p50 {percentile(samples, 50) * 1000:7.3f} ms p99 {percentile(samples, 99) * 1000:7.3f} ms | "
+        f"SQL statements {counter.count} | hit rate {hit_rate:.1%} {recommendation_cache.stats if cache_enabled else ''}"
+    )
+
+
+async def main_async(cars: int, rounds: int):
+    settings.CATALOG_INDEX_ENABLED = False
+    session_factory = await create_sqlite_database(generate_cars(cars))
+    install_statement_counter(session_factory.kw["bind"])
+    queries = reworded_queries(rounds)
+    for cache_enabled in (False, True):
+        await run(cache_enabled, session_factory, queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.cars, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
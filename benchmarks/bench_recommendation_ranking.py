@@ -0,0 +1,124 @@
+"""
+Benchmark: weighted top-k ranking vs the hard filter of the catalog index.
+
+For every query of benchmarks/data the recommender filters are answered three ways:
+  hard filter   CarCatalogIndex.filter(limit=5), the previous behaviour
+  ranked top-k  CarScorer.top: exact matches first, then the closest relaxed cars
+  ranked sort   the same scores ordered with a full lexsort instead of the top-k partition
+The "strict" set narrows every query further (recent year, tight budget, three features) so
+that few cars match exactly and the scoring pass runs. Also reported: how many queries got no
+car at all, and how many were topped up with relaxed matches. On the first size the DB
+candidate path is checked against the index path.
+
+Run from the repository root:
+    python -m benchmarks.bench_recommendation_ranking --sizes 10000,100000,1000000
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.car import CarService
+from app.utils.car_scoring import CarScorer
+from app.utils.catalog_index import CarCatalogIndex
+from benchmarks.bench_catalog_index import query_filters
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+LIMIT = 5
+MIN_SCORE = 0.5
+STRICT = {
+    "min_year": 2023, "max_year": 2024, "max_price": 1_500_000,
+    "features": ["панорамная крыша", "кожаный салон", "bluetooth"],
+}
+
+
+def full_sort(scorer: CarScorer, index: CarCatalogIndex, filters: dict) -> np.ndarray:
+    positions, scores = scorer.scores(index, filters)
+    keep = scores >= MIN_SCORE
+    positions, scores = positions[keep], scores[keep]
+    order = np.lexsort((positions, -scores))
+    return index.cars(positions[order][:LIMIT])
+
+
+def timed(fn, rounds: int) -> tuple:
+    samples, result = [], None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return samples, result
+
+
+async def check_db_path(cars: list, index: CarCatalogIndex, scorer: CarScorer, filters: list) -> int:
+    """The candidate query + in-memory ranking must agree with ranking over the whole index"""
+    session_factory = await create_sqlite_database(cars)
+    service = CarService()
+    mismatches = 0
+    async with session_factory() as db:
+        for f in filters:
+            candidates = await service.get_ranking_candidates(db, f, scorer.relax(f), 1000)
+            candidate_index = CarCatalogIndex()
+            candidate_index.build(candidates)
+            db_ids = [car.id for car in candidate_index.cars(scorer.top(candidate_index, f, LIMIT, MIN_SCORE))]
+            index_ids = [car.id for car in index.cars(scorer.top(index, f, LIMIT, MIN_SCORE))]
+            mismatches += db_ids != index_ids
+    await session_factory.kw["bind"].dispose()
+    return mismatches
+
+
+def compare(label: str, index: CarCatalogIndex, scorer: CarScorer, filters: list, rounds: int):
+    samples = {"hard filter": [], "ranked top-k": [], "ranked sort": []}
+    empty_hard = empty_ranked = relaxed = 0
+    for f in filters:
+        taken, hard = timed(lambda: index.filter(**f, limit=LIMIT), rounds)
+        samples["hard filter"] += taken
+        taken, ranked = timed(lambda: index.cars(scorer.top(index, f, LIMIT, MIN_SCORE)), rounds)
+        samples["ranked top-k"] += taken
+        taken, sorted_ = timed(lambda: full_sort(scorer, index, f), rounds)
+        samples["ranked sort"] += taken
+
+        assert [car.id for car in ranked] == [car.id for car in sorted_], f
+        empty_hard += not hard
+        empty_ranked += not ranked
+        relaxed += len(ranked) > len(hard)
+
+    print(
+        f"{len(index):>9} cars | {label:>6} | {len(filters)} queries | no result: hard {empty_hard}, "
+        f"ranked {empty_ranked} | topped up with relaxed matches: {relaxed}"
+    )
+    for name, values in samples.items():
+        print(f"{'':>20} {name:>13} | p50 {percentile(values, 50) * 1000:8.3f} ms p99 {percentile(values, 99) * 1000:8.3f} ms")
+
+
+async def run(size: int, filters: list, rounds: int, check_db: bool):
+    cars = generate_cars(size)
+    index = CarCatalogIndex()
+    index.build(SimpleNamespace(**car) for car in cars)
+    scorer = CarScorer()
+    strict = [{**f, **STRICT} for f in filters]
+
+    compare("chat", index, scorer, filters, rounds)
+    compare("strict", index, scorer, strict, rounds)
+
+    if check_db:
+        mismatches = await check_db_path(cars, index, scorer, filters + strict)
+        print(f"{'':>20} DB candidate path vs index path: {mismatches} of {len(filters) * 2} queries differ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    filters = query_filters()
+    for position, size in enumerate(int(s) for s in args.sizes.split(",")):
+        asyncio.run(run(size, filters, args.rounds, check_db=position == 0))
+
+
+if __name__ == "__main__":
+    main()
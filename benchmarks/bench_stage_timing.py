@@ -0,0 +1,147 @@
+"""
+Benchmark and regression check: overhead of the per-stage request timers (app/core/timing.py).
+
+POST /api/v1/send is driven through the ASGI app with STAGE_TIMING_ENABLED on and off,
+alternating request by request, and the latency percentiles of both are printed with a
+sample Server-Timing header and the stage histograms. End-to-end differences of a fraction
+of a percent are below the run-to-run noise, so the check itself measures what a timed
+request adds directly: a StageTimings, one stage per instrumented step, the header and the
+histogram update. The script exits with status 1 when that cost exceeds --max-overhead
+percent of the untimed p50 latency, or when a timed response's Server-Timing header does not
+name every stage in STAGES plus "total".
+
+Run from the repository root:
+    python -m benchmarks.bench_stage_timing --cars 50000 --requests 400
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.metrics import stage_histograms
+from app.core.timing import StageTimings, _current_timings, observe_stages, stage
+from app.db.session import get_db
+from app.main import app
+from app.models.user import User
+from app.services.user import UserService
+from benchmarks.bench_chat_stream import call
+from benchmarks.bench_extract_parameters import load_queries
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+# Stages a /send request goes through
+STAGES = ("auth", "session", "extract", "match", "respond", "persist")
+
+
+def header_stages(header: str) -> set:
+    """Metric names of a Server-Timing header value"""
+    return {entry.split(";", 1)[0].strip() for entry in header.split(",") if entry.strip()}
+
+
+def instrumentation_cost(rounds: int = 20_000) -> tuple:
+    """Seconds the timers add to one request: (enabled, disabled)"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        timings = StageTimings()
+        token = _current_timings.set(timings)
+        for name in STAGES:
+            with stage(name):
+                pass
+        timings.header()
+        _current_timings.reset(token)
+        observe_stages(timings)
+    enabled = (time.perf_counter() - started) / rounds
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for name in STAGES:
+            with stage(name):
+                pass
+    disabled = (time.perf_counter() - started) / rounds
+    return enabled, disabled
+
+
+async def run(cars: int, requests: int, max_overhead: float) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        session_factory = await create_sqlite_database(generate_cars(cars), path=os.path.join(tmp, "bench.db"))
+        async with session_factory() as db:
+            await db.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+            await db.commit()
+
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        token = UserService().create_user_token(SimpleNamespace(id=1, username="bench"))
+        queries = load_queries()
+
+        # Warm-up: catalog index, caches, statement cache
+        for query in queries:
+            await call("/api/v1/send", {"message": query}, token)
+        stage_histograms.reset()
+
+        samples = {True: [], False: []}
+        headers = {}
+        missing = set()
+        for i in range(requests * 2):
+            enabled = settings.STAGE_TIMING_ENABLED = i % 2 == 0
+            message = queries[(i // 2) % len(queries)]
+            status, _, total, body = await call("/api/v1/send", {"message": message}, token, response_headers=headers)
+            assert status == 200, body
+            assert ("server-timing" in headers) == enabled
+            samples[enabled].append(total)
+            if enabled:
+                header = headers["server-timing"]
+                missing |= {*STAGES, "total"} - header_stages(header)
+            headers.clear()
+        settings.STAGE_TIMING_ENABLED = True
+
+        app.dependency_overrides.clear()
+        await session_factory.kw["bind"].dispose()
+
+    for enabled, values in samples.items():
+        print(
+            f"timing {'on ' if enabled else 'off'} | {len(values)} requests | "
+            f"p50 {percentile(values, 50) * 1000:7.3f} ms p99 {percentile(values, 99) * 1000:7.3f} ms"
+        )
+    print(f"Server-Timing: {header}")
+    for name, histogram in stage_histograms.snapshot().items():
+        print(f"{name:>8} | {histogram['count']:>5} observations | mean {histogram['sum'] / histogram['count'] * 1000:7.3f} ms")
+
+    if missing:
+        print(f"FAIL: Server-Timing of /send is missing the stages {sorted(missing)}")
+        return False
+
+    baseline = percentile(samples[False], 50)
+    enabled_cost, disabled_cost = instrumentation_cost()
+    overhead = enabled_cost / baseline * 100
+    print(
+        f"timers per request: {enabled_cost * 1e6:.2f} us enabled, {disabled_cost * 1e6:.2f} us disabled "
+        f"= {overhead:.3f}% of the untimed p50"
+    )
+    if overhead > max_overhead:
+        print(f"FAIL: stage timing adds {overhead:.3f}% latency, budget is {max_overhead}%")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cars", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--max-overhead", type=float, default=1.0, help="percent of the untimed p50")
+    args = parser.parse_args()
+    if not asyncio.run(run(args.cars, args.requests, args.max_overhead)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+End-to-end benchmark suite: a replayed corpus of buyer queries through the whole app.
+
+For each database (SQLite always, PostgreSQL with --postgres-url) a Faker catalog of --cars
+cars is loaded and the scenarios below are replayed through the ASGI app in-process with
+httpx, on the application's own engine and caches:
+    chat_send              POST /api/v1/send, one corpus query per request
+    chat_stream            POST /api/v1/send/stream
+    recommendations_batch  POST /api/v1/recommendations/batch, --batch-size queries per request
+    cars_list              GET /api/v1/?limit=20
+    profile                GET /api/v1/profile
+Reported per scenario: throughput, p50/p95/p99 latency and SQL statements per request.
+
+The corpus is benchmarks/data/queries_ru.txt by default; --corpus takes a text file (one
+query per line) or JSON Lines (a string or a query/message/text/body field per line).
+
+--output writes the results as JSON. --baseline compares them with a stored run and exits
+with status 1 on a regression: more SQL statements per request, or latency/throughput worse
+than --tolerance. --output benchmarks/data/baseline.json refreshes the stored baseline.
+
+The PostgreSQL database is dropped and recreated: point --postgres-url at a scratch one.
+
+Run from the repository root:
+    python -m benchmarks.bench_suite --cars 20000 --requests 200 --baseline benchmarks/data/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import httpx
+import sqlalchemy
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.core.cache import TwoTierCache, catalog_version
+from app.db.instrumentation import track_statements
+from app.main import app
+from app.models.base import Base
+from app.models.user import Car, User
+from app.repositories.car import CarRepository
+from app.services.bulk_recommendations import read_queries
+from app.services.user import UserService
+from benchmarks.bench_extract_parameters import CORPUS_PATH
+from benchmarks.common import generate_faker_cars, percentile
+
+
+SCENARIOS = ("chat_send", "chat_stream", "recommendations_batch", "cars_list", "profile")
+# Latency metrics compared against the baseline, and whether higher is better
+COMPARED = {"p50_ms": False, "p95_ms": False, "throughput_rps": True}
+
+
+def load_corpus(path: str) -> list:
+    if str(path).endswith((".jsonl", ".ndjson")):
+        return read_queries(path)
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+async def prepare_database(url: str, cars: list) -> None:
+    """Recreate the schema and load the catalog, its feature associations and the benchmark user"""
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        for start in range(0, len(cars), 10_000):
+            await conn.execute(insert(Car), cars[start:start + 10_000])
+        await conn.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        for start in range(0, len(cars), 5000):
+            await CarRepository().sync_features(db, {car["id"]: car["features"] for car in cars[start:start + 5000]})
+        await db.commit()
+        if engine.dialect.name == "postgresql":
+            await db.execute(sqlalchemy.text("SELECT setval('cars_id_seq', (SELECT max(id) FROM cars))"))
+            await db.execute(sqlalchemy.text("ANALYZE"))
+            await db.commit()
+    await engine.dispose()
+
+
+async def reset_app(url: str) -> None:
+    """Point the application at a fresh engine and drop every in-process cache and the catalog index"""
+    if database.engine is not None:
+        await database.engine.dispose()
+    database.engine = database.async_session = None
+    os.environ["DATABASE_URL"] = url
+    for cache in TwoTierCache.instances:
+        cache.clear_local()
+    # A new catalog version makes the catalog index reload from the new database
+    await catalog_version.bump()
+
+
+def scenario_requests(name: str, queries: list, requests: int, batch_size: int) -> list:
+    """(method, path, json body) of each request of a scenario"""
+    if name == "chat_send":
+        return [("POST", "/api/v1/send", {"message": queries[i % len(queries)]}) for i in range(requests)]
+    if name == "chat_stream":
+        return [("POST", "/api/v1/send/stream", {"message": queries[i % len(queries)]}) for i in range(requests)]
+    if name == "recommendations_batch":
+        batches = max(1, requests // 10)
+        return [
+            ("POST", "/api/v1/recommendations/batch",
+             {"queries": [queries[(i * batch_size + j) % len(queries)] for j in range(batch_size)]})
+            for i in range(batches)
+        ]
+    if name == "cars_list":
+        return [("GET", "/api/v1/?limit=20", None)] * requests
+    return [("GET", "/api/v1/profile", None)] * requests
+
+
+async def run_scenario(client: httpx.AsyncClient, plan: list, concurrency: int) -> dict:
+    samples, statements = [], []
+    pending = iter(plan)
+
+    async def worker():
+        for method, path, body in pending:
+            with track_statements() as counter:
+                started = time.perf_counter()
+                response = await client.request(method, path, json=body)
+                samples.append(time.perf_counter() - started)
+            assert response.status_code == 200, (path, response.status_code, response.text[:200])
+            statements.append(counter.count)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+    return {
+        "requests": len(samples),
+        "seconds": round(seconds, 4),
+        "throughput_rps": round(len(samples) / seconds, 2),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "statements_per_request": round(sum(statements) / len(statements), 3),
+    }
+
+
+async def run_backend(label: str, url: str, cars: list, queries: list, args) -> dict:
+    started = time.perf_counter()
+    await prepare_database(url, cars)
+    print(f"{label}: {len(cars)} cars loaded in {time.perf_counter() - started:.1f} s")
+    await reset_app(url)
+
+    token = UserService().create_user_token(SimpleNamespace(id=1, username="bench"))
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                 headers={"Authorization": f"Bearer {token}"}, timeout=None) as client:
+        # Warm-up: engine, catalog index, statement caches
+        await run_scenario(client, scenario_requests("chat_send", queries, len(queries), args.batch_size), 1)
+        for name in SCENARIOS:
+            plan = scenario_requests(name, queries, args.requests, args.batch_size)
+            results[name] = result = await run_scenario(client, plan, args.concurrency)
+            print(
+                f"{label:>10} | {name:>21} | {result['requests']:>5} req | {result['throughput_rps']:8.1f} req/s | "
+                f"p50 {result['p50_ms']:8.2f} ms p95 {result['p95_ms']:8.2f} ms p99 {result['p99_ms']:8.2f} ms | "
+                f"{result['statements_per_request']:5.2f} SQL/req"
+            )
+    await database.engine.dispose()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions of results against the baseline, as messages"""
+    regressions = []
+    for backend, scenarios in results.items():
+        for name, result in scenarios.items():
+            expected = baseline.get(backend, {}).get(name)
+            if expected is None:
+                continue
+            if result["statements_per_request"] > expected["statements_per_request"] + 0.01:
+                regressions.append(
+                    f"{backend}/{name}: {result['statements_per_request']} SQL statements per request, "
+                    f"baseline {expected['statements_per_request']}"
+                )
+            for metric, higher_is_better in COMPARED.items():
+                value, reference = result[metric], expected[metric]
+                worse = value < reference / (1 + tolerance) if higher_is_better else value > reference * (1 + tolerance)
+                if worse:
+                    regressions.append(f"{backend}/{name}: {metric} {value}, baseline {reference}")
+    return regressions
+
+
+async def main_async(args) -> bool:
+    queries = load_corpus(args.corpus)
+    cars = generate_faker_cars(args.cars)
+    print(f"{len(queries)} corpus queries, {len(cars)} cars")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        results["sqlite"] = await run_backend(
+            "sqlite", f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}", cars, queries, args
+        )
+        if args.postgres_url:
+            try:
+                results["postgresql"] = await run_backend("postgresql", args.postgres_url, cars, queries, args)
+            except OSError as e:
+                print(f"postgresql: skipped, cannot connect ({e})")
+
+    report = {
+        "meta": {
+            "cars": args.cars, "requests": args.requests, "concurrency": args.concurrency,
+            "batch_size": args.batch_size, "corpus": os.path.basename(args.corpus), "queries": len(queries),
+            "python": platform.python_version(), "sqlalchemy": sqlalchemy.__version__,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION: {message}")
+        if regressions:
+            return False
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cars", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrent clients")
+    parser.add_argument("--batch-size", type=int, default=100, help="queries per batch request")
+    parser.add_argument("--corpus", default=str(CORPUS_PATH))
+    parser.add_argument("--postgres-url", default=None, help="postgresql+asyncpg://... of a scratch database")
+    parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="fail on regressions against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed latency/throughput slowdown")
+    args = parser.parse_args()
+    if not asyncio.run(main_async(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: chat turn latency and commit count with synchronous persistence vs write-behind.
+
+Uses a temporary SQLite file so concurrent clients get their own connections.
+
+Run from the repository root:
+    python -m benchmarks.bench_write_behind --clients 20 --turns 25
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import event, func, insert, select
+
+from app.core.config import settings
+from app.models.user import ChatSession, Message, User
+from app.schemas.user import ChatRequest
+from app.services.user import ChatService
+from app.services.write_behind import chat_write_behind
+from benchmarks.bench_extract_parameters import load_queries
+from benchmarks.common import create_sqlite_database, generate_cars, percentile
+
+
+async def run_mode(write_behind: bool, clients: int, turns: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        session_factory = await create_sqlite_database(generate_cars(5_000), path=os.path.join(tmp, "bench.db"))
+        engine = session_factory.kw["bind"]
+        commits = [0]
+        event.listen(engine.sync_engine, "commit", lambda conn: commits.__setitem__(0, commits[0] + 1))
+
+        async with session_factory() as db:
+            await db.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+            await db.execute(insert(ChatSession), [{"id": i + 1, "user_id": 1, "title": f"client {i}"} for i in range(clients)])
+            await db.commit()
+
+        settings.CHAT_WRITE_BEHIND_ENABLED = write_behind
+        chat_write_behind.configure(session_factory)
+        service = ChatService()
+        queries = load_queries()
+        samples = []
+
+        async def client(session_id: int):
+            for i in range(turns):
+                request = ChatRequest(message=queries[(session_id + i) % len(queries)], session_id=session_id)
+                async with session_factory() as db:
+                    started = time.perf_counter()
+                    await service.process_chat_request(db, 1, request)
+                    samples.append(time.perf_counter() - started)
+
+        # Warm the catalog index outside the measurement
+        async with session_factory() as db:
+            await service.generate_bot_response(db, queries[0])
+        commits[0] = 0
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(i + 1) for i in range(clients)))
+        request_time = time.perf_counter() - started
+        await chat_write_behind.stop()
+        total_time = time.perf_counter() - started
+
+        async with session_factory() as db:
+            stored = (await db.execute(select(func.count()).select_from(Message))).scalar_one()
+        await engine.dispose()
+
+    label = "write-behind" if write_behind else "synchronous"
+    print(
+        f"{label:>12} | {clients * turns} turns | mean {sum(samples) / len(samples) * 1000:7.2f} ms "
+        f"p50 {percentile(samples, 50) * 1000:7.2f} ms "
+        f"p99 {percentile(samples, 99) * 1000:7.2f} ms | requests done in {request_time:5.2f} s, "
+        f"persisted in {total_time:5.2f} s | commits {commits[0]} | messages stored {stored}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=25)
+    args = parser.parse_args()
+    for write_behind in (False, True):
+        asyncio.run(run_mode(write_behind, args.clients, args.turns))
+
+
+if __name__ == "__main__":
+    main()
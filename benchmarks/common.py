@@ -0,0 +1,138 @@
+"""Shared helpers for the benchmark scripts: synthetic catalog, in-memory database, percentiles"""
+
+import random
+from datetime import datetime
+from typing import List, Optional
+
+from faker import Faker
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+from app.models.user import Car
+
+
+# Make -> models, modelled on the sample data in populate_cars.py
+MODELS = {
+    "Toyota": ["Camry", "RAV4", "Land Cruiser", "Corolla"],
+    "BMW": ["X5", "3 Series", "5 Series", "X3"],
+    "Mercedes": ["E-Class", "C-Class", "GLE", "CLS"],
+    "Honda": ["Civic", "CR-V", "Accord"],
+    "Kia": ["Sportage", "Cerato", "Rio", "Sorento"],
+    "Hyundai": ["Tucson", "Sonata", "Solaris", "Creta"],
+    "Marussia": ["B2"],
+    "Koenigsegg": ["CC850"],
+}
+BODY_TYPES = ["sedan", "suv", "hatchback", "truck", "crossover"]
+FUEL_TYPES = ["gasoline", "diesel", "hybrid", "electric"]
+TRANSMISSIONS = ["automatic", "manual", "cvt"]
+FEATURES = [
+    "Круиз-контроль", "кожаный салон", "камера заднего вида", "Bluetooth",
+    "подогрев сидений", "полный привод", "панорамная крыша", "адаптивный круиз-контроль",
+]
+
+
+def generate_cars(n: int, seed: int = 42) -> List[dict]:
+    """Generate n synthetic cars with the same columns as the cars table"""
+    rng = random.Random(seed)
+    makes = list(MODELS)
+    now = datetime.utcnow()
+    cars = []
+    for i in range(n):
+        make = rng.choice(makes)
+        engine_size = round(rng.uniform(1.0, 5.0), 1)
+        cars.append({
+            "id": i + 1,
+            "make": make,
+            # The numbered trim keeps (make, model, year) unique, as the cars table requires
+            "model": f"{rng.choice(MODELS[make])} {i + 1}",
+            "year": rng.randint(2005, 2024),
+            "body_type": rng.choice(BODY_TYPES),
+            "fuel_type": rng.choice(FUEL_TYPES),
+            "transmission": rng.choice(TRANSMISSIONS),
+            "engine_size": engine_size,
+            "horsepower": int(engine_size * rng.uniform(60, 120)),
+            "price": float(rng.randrange(300_000, 15_000_000, 10_000)),
+            "description": f"{make} в хорошем состоянии, один владелец.",
+            "features": ", ".join(rng.sample(FEATURES, 3)),
+            "created_at": now,
+            "updated_at": now,
+        })
+    return cars
+
+
+# Extra vocabulary for the Faker catalog, from the sample cars of populate_cars.py
+EXTRA_FEATURES = [
+    "беспроводная зарядка", "пневмоподвеска", "климат-контроль", "центральный замок",
+    "адаптивная подвеска", "спортивная подвеска", "аудиосистема", "датчики парковки",
+]
+EXTRA_BODY_TYPES = ["coupe", "minivan", "wagon"]
+
+
+def generate_faker_cars(n: int, seed: int = 42, descriptions: int = 1000) -> List[dict]:
+    """
+    Generate n cars shaped like the populate_cars.py samples: Faker (ru_RU) descriptions,
+    3-6 features from a wider vocabulary and prices that grow with power and age.
+    Descriptions are drawn from a pool so large catalogs stay fast to generate.
+    """
+    fake = Faker("ru_RU")
+    fake.seed_instance(seed)
+    rng = random.Random(seed)
+    pool = [fake.paragraph(nb_sentences=2) for _ in range(descriptions)]
+    makes = list(MODELS)
+    body_types = BODY_TYPES + EXTRA_BODY_TYPES
+    features = FEATURES + EXTRA_FEATURES
+    now = datetime.utcnow()
+    cars = []
+    for i in range(n):
+        make = rng.choice(makes)
+        year = rng.randint(2005, 2024)
+        engine_size = round(rng.uniform(1.0, 5.0), 1)
+        horsepower = int(engine_size * rng.uniform(60, 120))
+        price = round(horsepower * rng.uniform(8_000, 20_000) * (0.93 ** (2024 - year)), -4)
+        cars.append({
+            "id": i + 1,
+            "make": make,
+            # The numbered trim keeps (make, model, year) unique, as the cars table requires
+            "model": f"{rng.choice(MODELS[make])} {i + 1}",
+            "year": year,
+            "body_type": rng.choice(body_types),
+            "fuel_type": rng.choice(FUEL_TYPES),
+            "transmission": rng.choice(TRANSMISSIONS),
+            "engine_size": engine_size,
+            "horsepower": horsepower,
+            "price": max(price, 300_000.0),
+            "description": rng.choice(pool),
+            "features": ", ".join(rng.sample(features, rng.randint(3, 6))),
+            "created_at": now,
+            "updated_at": now,
+        })
+    return cars
+
+
+async def create_sqlite_database(cars: List[dict], chunk_size: int = 50_000,
+                                 path: Optional[str] = None) -> async_sessionmaker:
+    """
+    Create a SQLite database with all tables and the given cars.
+    In memory by default; pass a file path when several connections must run concurrently.
+    """
+    if path is None:
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+        )
+    else:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 30})
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for start in range(0, len(cars), chunk_size):
+            await conn.execute(insert(Car), cars[start:start + chunk_size])
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
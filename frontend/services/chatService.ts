@@ -2,15 +2,71 @@ import apiClient from './api';
 
 interface ChatMessageRequest {
   message: string;
+  session_id?: number;
 }
 
 interface ChatMessageResponse {
   response: string;
 }
 
+// Events of POST /api/v1/send/stream (Server-Sent Events)
+export interface ChatStreamHandlers {
+  onParams?: (params: Record<string, unknown>) => void;
+  onCar?: (car: Record<string, unknown>, text: string, position: number) => void;
+  onDone?: (data: { session_id: number; text: string; response: string }) => void;
+  onError?: (detail: string) => void;
+}
+
 export const chatService = {
   sendMessage: async (request: ChatMessageRequest): Promise<ChatMessageResponse> => {
     const response = await apiClient.post('/chat/', request);
     return response.data;
   },
-};
\ No newline at end of file
+
+  // Streams the reply: parameters first, then each car as soon as it is found, then the closing text
+  streamMessage: async (request: ChatMessageRequest, handlers: ChatStreamHandlers): Promise<void> => {
+    const token = localStorage.getItem('token');
+    const response = await fetch(`${apiClient.defaults.baseURL}/api/v1/send/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Accept: 'text/event-stream',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify(request),
+    });
+    if (!response.ok || !response.body) {
+      handlers.onError?.(`HTTP ${response.status}`);
+      return;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const chunk = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = 'message';
+        let data = '';
+        for (const line of chunk.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        }
+        const payload = data ? JSON.parse(data) : {};
+
+        if (event === 'params') handlers.onParams?.(payload.params);
+        else if (event === 'car') handlers.onCar?.(payload.car, payload.text, payload.position);
+        else if (event === 'done') handlers.onDone?.(payload);
+        else if (event === 'error') handlers.onError?.(payload.detail);
+      }
+    }
+  },
+};
@@ -0,0 +1,24 @@
+import argparse
+import asyncio
+
+from app.db.session import get_session_factory
+from app.services.catalog_import import CatalogImporter
+
+
+async def import_catalog(path: str, file_format: str = None, chunk_size: int = None):
+    """Import a dealer feed (CSV, JSONL or NDJSON) into the cars table"""
+    importer = CatalogImporter(get_session_factory(), chunk_size=chunk_size)
+    result = await importer.import_file(path, file_format)
+    print(
+        f"Read {result.rows_read} rows, wrote {result.rows_written}, skipped {result.rows_invalid} invalid "
+        f"in {result.seconds:.1f} s ({result.rows_per_second:,.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import cars, upserting on (make, model, year)")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl", "ndjson"], default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(import_catalog(args.path, args.format, args.chunk_size))